@@ -14,6 +14,9 @@
 #    under the License.
 
 
+import base64
+import datetime
+import itertools
 import json
 import os
 import re
@@ -21,6 +24,8 @@ import re
 import enum
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
+import six
 from six.moves import urllib
 import webob
 
@@ -187,6 +192,107 @@ def get_sort_params(params, default_key='created_at', default_dir='desc'):
     return sort_keys, sort_dirs
 
 
+# Sort keys of the API sorting by a column with a different name.
+_SORT_KEY_COLUMNS = {'name': 'display_name'}
+# Sort keys added by the database API to make the sort unique, see
+# process_sort_params in cinder.db.sqlalchemy.api.
+_DEFAULT_SORT_KEYS = ('created_at', 'id')
+# Types of the sort key values of a page token.
+_PAGE_TOKEN_VALUE_TYPES = six.string_types + six.integer_types + (float,)
+
+
+def _format_sort(sort_keys, sort_dirs):
+    return ['%s:%s' % (_SORT_KEY_COLUMNS.get(key, key), sort_dir)
+            for key, sort_dir in zip(sort_keys, sort_dirs)]
+
+
+class PageToken(object):
+    """Continuation token of a seek paginated listing.
+
+    The token has the sort of the listing and the values of the sort keys for
+    the last item of a page, so the next page can be queried from these
+    values instead of looking up the marker item first. It is passed to the
+    database API instead of a marker.
+    """
+
+    def __init__(self, sort, values):
+        self.sort = sort
+        self.values = values
+
+    @staticmethod
+    def get_default_keys(sort_keys):
+        """Return the keys the database adds to sort_keys."""
+        return [key for key in _DEFAULT_SORT_KEYS if key not in sort_keys]
+
+    @classmethod
+    def from_item(cls, item, sort_keys, sort_dirs):
+        values = {}
+        for key in itertools.chain(sort_keys,
+                                   cls.get_default_keys(sort_keys)):
+            value = item[key]
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            values[key] = value
+        return cls(_format_sort(sort_keys, sort_dirs), values)
+
+    @classmethod
+    def decode(cls, token):
+        """Decode a page token, checking the values are usable as sort keys.
+
+        Values are scalars, and those of the timestamp keys are ISO 8601
+        strings, like the ones from_item sets.
+        """
+        try:
+            data = json.loads(
+                base64.urlsafe_b64decode(token.encode('ascii')).decode())
+            sort, values = data['sort'], data['values']
+            if not isinstance(sort, list) or not isinstance(values, dict):
+                raise ValueError()
+            for key, value in values.items():
+                if value is None:
+                    continue
+                if not isinstance(value, _PAGE_TOKEN_VALUE_TYPES):
+                    raise ValueError()
+                if key.endswith('_at'):
+                    timeutils.parse_isotime(value)
+            return cls(sort, values)
+        except (TypeError, ValueError, KeyError):
+            msg = _('Invalid page_token %s.') % token
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+    def encode(self):
+        data = json.dumps({'sort': self.sort, 'values': self.values})
+        return base64.urlsafe_b64encode(data.encode()).decode('ascii')
+
+
+def get_page_token(params, marker, sort_keys, sort_dirs):
+    """Return the page token of a listing, or its marker if there is none.
+
+    The 'page_token' parameter is removed from the request parameters. It
+    cannot be used with a marker and must be used with the sort parameters of
+    the listing that returned it.
+
+    :param params: `wsgi.Request`'s GET dictionary
+    :param marker: the marker of the listing, see get_pagination_params
+    :param sort_keys: the sort keys of the listing
+    :param sort_dirs: the sort directions of the listing
+    :returns: PageToken, or the marker
+    """
+    token = params.pop('page_token', None)
+    if token is None:
+        return marker
+    if marker is not None:
+        msg = _("The 'marker' and 'page_token' parameters cannot be used "
+                "together.")
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    page_token = PageToken.decode(token)
+    if page_token.sort != _format_sort(sort_keys, sort_dirs):
+        msg = _("The 'page_token' parameter does not match the sort "
+                "parameters.")
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    return page_token
+
+
 def get_request_url(request):
     url = request.application_url
     headers = request.headers
@@ -237,6 +343,9 @@ class ViewBuilder(object):
     """Model API responses as dictionaries."""
 
     _collection_name = None
+    # Microversion from which the next links of the collection have a
+    # page_token instead of a marker, None if it cannot be seek paginated.
+    _page_token_version = None
 
     def _get_links(self, request, identifier):
         return [{"rel": "self",
@@ -244,10 +353,15 @@ class ViewBuilder(object):
                 {"rel": "bookmark",
                  "href": self._get_bookmark_link(request, identifier), }]
 
-    def _get_next_link(self, request, identifier, collection_name):
+    def _get_next_link(self, request, identifier, collection_name,
+                       page_token=None):
         """Return href string with proper limit and marker params."""
         params = request.params.copy()
-        params["marker"] = identifier
+        if page_token is not None:
+            params.pop('marker', None)
+            params['page_token'] = page_token.encode()
+        else:
+            params["marker"] = identifier
         prefix = self._update_link_prefix(get_request_url(request),
                                           CONF.public_endpoint)
         url = os.path.join(prefix,
@@ -311,6 +425,19 @@ class ViewBuilder(object):
                             collection_name):
         links = []
         last_item = items[-1]
+        if (self._page_token_version and
+                request.api_version_request.matches(
+                    self._page_token_version)):
+            sort_keys, sort_dirs = get_sort_params(request.params.copy())
+            sort_keys = [_SORT_KEY_COLUMNS.get(key, key) for key in sort_keys]
+            links.append({
+                "rel": "next",
+                "href": self._get_next_link(
+                    request, None, collection_name,
+                    page_token=PageToken.from_item(last_item, sort_keys,
+                                                   sort_dirs)),
+            })
+            return links
         if id_key in last_item:
             last_item_id = last_item[id_key]
         else:
@@ -103,6 +103,9 @@ class BackupsController(wsgi.Controller):
         req_version = req.api_version_request
         marker, limit, offset = common.get_pagination_params(filters)
         sort_keys, sort_dirs = common.get_sort_params(filters)
+        if req_version.matches(mv.PAGE_TOKEN):
+            marker = common.get_page_token(filters, marker, sort_keys,
+                                           sort_dirs)
 
         show_count = False
         if req_version.matches(
@@ -151,6 +151,10 @@ ATTACHMENT_CREATE_MODE_ARG = '3.54'
 
 TRANSFER_WITH_SNAPSHOTS = '3.55'
 
+IMAGE_CACHE_WARM = '3.56'
+
+PAGE_TOKEN = '3.57'
+
 
 def get_mv_header(version):
     """Gets a formatted HTTP microversion header.
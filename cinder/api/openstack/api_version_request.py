@@ -127,6 +127,9 @@ REST_API_VERSION_HISTORY = """
              Also, additional parameters will not be allowed.
     * 3.54 - Add ``mode`` argument to attachment-create.
     * 3.55 - Support transfer volume with snapshots
+    * 3.56 - Add image cache warm API.
+    * 3.57 - Support seek pagination with page tokens when listing volumes,
+             snapshots and backups.
 """
 
 # The minimum and maximum versions of the API supported
@@ -134,7 +137,7 @@ REST_API_VERSION_HISTORY = """
 # minimum version of the API supported.
 # Explicitly using /v2 endpoints will still work
 _MIN_API_VERSION = "3.0"
-_MAX_API_VERSION = "3.55"
+_MAX_API_VERSION = "3.57"
 _LEGACY_API_VERSION2 = "2.0"
 UPDATED = "2018-07-17T00:00:00Z"
 
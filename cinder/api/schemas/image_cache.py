@@ -0,0 +1,29 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Schema for V3 Image Cache API.
+
+"""
+
+from cinder.api.validation import parameter_types
+
+warm = {
+    'type': 'object',
+    'properties': {
+        'image_id': parameter_types.uuid,
+        'host': parameter_types.hostname,
+        'cluster': parameter_types.hostname,
+    },
+    'required': ['image_id'],
+    'additionalProperties': False,
+}
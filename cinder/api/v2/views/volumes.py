@@ -16,6 +16,7 @@
 import six
 
 from cinder.api import common
+from cinder.api import microversions as mv
 from cinder import group as group_api
 from cinder.objects import fields
 from cinder.volume import group_types
@@ -25,11 +26,16 @@ class ViewBuilder(common.ViewBuilder):
     """Model a server API response as a python dictionary."""
 
     _collection_name = "volumes"
+    _page_token_version = mv.PAGE_TOKEN
 
     def __init__(self):
         """Initialize view builder."""
         super(ViewBuilder, self).__init__()
 
+    # Volume fields used by the summary view, the only ones that have to be
+    # loaded to list volumes without details.
+    summary_fields = ('id', 'display_name')
+
     def summary_list(self, request, volumes, volume_count=None):
         """Show a list of volumes without many details."""
         return self._list_view(self.summary, request, volumes,
@@ -114,15 +114,18 @@ class VolumeController(wsgi.Controller):
             filters['display_name'] = filters.pop('name')
 
         self.volume_api.check_volume_filters(filters)
+        fields = None if is_detail else self._view_builder.summary_fields
         volumes = self.volume_api.get_all(context, marker, limit,
                                           sort_keys=sort_keys,
                                           sort_dirs=sort_dirs,
                                           filters=filters,
                                           viewable_admin_meta=True,
-                                          offset=offset)
+                                          offset=offset,
+                                          fields=fields)
 
-        for volume in volumes:
-            utils.add_visible_admin_metadata(volume)
+        if is_detail:
+            for volume in volumes:
+                utils.add_visible_admin_metadata(volume)
 
         req.cache_db_volumes(volumes.objects)
 
@@ -0,0 +1,40 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""The image cache API."""
+
+from cinder.api import common
+from cinder.api import microversions as mv
+from cinder.api.openstack import wsgi
+from cinder.api.schemas import image_cache
+from cinder.api import validation
+from cinder import volume
+
+
+class ImageCacheController(wsgi.Controller):
+
+    def __init__(self, *args, **kwargs):
+        self.volume_api = volume.API()
+
+    @wsgi.Controller.api_version(mv.IMAGE_CACHE_WARM)
+    @wsgi.response(202)
+    @validation.schema(image_cache.warm)
+    def warm(self, req, body):
+        """Add an image to the image-volume cache of a backend pool."""
+        ctxt = req.environ['cinder.context']
+        cluster_name, host = common.get_cluster_host(req, body)
+        self.volume_api.warm_image_cache(ctxt, body['image_id'], host=host,
+                                         cluster_name=cluster_name)
+
+
+def create_resource():
+    return wsgi.Resource(ImageCacheController())
@@ -31,6 +31,7 @@ from cinder.api.v3 import group_snapshots
 from cinder.api.v3 import group_specs
 from cinder.api.v3 import group_types
 from cinder.api.v3 import groups
+from cinder.api.v3 import image_cache
 from cinder.api.v3 import limits
 from cinder.api.v3 import messages
 from cinder.api.v3 import resource_filters
@@ -184,6 +185,11 @@ class APIRouter(cinder.api.openstack.APIRouter):
                         collection={'detail': 'GET', 'summary': 'GET'},
                         member={'action': 'POST'})
 
+        self.resources['image_cache'] = image_cache.create_resource()
+        mapper.resource('image_cache', 'image_cache',
+                        controller=self.resources['image_cache'],
+                        collection={'warm': 'POST'})
+
         self.resources['workers'] = workers.create_resource()
         mapper.resource('worker', 'workers',
                         controller=self.resources['workers'],
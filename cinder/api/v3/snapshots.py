@@ -78,6 +78,9 @@ class SnapshotsController(snapshots_v2.SnapshotsController):
         marker, limit, offset = common.get_pagination_params(search_opts)
 
         req_version = req.api_version_request
+        if req_version.matches(mv.PAGE_TOKEN):
+            marker = common.get_page_token(search_opts, marker, sort_keys,
+                                           sort_dirs)
         show_count = False
         if req_version.matches(
                 mv.SUPPORT_COUNT_INFO) and 'with_count' in search_opts:
@@ -101,6 +101,9 @@ class VolumeController(volumes_v2.VolumeController):
         params = req.params.copy()
         marker, limit, offset = common.get_pagination_params(params)
         sort_keys, sort_dirs = common.get_sort_params(params)
+        if req_version.matches(mv.PAGE_TOKEN):
+            marker = common.get_page_token(params, marker, sort_keys,
+                                           sort_dirs)
         filters = params
 
         show_count = False
@@ -123,19 +126,27 @@ class VolumeController(volumes_v2.VolumeController):
             mv.VOLUME_LIST_BOOTABLE, None)
         self.volume_api.check_volume_filters(filters, strict)
 
+        fields = None
+        if not is_detail:
+            # The next link of the page needs the sort keys of the last volume
+            fields = set(self._view_builder.summary_fields)
+            fields.update(sort_keys, common.PageToken.get_default_keys(
+                sort_keys))
         volumes = self.volume_api.get_all(context, marker, limit,
                                           sort_keys=sort_keys,
                                           sort_dirs=sort_dirs,
                                           filters=filters.copy(),
                                           viewable_admin_meta=True,
-                                          offset=offset)
+                                          offset=offset,
+                                          fields=fields)
         total_count = None
         if show_count:
             total_count = self.volume_api.calculate_resource_count(
                 context, 'volume', filters)
 
-        for volume in volumes:
-            utils.add_visible_admin_metadata(volume)
+        if is_detail:
+            for volume in volumes:
+                utils.add_visible_admin_metadata(volume)
 
         req.cache_db_volumes(volumes.objects)
 
@@ -14,12 +14,14 @@
 #    under the License.
 
 from cinder.api import common
+from cinder.api import microversions as mv
 
 
 class ViewBuilder(common.ViewBuilder):
     """Model snapshot API responses as a python dictionary."""
 
     _collection_name = "snapshots"
+    _page_token_version = mv.PAGE_TOKEN
 
     def __init__(self):
         """Initialize view builder."""
@@ -22,6 +22,9 @@
 """
 
 import abc
+import binascii
+import bisect
+import collections
 import hashlib
 import json
 import os
@@ -52,19 +55,193 @@ chunkedbackup_service_opts = [
                default='zlib',
                choices=['none', 'off', 'no',
                         'zlib', 'gzip',
-                        'bz2', 'bzip2'],
-               help='Compression algorithm (None to disable)'),
+                        'bz2', 'bzip2',
+                        'zstd', 'lz4'],
+               help='Compression algorithm (None to disable). The zstd '
+                    'and lz4 algorithms require the zstandard and lz4 '
+                    'python libraries.'),
+    cfg.IntOpt('backup_compression_level',
+               help='Compression level used by the zstd and lz4 '
+                    'algorithms. The default of the library is used when '
+                    'not set.'),
+    cfg.BoolOpt('backup_adaptive_compression',
+                default=False,
+                help='Compress a sample of every chunk first and store the '
+                     'chunk uncompressed when the sample does not compress '
+                     'well, to save CPU time on volumes with data that is '
+                     'already compressed or encrypted.'),
+    cfg.IntOpt('backup_chunk_upload_concurrency',
+               default=1,
+               min=1,
+               help='Number of chunks that chunked backup drivers compress '
+                    'and write to the backup repository at the same time, '
+                    'while the following chunks are read from the volume '
+                    'and hashed. Every chunk in flight is kept in memory, '
+                    'so memory usage grows with this value multiplied by '
+                    'the chunk size of the driver.'),
+    cfg.StrOpt('backup_sha256file_format',
+               default='json',
+               choices=['json', 'binary'],
+               help='Format of the sha256 file written by chunked backup '
+                    'drivers, used by incremental backups. The binary '
+                    'format stores packed digests and is much smaller and '
+                    'faster to parse, but can only be read by services '
+                    'that support it. Files in both formats can be read.'),
+    cfg.BoolOpt('backup_sparse_detection',
+                default=False,
+                help='Do not store the hash blocks of a volume that only '
+                     'contain zeros when using chunked backup drivers. They '
+                     'are recorded as holes in the backup metadata and are '
+                     'deallocated from the volume on restore when possible. '
+                     'Backups with holes can\'t be restored by services '
+                     'that don\'t support them.'),
+    cfg.IntOpt('backup_restore_prefetch_objects',
+               default=0,
+               min=0,
+               help='Number of backup objects that chunked backup drivers '
+                    'download and decompress ahead of the object being '
+                    'written to the volume during a restore. Every '
+                    'prefetched object is kept in memory.'),
+    cfg.IntOpt('backup_restore_fsync_interval',
+               default=0,
+               min=0,
+               help='Amount of data, in MiB, that chunked backup drivers '
+                    'write to the volume during a restore before calling '
+                    'fsync. Data is always synced when the restore of each '
+                    'backup finishes. The default of 0 syncs after every '
+                    'object.'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(chunkedbackup_service_opts)
 
+# Binary sha256 files start with this line, followed by a line with the JSON
+# encoded header and the packed digests of all the blocks.
+SHA256FILE_BINARY_MAGIC = b'CINDER-SHA256\n'
+SHA256_DIGEST_SIZE = hashlib.sha256().digest_size
+
+# With adaptive compression chunks are stored uncompressed when their first
+# ADAPTIVE_COMPRESSION_SAMPLE_SIZE bytes don't compress below this ratio.
+ADAPTIVE_COMPRESSION_SAMPLE_SIZE = 64 * units.Ki
+ADAPTIVE_COMPRESSION_MIN_RATIO = 0.9
+
 
 # Object writer and reader returned by inheriting classes must not have any
 # logging calls, as well as the compression libraries, as eventlet has a bug
 # (https://github.com/eventlet/eventlet/issues/432) that would result in
 # failures.
 
+
+class _ZstdCompressor(object):
+    """Compressor with the zlib interface for the zstandard library."""
+
+    def __init__(self, zstandard, level=None):
+        self.zstandard = zstandard
+        self.level = level
+
+    def compress(self, data):
+        # Compressor objects can't be shared between threads.
+        if self.level is None:
+            compressor = self.zstandard.ZstdCompressor()
+        else:
+            compressor = self.zstandard.ZstdCompressor(level=self.level)
+        return compressor.compress(data)
+
+    def decompress(self, data):
+        return self.zstandard.ZstdDecompressor().decompress(data)
+
+
+class _LZ4Compressor(object):
+    """Compressor with the zlib interface for the lz4 frame format."""
+
+    def __init__(self, lz4_frame, level=None):
+        self.lz4_frame = lz4_frame
+        self.level = level
+
+    def compress(self, data):
+        if self.level is None:
+            return self.lz4_frame.compress(data)
+        return self.lz4_frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data):
+        return self.lz4_frame.decompress(data)
+
+
+class _GreenPipeline(object):
+    """Bounded FIFO of calls running in greenthreads.
+
+    At most ``size`` calls are in flight at any time; ``submit`` waits for
+    the oldest one to finish when the pipeline is full, which bounds the
+    memory used by pending chunks. Results and errors are returned by
+    ``pop`` in submission order.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._pending = collections.deque()
+
+    @staticmethod
+    def _run(func, *args):
+        # Return errors instead of raising them, otherwise the eventlet hub
+        # prints them as unhandled before they are raised by pop.
+        try:
+            return func(*args), None
+        except Exception:
+            return None, sys.exc_info()
+
+    def pop(self):
+        result, exc_info = self._pending.popleft().wait()
+        if exc_info:
+            six.reraise(*exc_info)
+        return result
+
+    def submit(self, func, *args):
+        while len(self._pending) >= self.size:
+            self.pop()
+        self._pending.append(eventlet.spawn(self._run, func, *args))
+
+    def wait_all(self, reraise=True):
+        while self._pending:
+            try:
+                self.pop()
+            except Exception:
+                if reraise:
+                    with excutils.save_and_reraise_exception():
+                        self.wait_all(reraise=False)
+
+
+class _ExtentSet(object):
+    """Set of non overlapping [start, end) volume ranges."""
+
+    def __init__(self):
+        # Sorted and disjoint, adjacent ranges are merged on add.
+        self._starts = []
+        self._ends = []
+
+    def add(self, start, end):
+        idx = bisect.bisect_left(self._ends, start)
+        last = bisect.bisect_right(self._starts, end)
+        if idx < last:
+            start = min(start, self._starts[idx])
+            end = max(end, self._ends[last - 1])
+        self._starts[idx:last] = [start]
+        self._ends[idx:last] = [end]
+
+    def missing(self, start, end):
+        """Return the parts of [start, end) that are not in the set."""
+        result = []
+        idx = bisect.bisect_right(self._ends, start)
+        while start < end:
+            if idx == len(self._starts) or self._starts[idx] >= end:
+                result.append((start, end))
+                break
+            if self._starts[idx] > start:
+                result.append((start, self._starts[idx]))
+            start = self._ends[idx]
+            idx += 1
+        return result
+
+
 @six.add_metaclass(abc.ABCMeta)
 class ChunkedBackupDriver(driver.BackupDriver):
     """Abstract chunked backup driver.
@@ -79,7 +256,10 @@ class ChunkedBackupDriver(driver.BackupDriver):
     """
 
     DRIVER_VERSION = '1.0.0'
-    DRIVER_VERSION_MAPPING = {'1.0.0': '_restore_v1'}
+    # Version of the metadata of backups that have holes.
+    SPARSE_DRIVER_VERSION = '1.1.0'
+    DRIVER_VERSION_MAPPING = {'1.0.0': '_restore_v1',
+                              '1.1.0': '_restore_v1'}
 
     def _get_compressor(self, algorithm):
         try:
@@ -91,6 +271,14 @@ class ChunkedBackupDriver(driver.BackupDriver):
             elif algorithm.lower() in ('bz2', 'bzip2'):
                 import bz2 as compressor
                 result = compressor
+            elif algorithm.lower() == 'zstd':
+                import zstandard
+                result = _ZstdCompressor(zstandard,
+                                         CONF.backup_compression_level)
+            elif algorithm.lower() == 'lz4':
+                import lz4.frame
+                result = _LZ4Compressor(lz4.frame,
+                                        CONF.backup_compression_level)
             else:
                 result = None
             if result:
@@ -118,6 +306,14 @@ class ChunkedBackupDriver(driver.BackupDriver):
         self.backup_compression_algorithm = CONF.backup_compression_algorithm
         self.compressor = \
             self._get_compressor(CONF.backup_compression_algorithm)
+        self.adaptive_compression = CONF.backup_adaptive_compression
+        self.chunk_upload_concurrency = CONF.backup_chunk_upload_concurrency
+        self.sparse_detection = CONF.backup_sparse_detection
+        self.sha256file_format = CONF.backup_sha256file_format
+        self._zero_shas = {}
+        self.restore_prefetch_objects = CONF.backup_restore_prefetch_objects
+        self.restore_fsync_interval_bytes = (
+            CONF.backup_restore_fsync_interval * units.Mi)
         self.support_force_delete = True
 
         if sys.platform == 'win32' and self.chunk_size_bytes % 4096:
@@ -243,7 +439,7 @@ class ChunkedBackupDriver(driver.BackupDriver):
         return filename
 
     def _write_metadata(self, backup, volume_id, container, object_list,
-                        volume_meta, extra_metadata=None):
+                        volume_meta, extra_metadata=None, holes=None):
         filename = self._metadata_filename(backup)
         LOG.debug('_write_metadata started, container name: %(container)s,'
                   ' metadata filename: %(filename)s.',
@@ -260,6 +456,9 @@ class ChunkedBackupDriver(driver.BackupDriver):
         metadata['volume_meta'] = volume_meta
         if extra_metadata:
             metadata['extra_metadata'] = extra_metadata
+        if holes:
+            metadata['version'] = self.SPARSE_DRIVER_VERSION
+            metadata['holes'] = holes
         metadata_json = json.dumps(metadata, sort_keys=True, indent=2)
         if six.PY3:
             metadata_json = metadata_json.encode('utf-8')
@@ -268,10 +467,16 @@ class ChunkedBackupDriver(driver.BackupDriver):
         LOG.debug('_write_metadata finished. Metadata: %s.', metadata_json)
 
     def _write_sha256file(self, backup, volume_id, container, sha256_list):
+        """Write the sha256 file of a backup.
+
+        :param sha256_list: List of byte strings with the packed sha256
+                            digests of the backup's blocks, in order.
+        """
         filename = self._sha256_filename(backup)
         LOG.debug('_write_sha256file started, container name: %(container)s,'
                   ' sha256file filename: %(filename)s.',
                   {'container': container, 'filename': filename})
+        digests = b''.join(sha256_list)
         sha256file = {}
         sha256file['version'] = self.DRIVER_VERSION
         sha256file['backup_id'] = backup['id']
@@ -280,12 +485,22 @@ class ChunkedBackupDriver(driver.BackupDriver):
         sha256file['backup_description'] = backup['display_description']
         sha256file['created_at'] = six.text_type(backup['created_at'])
         sha256file['chunk_size'] = self.sha_block_size_bytes
-        sha256file['sha256s'] = sha256_list
-        sha256file_json = json.dumps(sha256file, sort_keys=True, indent=2)
-        if six.PY3:
-            sha256file_json = sha256file_json.encode('utf-8')
+        if self.sha256file_format == 'binary':
+            header_json = json.dumps(sha256file, sort_keys=True)
+            if six.PY3:
+                header_json = header_json.encode('utf-8')
+            sha256file_data = b''.join((SHA256FILE_BINARY_MAGIC,
+                                        header_json, b'\n', digests))
+        else:
+            hexdigests = binascii.hexlify(digests).decode('ascii')
+            step = 2 * SHA256_DIGEST_SIZE
+            sha256file['sha256s'] = [hexdigests[i:i + step]
+                                     for i in range(0, len(hexdigests), step)]
+            sha256file_data = json.dumps(sha256file, sort_keys=True, indent=2)
+            if six.PY3:
+                sha256file_data = sha256file_data.encode('utf-8')
         with self._get_object_writer(container, filename) as writer:
-            writer.write(sha256file_json)
+            writer.write(sha256file_data)
         LOG.debug('_write_sha256file finished.')
 
     def _read_metadata(self, backup):
@@ -303,16 +518,35 @@ class ChunkedBackupDriver(driver.BackupDriver):
         return metadata
 
     def _read_sha256file(self, backup):
+        """Read the sha256 file of a backup in JSON or binary format.
+
+        The packed digests of the backup's blocks are returned in the
+        'digests' key of the sha256 file header.
+        """
         container = backup['container']
         filename = self._sha256_filename(backup)
         LOG.debug('_read_sha256file started, container name: %(container)s, '
                   'sha256 filename: %(filename)s.',
                   {'container': container, 'filename': filename})
         with self._get_object_reader(container, filename) as reader:
-            sha256file_json = reader.read()
-        if six.PY3:
-            sha256file_json = sha256file_json.decode('utf-8')
-        sha256file = json.loads(sha256file_json)
+            sha256file_data = reader.read()
+        if sha256file_data.startswith(SHA256FILE_BINARY_MAGIC):
+            header_end = sha256file_data.index(b'\n',
+                                               len(SHA256FILE_BINARY_MAGIC))
+            header_json = sha256file_data[len(SHA256FILE_BINARY_MAGIC):
+                                          header_end]
+            if six.PY3:
+                header_json = header_json.decode('utf-8')
+            sha256file = json.loads(header_json)
+            # Avoid copying the digests, they can take hundreds of MB.
+            sha256file['digests'] = memoryview(
+                sha256file_data)[header_end + 1:]
+        else:
+            if six.PY3:
+                sha256file_data = sha256file_data.decode('utf-8')
+            sha256file = json.loads(sha256file_data)
+            sha256file['digests'] = binascii.unhexlify(
+                ''.join(sha256file['sha256s']))
         LOG.debug('_read_sha256file finished.')
         return sha256file
 
@@ -352,42 +586,127 @@ class ChunkedBackupDriver(driver.BackupDriver):
         return (object_meta, object_sha256, extra_metadata, container,
                 volume_size_bytes)
 
-    def _backup_chunk(self, backup, container, data, data_offset,
-                      object_meta, extra_metadata):
-        """Backup data chunk based on the object metadata and offset."""
-        object_prefix = object_meta['prefix']
-        object_list = object_meta['list']
+    def _add_chunk_object(self, object_meta, data_offset, length):
+        """Reserve the next object name for a chunk in the object metadata.
 
+        Objects are added to the metadata list in volume order, even when
+        their data is written later on by the upload pipeline.
+        """
+        object_prefix = object_meta['prefix']
         object_id = object_meta['id']
         object_name = '%s-%05d' % (object_prefix, object_id)
         obj = {}
         obj[object_name] = {}
         obj[object_name]['offset'] = data_offset
-        obj[object_name]['length'] = len(data)
+        obj[object_name]['length'] = length
+        object_meta['list'].append(obj)
+        object_meta['id'] = object_id + 1
+        return object_name, obj[object_name]
+
+    def _write_chunk(self, container, object_name, obj, data,
+                     extra_metadata):
+        """Compress and write a chunk, completing its object metadata."""
         LOG.debug('Backing up chunk of data from volume.')
         algorithm, output_data = self._prepare_output_data(data)
-        obj[object_name]['compression'] = algorithm
+        obj['compression'] = algorithm
         LOG.debug('About to put_object')
         with self._get_object_writer(
                 container, object_name, extra_metadata=extra_metadata
         ) as writer:
             writer.write(output_data)
         md5 = eventlet.tpool.execute(hashlib.md5, data).hexdigest()
-        obj[object_name]['md5'] = md5
+        obj['md5'] = md5
         LOG.debug('backup MD5 for %(object_name)s: %(md5)s',
                   {'object_name': object_name, 'md5': md5})
-        object_list.append(obj)
-        object_id += 1
-        object_meta['list'] = object_list
-        object_meta['id'] = object_id
+
+    def _backup_chunk(self, backup, container, data, data_offset,
+                      object_meta, extra_metadata):
+        """Backup data chunk based on the object metadata and offset."""
+        object_name, obj = self._add_chunk_object(object_meta, data_offset,
+                                                  len(data))
+        self._write_chunk(container, object_name, obj, data, extra_metadata)
 
         LOG.debug('Calling eventlet.sleep(0)')
         eventlet.sleep(0)
 
+    def _submit_chunk(self, pipeline, container, data, data_offset,
+                      object_meta, extra_metadata):
+        """Queue a data chunk to be written by the upload pipeline."""
+        object_name, obj = self._add_chunk_object(object_meta, data_offset,
+                                                  len(data))
+        pipeline.submit(self._write_chunk, container, object_name, obj, data,
+                        extra_metadata)
+
+    def _add_hole(self, object_meta, data_offset, length):
+        """Record a range of the volume that only contains zeros."""
+        holes = object_meta.setdefault('holes', [])
+        if holes and sum(holes[-1]) == data_offset:
+            holes[-1][1] += length
+        else:
+            holes.append([data_offset, length])
+
+    def _get_zero_sha(self, length):
+        if length not in self._zero_shas:
+            self._zero_shas[length] = hashlib.sha256(
+                b'\0' * length).digest()
+        return self._zero_shas[length]
+
+    def _get_chunk_extents(self, digests, parent_digests, data_length):
+        """Split a chunk of data into the extents that need to be backed up.
+
+        :param digests: The packed sha256 digests of the chunk's blocks.
+        :param parent_digests: The packed digests of the same blocks in the
+                               parent backup, or None for a full backup.
+        :param data_length: The length of the chunk.
+        :returns: A list of (is_hole, start, end) tuples with offsets within
+                  the chunk. Blocks that didn't change since the parent
+                  backup are left out, and zero blocks are reported as holes
+                  when sparse detection is enabled.
+        """
+        # Whole chunks are compared at once first, which covers most of the
+        # chunks of an incremental backup and of a full backup.
+        if parent_digests is not None:
+            if digests == parent_digests:
+                return []
+        elif not self.sparse_detection:
+            return [(False, 0, data_length)]
+
+        extents = []
+        for idx in range(len(digests) // SHA256_DIGEST_SIZE):
+            sha_off = idx * SHA256_DIGEST_SIZE
+            sha = digests[sha_off:sha_off + SHA256_DIGEST_SIZE]
+            if (parent_digests is not None and
+                    sha == parent_digests[sha_off:
+                                          sha_off + SHA256_DIGEST_SIZE]):
+                continue
+            start = idx * self.sha_block_size_bytes
+            end = min(start + self.sha_block_size_bytes, data_length)
+            is_hole = (self.sparse_detection and
+                       sha == self._get_zero_sha(end - start))
+            if (extents and extents[-1][0] == is_hole and
+                    extents[-1][2] == start):
+                extents[-1] = (is_hole, extents[-1][1], end)
+            else:
+                extents.append((is_hole, start, end))
+        return extents
+
     def _prepare_output_data(self, data):
         if self.compressor is None:
             return 'none', data
         data_size_bytes = len(data)
+        if (self.adaptive_compression and
+                data_size_bytes > ADAPTIVE_COMPRESSION_SAMPLE_SIZE):
+            sample = memoryview(data)[:ADAPTIVE_COMPRESSION_SAMPLE_SIZE]
+            comp_sample_size = len(self.compressor.compress(bytes(sample)))
+            if (comp_sample_size >=
+                    ADAPTIVE_COMPRESSION_MIN_RATIO * len(sample)):
+                LOG.debug('Compression of a sample of this chunk was '
+                          'ineffective: sample length: %(sample_size)d, '
+                          'compressed length: %(comp_sample_size)d. '
+                          'Using original data for this chunk.',
+                          {'sample_size': len(sample),
+                           'comp_sample_size': comp_sample_size})
+                return 'none', data
         # Execute compression in native thread so it doesn't prevent
         # cooperative greenthread switching.
         compressed_data = self.compressor.compress(data)
@@ -417,6 +736,7 @@ class ChunkedBackupDriver(driver.BackupDriver):
         volume_meta = object_meta['volume_meta']
         sha256_list = object_sha256['sha256s']
         extra_metadata = object_meta.get('extra_metadata')
+        holes = object_meta.get('holes')
         self._write_sha256file(backup,
                                backup.volume_id,
                                container,
@@ -426,7 +746,8 @@ class ChunkedBackupDriver(driver.BackupDriver):
                              container,
                              object_list,
                              volume_meta,
-                             extra_metadata)
+                             extra_metadata,
+                             holes)
         # NOTE(whoami-rajat) : The object_id variable is used to name
         # the backup objects and hence differs from the object_count
         # variable, therefore the increment of object_id value in the last
@@ -476,23 +797,17 @@ class ChunkedBackupDriver(driver.BackupDriver):
         return win32_diskutils.get_disk_size(disk_number)
 
     def _calculate_sha(self, data):
-        """Calculate SHA256 of a data chunk.
+        """Calculate the packed SHA256 digests of the blocks of a data chunk.
 
         This method cannot log anything as it is called on a native thread.
         """
         # NOTE(geguileo): Using memoryview to avoid data copying when slicing
         # for the sha256 call.
         chunk = memoryview(data)
-        shalist = []
-        off = 0
-        datalen = len(chunk)
-        while off < datalen:
-            chunk_end = min(datalen, off + self.sha_block_size_bytes)
-            block = chunk[off:chunk_end]
-            sha = hashlib.sha256(block).hexdigest()
-            shalist.append(sha)
-            off += self.sha_block_size_bytes
-        return shalist
+        return b''.join(
+            hashlib.sha256(chunk[off:off + self.sha_block_size_bytes]).digest()
+            for off in six.moves.range(0, len(chunk),
+                                       self.sha_block_size_bytes))
 
     def backup(self, backup, volume_file, backup_metadata=True):
         """Backup the given volume.
@@ -513,7 +828,7 @@ class ChunkedBackupDriver(driver.BackupDriver):
             parent_backup = objects.Backup.get_by_id(self.context,
                                                      backup.parent_id)
             parent_backup_shafile = self._read_sha256file(parent_backup)
-            parent_backup_shalist = parent_backup_shafile['sha256s']
+            parent_backup_digests = parent_backup_shafile['digests']
             if (parent_backup_shafile['chunk_size'] !=
                     self.sha_block_size_bytes):
                 err = (_('Hash block size has changed since the last '
@@ -558,85 +873,85 @@ class ChunkedBackupDriver(driver.BackupDriver):
             timer.start(interval=self.backup_timer_interval)
 
         sha256_list = object_sha256['sha256s']
-        shaindex = 0
+        digests_offset = 0
         is_backup_canceled = False
-        while True:
-            # First of all, we check the status of this backup. If it
-            # has been changed to delete or has been deleted, we cancel the
-            # backup process to do forcing delete.
-            with backup.as_read_deleted():
-                backup.refresh()
-            if backup.status in (fields.BackupStatus.DELETING,
-                                 fields.BackupStatus.DELETED):
-                is_backup_canceled = True
-                # To avoid the chunk left when deletion complete, need to
-                # clean up the object of chunk again.
-                self.delete_backup(backup)
-                LOG.debug('Cancel the backup process of %s.', backup.id)
-                break
-            data_offset = volume_file.tell()
-
-            if sys.platform == 'win32':
-                read_bytes = min(self.chunk_size_bytes,
-                                 win32_disk_size - data_offset)
-            else:
-                read_bytes = self.chunk_size_bytes
-            data = volume_file.read(read_bytes)
-
-            if data == b'':
-                break
+        # Chunks are compressed and written in greenthreads, so reading and
+        # hashing the following chunks overlaps with the uploads in flight.
+        pipeline = _GreenPipeline(self.chunk_upload_concurrency)
+        try:
+            while True:
+                # First of all, we check the status of this backup. If it
+                # has been changed to delete or has been deleted, we cancel the
+                # backup process to do forcing delete.
+                with backup.as_read_deleted():
+                    backup.refresh()
+                if backup.status in (fields.BackupStatus.DELETING,
+                                     fields.BackupStatus.DELETED):
+                    is_backup_canceled = True
+                    # To avoid the chunk left when deletion complete, need to
+                    # clean up the object of chunk again.
+                    pipeline.wait_all(reraise=False)
+                    self.delete_backup(backup)
+                    LOG.debug('Cancel the backup process of %s.', backup.id)
+                    break
+                data_offset = volume_file.tell()
 
-            # Calculate new shas with the datablock.
-            shalist = eventlet.tpool.execute(self._calculate_sha, data)
-            sha256_list.extend(shalist)
-
-            # If parent_backup is not None, that means an incremental
-            # backup will be performed.
-            if parent_backup:
-                # Find the extent that needs to be backed up.
-                extent_off = -1
-                for idx, sha in enumerate(shalist):
-                    if sha != parent_backup_shalist[shaindex]:
-                        if extent_off == -1:
-                            # Start of new extent.
-                            extent_off = idx * self.sha_block_size_bytes
+                if sys.platform == 'win32':
+                    read_bytes = min(self.chunk_size_bytes,
+                                     win32_disk_size - data_offset)
+                else:
+                    read_bytes = self.chunk_size_bytes
+                data = volume_file.read(read_bytes)
+
+                if data == b'':
+                    break
+
+                # Calculate new shas with the datablock.
+                digests = eventlet.tpool.execute(self._calculate_sha, data)
+                sha256_list.append(digests)
+
+                # If parent_backup is not None, that means an incremental
+                # backup will be performed.
+                parent_digests = None
+                if parent_backup:
+                    parent_digests = parent_backup_digests[
+                        digests_offset:digests_offset + len(digests)]
+                digests_offset += len(digests)
+
+                # Find the extents that need to be backed up.
+                for is_hole, extent_off, extent_end in self._get_chunk_extents(
+                        digests, parent_digests, len(data)):
+                    if is_hole:
+                        self._add_hole(object_meta, data_offset + extent_off,
+                                       extent_end - extent_off)
+                        continue
+                    if extent_off == 0 and extent_end == len(data):
+                        segment = data
                     else:
-                        if extent_off != -1:
-                            # We've reached the end of extent.
-                            extent_end = idx * self.sha_block_size_bytes
-                            segment = data[extent_off:extent_end]
-                            self._backup_chunk(backup, container, segment,
-                                               data_offset + extent_off,
-                                               object_meta,
-                                               extra_metadata)
-                            extent_off = -1
-                    shaindex += 1
-
-                # The last extent extends to the end of data buffer.
-                if extent_off != -1:
-                    extent_end = len(data)
-                    segment = data[extent_off:extent_end]
-                    self._backup_chunk(backup, container, segment,
+                        segment = data[extent_off:extent_end]
+                    self._submit_chunk(pipeline, container, segment,
                                        data_offset + extent_off,
                                        object_meta, extra_metadata)
-                    extent_off = -1
-            else:  # Do a full backup.
-                self._backup_chunk(backup, container, data, data_offset,
-                                   object_meta, extra_metadata)
-
-            # Notifications
-            total_block_sent_num += self.data_block_num
-            counter += 1
-            if counter == self.data_block_num:
-                # Send the notification to Ceilometer when the chunk
-                # number reaches the data_block_num.  The backup percentage
-                # is put in the metadata as the extra information.
-                self._send_progress_notification(self.context, backup,
-                                                 object_meta,
-                                                 total_block_sent_num,
-                                                 volume_size_bytes)
-                # Reset the counter
-                counter = 0
+
+                # Notifications
+                total_block_sent_num += self.data_block_num
+                counter += 1
+                if counter == self.data_block_num:
+                    # Send the notification to Ceilometer when the chunk
+                    # number reaches the data_block_num.  The backup percentage
+                    # is put in the metadata as the extra information.
+                    self._send_progress_notification(self.context, backup,
+                                                     object_meta,
+                                                     total_block_sent_num,
+                                                     volume_size_bytes)
+                    # Reset the counter
+                    counter = 0
+            # Wait for the remaining uploads before writing the metadata.
+            pipeline.wait_all()
+        except Exception:
+            # Don't leave uploads running behind the caller's back.
+            with excutils.save_and_reraise_exception():
+                pipeline.wait_all(reraise=False)
 
         # Stop the timer.
         timer.stop()
@@ -659,13 +974,103 @@ class ChunkedBackupDriver(driver.BackupDriver):
 
         self._finalize_backup(backup, container, object_meta, object_sha256)
 
+    def _get_restore_extents(self, metadata_list):
+        """Map the objects of a backup chain to the volume ranges to restore.
+
+        :param metadata_list: Metadata of each backup in the chain, from the
+                              full backup to the newest incremental.
+        :returns: A list with one (extents, holes) tuple per backup, in the
+                  same order. extents maps the name of every object that
+                  still holds the newest data for some part of the volume
+                  to the list of (start, end) volume offsets to write from
+                  it; objects that are completely overwritten by newer
+                  backups are left out. holes is the list of (start, end)
+                  ranges of the backup's holes that are still current.
+        """
+        restored = _ExtentSet()
+        extents_list = []
+        for metadata in reversed(metadata_list):
+            extents = {}
+            holes = []
+            ranges = []
+            for metadata_object in metadata['objects']:
+                object_name, obj = list(metadata_object.items())[0]
+                start = obj['offset']
+                end = start + obj['length']
+                missing = restored.missing(start, end)
+                if missing:
+                    extents[object_name] = missing
+                ranges.append((start, end))
+            for start, length in metadata.get('holes', []):
+                holes.extend(restored.missing(start, start + length))
+                ranges.append((start, start + length))
+            for start, end in ranges:
+                restored.add(start, end)
+            extents_list.append((extents, holes))
+        extents_list.reverse()
+        return extents_list
+
+    def _restore_hole(self, volume_file, start, end):
+        """Make a range of the volume read back as zeros.
+
+        The range is deallocated when the volume supports it, so thin
+        volumes stay thin, otherwise zeros are written to it.
+        """
+        volume_file.flush()
+        if sys.platform != 'win32':
+            try:
+                eventlet.tpool.execute(volume_utils.punch_hole,
+                                       volume_file.fileno(), start,
+                                       end - start)
+                return
+            except (IOError, OSError) as e:
+                LOG.debug('Could not deallocate range %(start)d-%(end)d of '
+                          'the volume, writing zeros instead: %(error)s',
+                          {'start': start, 'end': end, 'error': e})
+        zeros = b'\0' * min(end - start, self.sha_block_size_bytes)
+        volume_file.seek(start)
+        while start < end:
+            length = min(end - start, len(zeros))
+            volume_file.write(zeros if length == len(zeros)
+                              else zeros[:length])
+            start += length
+
+    def _read_object_data(self, container, object_name,
+                          compression_algorithm, extra_metadata):
+        """Read an object from the backup repository and decompress it."""
+        with self._get_object_reader(
+                container, object_name,
+                extra_metadata=extra_metadata) as reader:
+            body = reader.read()
+        decompressor = self._get_compressor(compression_algorithm)
+        if decompressor is not None:
+            LOG.debug('decompressing data using %s algorithm',
+                      compression_algorithm)
+            body = decompressor.decompress(body)
+        return body
+
+    @staticmethod
+    def _fsync_volume_file(volume_file):
+        # Be tolerant to IO implementations that do not support fileno()
+        try:
+            fileno = volume_file.fileno()
+        except IOError:
+            LOG.info("volume_file does not support fileno() so skipping "
+                     "fsync()")
+        else:
+            os.fsync(fileno)
+
     def _restore_v1(self, backup, volume_id, metadata, volume_file,
-                    requested_backup):
+                    requested_backup, extents=None, holes=None):
         """Restore a v1 volume backup.
 
         Raises BackupRestoreCancel on any requested_backup status change, we
         ignore the backup parameter for this check since that's only the
         current data source from the list of backup sources.
+
+        If extents and holes are given, as returned by _get_restore_extents,
+        only the listed objects are fetched and only the listed ranges are
+        written.
         """
         backup_id = backup['id']
         LOG.debug('v1 volume backup restore of %s started.', backup_id)
@@ -686,56 +1091,96 @@ class ChunkedBackupDriver(driver.BackupDriver):
                     'does not match object list stored in metadata.')
             raise exception.InvalidBackup(reason=err)
 
-        for metadata_object in metadata_objects:
-            # Abort when status changes to error, available, or anything else
-            with requested_backup.as_read_deleted():
-                requested_backup.refresh()
-            if requested_backup.status != fields.BackupStatus.RESTORING:
-                raise exception.BackupRestoreCancel(back_id=backup.id,
-                                                    vol_id=volume_id)
+        if holes is None:
+            holes = [(start, start + length)
+                     for start, length in metadata.get('holes', [])]
+        for start, end in holes:
+            self._restore_hole(volume_file, start, end)
 
+        restore_objects = []
+        for metadata_object in metadata_objects:
             object_name, obj = list(metadata_object.items())[0]
-            LOG.debug('restoring object. backup: %(backup_id)s, '
-                      'container: %(container)s, object name: '
-                      '%(object_name)s, volume: %(volume_id)s.',
-                      {
-                          'backup_id': backup_id,
-                          'container': container,
-                          'object_name': object_name,
-                          'volume_id': volume_id,
-                      })
-
-            with self._get_object_reader(
-                    container, object_name,
-                    extra_metadata=extra_metadata) as reader:
-                body = reader.read()
-            compression_algorithm = metadata_object[object_name]['compression']
-            decompressor = self._get_compressor(compression_algorithm)
-            volume_file.seek(obj['offset'])
-            if decompressor is not None:
-                LOG.debug('decompressing data using %s algorithm',
-                          compression_algorithm)
-                decompressed = decompressor.decompress(body)
-                volume_file.write(decompressed)
-            else:
-                volume_file.write(body)
-
-            # force flush every write to avoid long blocking write on close
-            volume_file.flush()
+            if extents is not None and object_name not in extents:
+                LOG.debug('skipping object %(object_name)s of backup '
+                          '%(backup_id)s, its data is overwritten by a newer '
+                          'backup.',
+                          {'object_name': object_name,
+                           'backup_id': backup_id})
+                continue
+            restore_objects.append((object_name, obj))
+
+        # Objects are downloaded and decompressed in greenthreads, up to
+        # restore_prefetch_objects of them ahead of the one being written.
+        fetches = _GreenPipeline(self.restore_prefetch_objects + 1)
+        pending_objects = iter(restore_objects)
+
+        def _fetch_next():
+            next_object = next(pending_objects, None)
+            if next_object is not None:
+                object_name, obj = next_object
+                fetches.submit(self._read_object_data, container,
+                               object_name, obj['compression'],
+                               extra_metadata)
+
+        for i in range(self.restore_prefetch_objects + 1):
+            _fetch_next()
+
+        unsynced_bytes = 0
+        try:
+            for object_name, obj in restore_objects:
+                # Abort when status changes to error, available, or anything
+                # else
+                with requested_backup.as_read_deleted():
+                    requested_backup.refresh()
+                if requested_backup.status != fields.BackupStatus.RESTORING:
+                    raise exception.BackupRestoreCancel(back_id=backup.id,
+                                                        vol_id=volume_id)
+
+                LOG.debug('restoring object. backup: %(backup_id)s, '
+                          'container: %(container)s, object name: '
+                          '%(object_name)s, volume: %(volume_id)s.',
+                          {
+                              'backup_id': backup_id,
+                              'container': container,
+                              'object_name': object_name,
+                              'volume_id': volume_id,
+                          })
+                body = fetches.pop()
 
-            # Be tolerant to IO implementations that do not support fileno()
-            try:
-                fileno = volume_file.fileno()
-            except IOError:
-                LOG.info("volume_file does not support fileno() so skipping "
-                         "fsync()")
-            else:
-                os.fsync(fileno)
+                object_end = obj['offset'] + obj['length']
+                if extents is None:
+                    ranges = [(obj['offset'], object_end)]
+                else:
+                    ranges = extents[object_name]
+                if ranges == [(obj['offset'], object_end)]:
+                    volume_file.seek(obj['offset'])
+                    volume_file.write(body)
+                else:
+                    data = memoryview(body)
+                    for start, end in ranges:
+                        volume_file.seek(start)
+                        volume_file.write(
+                            data[start - obj['offset']:end - obj['offset']])
+                _fetch_next()
+
+                # force flush every write to avoid long blocking write on
+                # close
+                volume_file.flush()
+                unsynced_bytes += obj['length']
+                if unsynced_bytes >= self.restore_fsync_interval_bytes:
+                    self._fsync_volume_file(volume_file)
+                    unsynced_bytes = 0
+
+                # Restoring a backup to a volume can take some time. Yield so
+                # other threads can run, allowing for among other things the
+                # service status to be updated
+                eventlet.sleep(0)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                fetches.wait_all(reraise=False)
 
-            # Restoring a backup to a volume can take some time. Yield so other
-            # threads can run, allowing for among other things the service
-            # status to be updated
-            eventlet.sleep(0)
+        if unsynced_bytes or holes:
+            self._fsync_volume_file(volume_file)
         LOG.debug('v1 volume backup restore of %s finished.',
                   backup_id)
 
@@ -778,14 +1223,19 @@ class ChunkedBackupDriver(driver.BackupDriver):
             backup_list.append(prev_backup)
             current_backup = prev_backup
 
-        # Do a full restore first, then layer the incremental backups
-        # on top of it in order.
-        index = len(backup_list) - 1
-        while index >= 0:
-            backup1 = backup_list[index]
-            index = index - 1
-            metadata = self._read_metadata(backup1)
-            restore_func(backup1, volume_id, metadata, volume_file, backup)
+        # Read the metadata of the whole chain first, so that only the
+        # newest data of every volume range is fetched and written. Backups
+        # are then restored from the full one to the newest incremental.
+        backup_list.reverse()
+        metadata_list = [self._read_metadata(backup1)
+                         for backup1 in backup_list[:-1]]
+        metadata_list.append(metadata)
+        extents_list = self._get_restore_extents(metadata_list)
+
+        for backup1, metadata, (extents, holes) in zip(
+                backup_list, metadata_list, extents_list):
+            restore_func(backup1, volume_id, metadata, volume_file, backup,
+                         extents=extents, holes=holes)
 
             volume_meta = metadata.get('volume_meta', None)
             try:
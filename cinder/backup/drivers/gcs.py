@@ -180,6 +180,11 @@ class GoogleBackupDriver(chunkeddriver.ChunkedBackupDriver):
                                     cache_discovery=False,
                                     credentials=creds)
         self.resumable = self.writer_chunk_size != -1
+        # NOTE: The googleapiclient connection uses httplib2, which is not
+        # thread safe, so only one object can be uploaded or downloaded at a
+        # time.
+        self.chunk_upload_concurrency = 1
+        self.restore_prefetch_objects = 0
 
     def check_for_setup_error(self):
         required_options = ('backup_gcs_bucket', 'backup_gcs_credential_file',
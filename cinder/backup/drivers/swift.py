@@ -207,7 +207,7 @@ class SwiftBackupDriver(chunkeddriver.ChunkedBackupDriver):
                 )
             if CONF.backup_swift_project is not None:
                 os_options['project_name'] = CONF.backup_swift_project
-            self.conn = swift.Connection(
+            self._conn_kwargs = dict(
                 authurl=self.auth_url,
                 auth_version=CONF.backup_swift_auth_version,
                 tenant_name=CONF.backup_swift_tenant,
@@ -249,26 +249,51 @@ class SwiftBackupDriver(chunkeddriver.ChunkedBackupDriver):
             LOG.debug('Connect to %s in "%s" mode', CONF.backup_swift_url,
                       CONF.backup_swift_auth)
 
-            self.conn = swift.Connection(retries=self.swift_attempts,
-                                         preauthurl=self.swift_url,
-                                         preauthtoken=self.context.auth_token,
-                                         starting_backoff=self.swift_backoff,
-                                         insecure=(
-                                             self.backup_swift_auth_insecure),
-                                         cacert=CONF.backup_swift_ca_cert_file)
+            self._conn_kwargs = dict(retries=self.swift_attempts,
+                                     preauthurl=self.swift_url,
+                                     preauthtoken=self.context.auth_token,
+                                     starting_backoff=self.swift_backoff,
+                                     insecure=self.backup_swift_auth_insecure,
+                                     cacert=CONF.backup_swift_ca_cert_file)
+
+        self.conn = swift.Connection(**self._conn_kwargs)
+        # Idle connections of the object readers and writers.
+        self._object_conns = []
+
+    def _get_object_conn(self):
+        """Get a connection for an object reader or writer.
+
+        Readers and writers run in native threads, up to
+        backup_chunk_upload_concurrency or backup_restore_prefetch_objects + 1
+        of them at the same time, and swiftclient connections are not thread
+        safe, so each one gets its own connection, which is reused by the
+        following readers and writers once it's released.
+        """
+        try:
+            return self._object_conns.pop()
+        except IndexError:
+            return swift.Connection(**self._conn_kwargs)
+
+    def _release_object_conn(self, conn):
+        self._object_conns.append(conn)
 
     class SwiftObjectWriter(object):
-        def __init__(self, container, object_name, conn):
+        def __init__(self, container, object_name, conn, release_conn=None):
             self.container = container
             self.object_name = object_name
             self.conn = conn
+            self.release_conn = release_conn
             self.data = bytearray()
 
         def __enter__(self):
             return self
 
         def __exit__(self, exc_type, exc_value, traceback):
-            self.close()
+            try:
+                self.close()
+            finally:
+                if self.release_conn:
+                    self.release_conn(self.conn)
 
         def write(self, data):
             self.data += data
@@ -290,16 +315,18 @@ class SwiftBackupDriver(chunkeddriver.ChunkedBackupDriver):
             return md5
 
     class SwiftObjectReader(object):
-        def __init__(self, container, object_name, conn):
+        def __init__(self, container, object_name, conn, release_conn=None):
             self.container = container
             self.object_name = object_name
             self.conn = conn
+            self.release_conn = release_conn
 
         def __enter__(self):
             return self
 
         def __exit__(self, exc_type, exc_value, traceback):
-            pass
+            if self.release_conn:
+                self.release_conn(self.conn)
 
         def read(self):
             try:
@@ -334,7 +361,9 @@ class SwiftBackupDriver(chunkeddriver.ChunkedBackupDriver):
         Returns a writer object that stores a chunk of volume data in a
         Swift object store.
         """
-        return self.SwiftObjectWriter(container, object_name, self.conn)
+        return self.SwiftObjectWriter(container, object_name,
+                                      self._get_object_conn(),
+                                      self._release_object_conn)
 
     def get_object_reader(self, container, object_name, extra_metadata=None):
         """Return reader object.
@@ -342,7 +371,9 @@ class SwiftBackupDriver(chunkeddriver.ChunkedBackupDriver):
         Returns a reader object that retrieves a chunk of backed-up volume data
         from a Swift object store.
         """
-        return self.SwiftObjectReader(container, object_name, self.conn)
+        return self.SwiftObjectReader(container, object_name,
+                                      self._get_object_conn(),
+                                      self._release_object_conn)
 
     def delete_object(self, container, object_name):
         """Deletes a backup object from a Swift object store."""
@@ -326,7 +326,17 @@ class DbCommands(object):
 
     @args('age_in_days', type=int,
           help='Purge deleted rows older than age in days')
-    def purge(self, age_in_days):
+    @args('--batch-size', dest='batch_size', type=int, default=1000,
+          help='Maximum number of rows deleted per transaction, 0 deletes '
+               'the rows of each table at once (default: %(default)s). '
+               'Every batch is committed, running the command again after '
+               'an interruption resumes the purge.')
+    @args('--sleep', type=float, default=0,
+          help='Seconds to wait between two batches to limit the load on '
+               'the database (default: %(default)s).')
+    @args('--dry-run', dest='dry_run', action='store_true', default=False,
+          help='Only count the rows that would be purged.')
+    def purge(self, age_in_days, batch_size=1000, sleep=0, dry_run=False):
         """Purge deleted rows older than a given age from cinder tables."""
         age_in_days = int(age_in_days)
         if age_in_days < 0:
@@ -335,15 +345,25 @@ class DbCommands(object):
         if age_in_days >= (int(time.time()) / 86400):
             print(_("Maximum age is count of days since epoch."))
             sys.exit(1)
+        if batch_size < 0 or sleep < 0:
+            print(_("Batch size and sleep cannot be negative."))
+            sys.exit(1)
         ctxt = context.get_admin_context()
 
         try:
-            db.purge_deleted_rows(ctxt, age_in_days)
+            purged = db.purge_deleted_rows(ctxt, age_in_days,
+                                           batch_size=batch_size,
+                                           sleep=sleep, dry_run=dry_run)
         except db_exc.DBReferenceError:
             print(_("Purge command failed, check cinder-manage "
                     "logs for more details."))
             sys.exit(1)
 
+        if dry_run:
+            print(_("Rows that would be purged:"))
+        for table, rows in purged.items():
+            print("%(table)s: %(rows)d" % {'table': table, 'rows': rows})
+
     def _run_migration(self, ctxt, max_count):
         ran = 0
         exceptions = False
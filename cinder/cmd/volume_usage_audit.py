@@ -34,8 +34,15 @@
     - `year` - previous year. If run on Jan 1, it generates usages for
       Jan 1 through Dec 31 of the previous year.
 
+    The audit can be split with the `shards` and `shard` options into
+    several processes, each of them sending the usages of a range of
+    projects.
+
 """
 
+import eventlet
+eventlet.monkey_patch()
+
 import datetime
 import iso8601
 import sys
@@ -68,6 +75,26 @@ script_opts = [
                 default=False,
                 help="Send the volume and snapshot create and delete "
                      "notifications generated in the specified period."),
+    cfg.IntOpt('batch_size',
+               default=1000,
+               min=1,
+               help="Number of volumes, snapshots or backups read from the "
+                    "database at a time."),
+    cfg.IntOpt('notification_workers',
+               default=1,
+               min=1,
+               help="Number of notifications of a batch sent concurrently."),
+    cfg.IntOpt('shards',
+               default=1,
+               min=1,
+               help="Number of shards the audit is split into. Each shard "
+                    "sends the usages of a range of project IDs, so several "
+                    "audits with different shard options can run at once."),
+    cfg.IntOpt('shard',
+               default=0,
+               min=0,
+               help="Index of the shard audited by this process, from 0 to "
+                    "shards - 1."),
 ]
 CONF.register_cli_opts(script_opts)
 
@@ -90,6 +117,30 @@ def _time_error(LOG, begin, end):
     return begin, end
 
 
+def _shard_project_range(LOG):
+    """Return the range of project IDs of the audited shard.
+
+    Project IDs are hex UUIDs, the shards split the range of their first 8
+    hex digits evenly. The first and last shards are unbounded so that
+    project IDs in other formats are audited too.
+    """
+    if CONF.shard >= CONF.shards:
+        msg = _("The shard (%(shard)d) must be lower than the number of "
+                "shards (%(shards)d).") % {'shard': CONF.shard,
+                                           'shards': CONF.shards}
+        LOG.error(msg)
+        sys.exit(-1)
+    if CONF.shards == 1:
+        return None
+
+    def bound(shard):
+        return '%08x' % (shard * 16 ** 8 // CONF.shards)
+
+    first = bound(CONF.shard) if CONF.shard else None
+    last = bound(CONF.shard + 1) if CONF.shard + 1 < CONF.shards else None
+    return first, last
+
+
 def _vol_notify_usage(LOG, volume_ref, extra_info, admin_context):
     """volume_ref notify usage"""
     try:
@@ -181,6 +232,10 @@ def _delete_action(obj_ref, admin_context, LOG, notify_about_usage,
 
 def _obj_ref_action(_notify_usage, LOG, obj_ref, extra_info, admin_context,
                     begin, end, notify_about_usage, type_id_str, type_name):
+    # Usages are sent concurrently and building them can change the context,
+    # like the read_deleted of the snapshot usages, so each object gets its
+    # own copy.
+    admin_context = admin_context.elevated()
     _notify_usage(LOG, obj_ref, extra_info, admin_context)
     if CONF.send_actions:
         if begin < obj_ref.created_at < end:
@@ -192,6 +247,32 @@ def _obj_ref_action(_notify_usage, LOG, obj_ref, extra_info, admin_context,
                            notify_about_usage, type_id_str, type_name)
 
 
+def _notify_all_active_by_window(list_cls, admin_context, begin, end,
+                                 project_range, notify, **kwargs):
+    """Send the usages of the objects active in a period.
+
+    The objects are read from the database in batches of batch_size objects
+    and the notifications of a batch are sent by a pool of
+    notification_workers green threads.
+
+    :returns: number of objects
+    """
+    pool = eventlet.GreenPool(CONF.notification_workers)
+    count = 0
+    marker = None
+    while True:
+        objs = list_cls.get_all_active_by_window(
+            admin_context, begin, end, marker=marker,
+            limit=CONF.batch_size, project_range=project_range, **kwargs)
+        for obj_ref in objs:
+            pool.spawn_n(notify, obj_ref)
+        pool.waitall()
+        count += len(objs)
+        if len(objs) < CONF.batch_size:
+            return count
+        marker = objs[-1].id
+
+
 def main():
     objects.register_all()
     admin_context = context.get_admin_context()
@@ -203,43 +284,50 @@ def main():
 
     begin, end = utils.last_completed_audit_period()
     begin, end = _time_error(LOG, begin, end)
+    project_range = _shard_project_range(LOG)
 
     LOG.info("Starting volume usage audit")
     LOG.info("Creating usages for %(begin_period)s until %(end_period)s",
              {"begin_period": begin, "end_period": end})
+    if project_range:
+        LOG.info("Auditing shard %(shard)d of %(shards)d",
+                 {'shard': CONF.shard, 'shards': CONF.shards})
 
     extra_info = {
         'audit_period_beginning': str(begin),
         'audit_period_ending': str(end),
     }
 
-    volumes = objects.VolumeList.get_all_active_by_window(admin_context,
-                                                          begin,
-                                                          end)
-
-    LOG.info("Found %d volumes", len(volumes))
-    for volume_ref in volumes:
+    def notify_volume(volume_ref):
         _obj_ref_action(_vol_notify_usage, LOG, volume_ref, extra_info,
                         admin_context, begin, end,
                         cinder.volume.utils.notify_about_volume_usage,
                         "volume_id", "volume")
 
-    snapshots = objects.SnapshotList.get_all_active_by_window(admin_context,
-                                                              begin, end)
-    LOG.info("Found %d snapshots", len(snapshots))
-    for snapshot_ref in snapshots:
+    count = _notify_all_active_by_window(
+        objects.VolumeList, admin_context, begin, end, project_range,
+        notify_volume, fields=cinder.volume.utils.VOLUME_USAGE_FIELDS)
+    LOG.info("Found %d volumes", count)
+
+    def notify_snapshot(snapshot_ref):
         _obj_ref_action(_snap_notify_usage, LOG, snapshot_ref, extra_info,
                         admin_context, begin,
                         end, cinder.volume.utils.notify_about_snapshot_usage,
                         "snapshot_id", "snapshot")
 
-    backups = objects.BackupList.get_all_active_by_window(admin_context,
-                                                          begin, end)
+    count = _notify_all_active_by_window(
+        objects.SnapshotList, admin_context, begin, end, project_range,
+        notify_snapshot)
+    LOG.info("Found %d snapshots", count)
 
-    LOG.info("Found %d backups", len(backups))
-    for backup_ref in backups:
+    def notify_backup(backup_ref):
         _obj_ref_action(_backup_notify_usage, LOG, backup_ref, extra_info,
                         admin_context, begin,
                         end, cinder.volume.utils.notify_about_backup_usage,
                         "backup_id", "backup")
+
+    count = _notify_all_active_by_window(
+        objects.BackupList, admin_context, begin, end, project_range,
+        notify_backup)
+    LOG.info("Found %d backups", count)
     LOG.info("Volume usage audit completed")
@@ -20,6 +20,8 @@
 import datetime
 
 from oslo_log import log as logging
+from oslo_utils import timeutils
+import six
 from six.moves import range
 import sqlalchemy
 import sqlalchemy.sql as sa_sql
@@ -56,11 +58,68 @@ def _get_default_column_value(model, column_name):
     return _TYPE_SCHEMA[attr_type.__visit_name__]
 
 
+# Python types of the values of the sort keys in a page token, by column type.
+_SEEK_VALUE_TYPES = (
+    (sqlalchemy.DateTime, six.string_types),
+    (sqlalchemy.Boolean, (bool,)),
+    (sqlalchemy.Integer, six.integer_types),
+    (sqlalchemy.Float, six.integer_types + (float,)),
+    (sqlalchemy.String, six.string_types),
+)
+
+
+def _get_seek_value(model_attr, sort_key, value):
+    """Return a page token value as a value of the sort key column.
+
+    Page tokens come from the user, so their values are checked against the
+    type of the column instead of letting the database reject them.
+    """
+    for column_type, value_types in _SEEK_VALUE_TYPES:
+        if not isinstance(model_attr.type, column_type):
+            continue
+        try:
+            if not isinstance(value, value_types):
+                raise ValueError()
+            if column_type is sqlalchemy.DateTime:
+                value = timeutils.normalize_time(
+                    timeutils.parse_isotime(value))
+        except ValueError:
+            raise exception.InvalidInput(
+                reason=_('Invalid page token value for sort key %s.') %
+                sort_key)
+        break
+    return value
+
+
+def _get_seek_criterion(model, sort_key, value, op):
+    """Return the criterion of a sort key for seek pagination.
+
+    Unlike the marker criteria the column is compared directly, so the
+    database can seek in an index on the sort keys instead of evaluating an
+    expression for every row. NULL values are still handled as the default
+    value of the column, which is the lowest value of its type.
+    """
+    model_attr = getattr(model, sort_key)
+    if value is None:
+        default = _get_default_column_value(model, sort_key)
+        attr = sa_sql.expression.case([(model_attr.isnot(None),
+                                        model_attr), ],
+                                      else_=default)
+        return getattr(attr, op)(default)
+
+    value = _get_seek_value(model_attr, sort_key, value)
+    criterion = getattr(model_attr, op)(value)
+    if op == '__lt__' and model_attr.property.columns[0].nullable:
+        criterion = sqlalchemy.sql.or_(criterion, model_attr.is_(None))
+    return criterion
+
+
 # TODO(wangxiyuan): Use oslo_db.sqlalchemy.utils.paginate_query once it is
 # stable and afforded by the minimum version in requirement.txt.
 # copied from glance/db/sqlalchemy/api.py
 def paginate_query(query, model, limit, sort_keys, marker=None,
-                   sort_dir=None, sort_dirs=None, offset=None):
+                   sort_dir=None, sort_dirs=None, offset=None,
+                   marker_values=None):
     """Returns a query with sorting / pagination criteria added.
 
     Pagination works by requiring a unique sort_key, specified by sort_keys.
@@ -88,6 +147,9 @@ def paginate_query(query, model, limit, sort_keys, marker=None,
     :param sort_dirs: per-column array of sort_dirs, corresponding to sort_keys
     :param offset: the number of items to skip from the marker or from the
                     first element.
+    :param marker_values: dictionary with the values of the sort keys for the
+                          last item of the previous page, serialized as JSON,
+                          used instead of marker for seek pagination.
 
     :rtype: sqlalchemy.orm.query.Query
     :return: The query with sorting/pagination added.
@@ -164,6 +226,22 @@ def paginate_query(query, model, limit, sort_keys, marker=None,
 
         f = sqlalchemy.sql.or_(*criteria_list)
         query = query.filter(f)
+    elif marker_values is not None:
+        criteria_list = []
+        for i, sort_key in enumerate(sort_keys):
+            if sort_key not in marker_values:
+                raise exception.InvalidInput(
+                    reason=_('The page token does not match the sort '
+                             'keys.'))
+            crit_attrs = [
+                _get_seek_criterion(model, sort_keys[j],
+                                    marker_values[sort_keys[j]], '__eq__')
+                for j in range(0, i)]
+            op = '__lt__' if sort_dirs[i] == 'desc' else '__gt__'
+            crit_attrs.append(_get_seek_criterion(
+                model, sort_key, marker_values[sort_key], op))
+            criteria_list.append(sqlalchemy.sql.and_(*crit_attrs))
+        query = query.filter(sqlalchemy.sql.or_(*criteria_list))
 
     if limit is not None:
         query = query.limit(limit)
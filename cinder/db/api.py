@@ -261,6 +261,11 @@ def volume_data_get_for_host(context, host, count_only=False):
                                          count_only)
 
 
+def volume_count_get_by_host(context):
+    """Get the number of volumes in each host, by host."""
+    return IMPL.volume_count_get_by_host(context)
+
+
 def volume_data_get_for_project(context, project_id, host=None):
     """Get (volume_count, gigabytes) for project."""
     return IMPL.volume_data_get_for_project(context, project_id, host=host)
@@ -282,11 +287,11 @@ def volume_get(context, volume_id):
 
 
 def volume_get_all(context, marker=None, limit=None, sort_keys=None,
-                   sort_dirs=None, filters=None, offset=None):
+                   sort_dirs=None, filters=None, offset=None, fields=None):
     """Get all volumes."""
     return IMPL.volume_get_all(context, marker, limit, sort_keys=sort_keys,
                                sort_dirs=sort_dirs, filters=filters,
-                               offset=offset)
+                               offset=offset, fields=fields)
 
 
 def calculate_resource_count(context, resource_type, filters):
@@ -311,13 +316,14 @@ def volume_get_all_by_generic_group(context, group_id, filters=None):
 
 def volume_get_all_by_project(context, project_id, marker, limit,
                               sort_keys=None, sort_dirs=None, filters=None,
-                              offset=None):
+                              offset=None, fields=None):
     """Get all volumes belonging to a project."""
     return IMPL.volume_get_all_by_project(context, project_id, marker, limit,
                                           sort_keys=sort_keys,
                                           sort_dirs=sort_dirs,
                                           filters=filters,
-                                          offset=offset)
+                                          offset=offset,
+                                          fields=fields)
 
 
 def get_volume_summary(context, project_only):
@@ -519,13 +525,17 @@ def snapshot_data_get_for_project(context, project_id, volume_type_id=None,
 
 
 def snapshot_get_all_active_by_window(context, begin, end=None,
-                                      project_id=None):
+                                      project_id=None, marker=None,
+                                      limit=None, project_range=None):
     """Get all the snapshots inside the window.
 
-    Specifying a project_id will filter for a certain project.
+    Specifying a project_id will filter for a certain project, and a
+    project_range for a range of projects. With limit or marker the snapshots
+    are sorted by id and returned in batches after the marker id.
     """
-    return IMPL.snapshot_get_all_active_by_window(context, begin, end,
-                                                  project_id)
+    return IMPL.snapshot_get_all_active_by_window(
+        context, begin, end, project_id, marker=marker, limit=limit,
+        project_range=project_range)
 
 
 ####################
@@ -690,13 +700,19 @@ def volume_type_destroy(context, id):
     return IMPL.volume_type_destroy(context, id)
 
 
-def volume_get_all_active_by_window(context, begin, end=None, project_id=None):
+def volume_get_all_active_by_window(context, begin, end=None, project_id=None,
+                                    marker=None, limit=None,
+                                    project_range=None, fields=None):
     """Get all the volumes inside the window.
 
-    Specifying a project_id will filter for a certain project.
+    Specifying a project_id will filter for a certain project, and a
+    project_range for a range of projects. With limit or marker the volumes
+    are sorted by id and returned in batches after the marker id. When
+    fields is given only these volume fields are loaded.
     """
-    return IMPL.volume_get_all_active_by_window(context, begin, end,
-                                                project_id)
+    return IMPL.volume_get_all_active_by_window(
+        context, begin, end, project_id, marker=marker, limit=limit,
+        project_range=project_range, fields=fields)
 
 
 def volume_type_access_get_all(context, type_id):
@@ -1234,13 +1250,18 @@ def backup_get_all_by_volume(context, volume_id, filters=None):
                                          filters=filters)
 
 
-def backup_get_all_active_by_window(context, begin, end=None, project_id=None):
+def backup_get_all_active_by_window(context, begin, end=None, project_id=None,
+                                    marker=None, limit=None,
+                                    project_range=None):
     """Get all the backups inside the window.
 
-    Specifying a project_id will filter for a certain project.
+    Specifying a project_id will filter for a certain project, and a
+    project_range for a range of projects. With limit or marker the backups
+    are sorted by id and returned in batches after the marker id.
     """
-    return IMPL.backup_get_all_active_by_window(context, begin, end,
-                                                project_id)
+    return IMPL.backup_get_all_active_by_window(
+        context, begin, end, project_id, marker=marker, limit=limit,
+        project_range=project_range)
 
 
 def backup_update(context, backup_id, values):
@@ -1595,13 +1616,16 @@ def group_snapshot_creating_from_src():
 ###################
 
 
-def purge_deleted_rows(context, age_in_days):
+def purge_deleted_rows(context, age_in_days, batch_size=None, sleep=0,
+                       dry_run=False):
     """Purge deleted rows older than given age from cinder tables
 
     Raises InvalidParameterValue if age_in_days is incorrect.
-    :returns: number of deleted rows
+    :returns: number of deleted rows of each table
     """
-    return IMPL.purge_deleted_rows(context, age_in_days=age_in_days)
+    return IMPL.purge_deleted_rows(context, age_in_days=age_in_days,
+                                   batch_size=batch_size, sleep=sleep,
+                                   dry_run=dry_run)
 
 
 def get_booleans_for_table(table_name):
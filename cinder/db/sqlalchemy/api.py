@@ -25,6 +25,7 @@ import functools
 import itertools
 import re
 import sys
+import time
 import uuid
 
 from oslo_config import cfg
@@ -1663,6 +1664,16 @@ def volume_data_get_for_host(context, host, count_only=False):
         return (result[0] or 0, result[1] or 0)
 
 
+@require_admin_context
+def volume_count_get_by_host(context):
+    result = model_query(context,
+                         models.Volume.host,
+                         func.count(models.Volume.id),
+                         read_deleted="no").\
+        group_by(models.Volume.host).all()
+    return {host: count for host, count in result}
+
+
 @require_admin_context
 def _volume_data_get_for_project(context, project_id, volume_type_id=None,
                                  session=None, host=None):
@@ -1904,9 +1915,19 @@ def apply_like_filters(model):
     return decorator_filters
 
 
+# Relationships joined loaded by _volume_get_query, and the Volume object
+# field each of them is used for.
+VOLUME_JOINED_LOADS = (('volume_metadata', 'metadata'),
+                       ('volume_admin_metadata', 'admin_metadata'),
+                       ('volume_type', 'volume_type'),
+                       ('volume_attachment', 'volume_attachment'),
+                       ('consistencygroup', 'consistencygroup'),
+                       ('group', 'group'))
+
+
 @require_context
 def _volume_get_query(context, session=None, project_only=False,
-                      joined_load=True):
+                      joined_load=True, fields=None, read_deleted=None):
     """Get the query to retrieve the volume.
 
     :param context: the context used to run the method _volume_get_query
@@ -1918,28 +1939,28 @@ def _volume_get_query(context, session=None, project_only=False,
                         the database. Currently, the False value for this
                         parameter is specially for the case of updating
                         database during volume migration
+    :param fields: names of the Volume object fields to load, only their
+                   columns and relationships are queried. All of them are
+                   loaded when None
+    :param read_deleted: overrides the read_deleted field of the context
     :returns: updated query or None
     """
+    query = model_query(context, models.Volume, session=session,
+                        project_only=project_only, read_deleted=read_deleted)
+    if fields is not None:
+        columns = models.Volume.__table__.columns
+        query = query.options(load_only(
+            'id', *[field for field in fields if field in columns]))
     if not joined_load:
-        return model_query(context, models.Volume, session=session,
-                           project_only=project_only)
-    if is_admin_context(context):
-        return model_query(context, models.Volume, session=session,
-                           project_only=project_only).\
-            options(joinedload('volume_metadata')).\
-            options(joinedload('volume_admin_metadata')).\
-            options(joinedload('volume_type')).\
-            options(joinedload('volume_attachment')).\
-            options(joinedload('consistencygroup')).\
-            options(joinedload('group'))
-    else:
-        return model_query(context, models.Volume, session=session,
-                           project_only=project_only).\
-            options(joinedload('volume_metadata')).\
-            options(joinedload('volume_type')).\
-            options(joinedload('volume_attachment')).\
-            options(joinedload('consistencygroup')).\
-            options(joinedload('group'))
+        return query
+
+    is_admin = is_admin_context(context)
+    for relationship, field in VOLUME_JOINED_LOADS:
+        if relationship == 'volume_admin_metadata' and not is_admin:
+            continue
+        if fields is None or field in fields:
+            query = query.options(joinedload(relationship))
+    return query
 
 
 @require_context
@@ -2188,7 +2209,7 @@ def volume_get(context, volume_id):
 
 @require_admin_context
 def volume_get_all(context, marker=None, limit=None, sort_keys=None,
-                   sort_dirs=None, filters=None, offset=None):
+                   sort_dirs=None, filters=None, offset=None, fields=None):
     """Retrieves all volumes.
 
     If no sort parameters are specified then the returned volumes are sorted
@@ -2207,13 +2228,16 @@ def volume_get_all(context, marker=None, limit=None, sort_keys=None,
                     or sets cause an 'IN' operation, while exact matching
                     is used for other values, see _process_volume_filters
                     function for more information
+    :param fields: names of the Volume object fields to load, see
+                   _volume_get_query
     :returns: list of matching volumes
     """
     session = get_session()
     with session.begin():
         # Generate the query
         query = _generate_paginate_query(context, session, marker, limit,
-                                         sort_keys, sort_dirs, filters, offset)
+                                         sort_keys, sort_dirs, filters, offset,
+                                         fields=fields)
         # No volumes would match, return empty list
         if query is None:
             return []
@@ -2337,7 +2361,7 @@ def volume_get_all_by_generic_group(context, group_id, filters=None):
 @require_context
 def volume_get_all_by_project(context, project_id, marker, limit,
                               sort_keys=None, sort_dirs=None, filters=None,
-                              offset=None):
+                              offset=None, fields=None):
     """Retrieves all volumes in a project.
 
     If no sort parameters are specified then the returned volumes are sorted
@@ -2357,6 +2381,8 @@ def volume_get_all_by_project(context, project_id, marker, limit,
                     or sets cause an 'IN' operation, while exact matching
                     is used for other values, see _process_volume_filters
                     function for more information
+    :param fields: names of the Volume object fields to load, see
+                   _volume_get_query
     :returns: list of matching volumes
     """
     session = get_session()
@@ -2367,7 +2393,8 @@ def volume_get_all_by_project(context, project_id, marker, limit,
         filters['project_id'] = project_id
         # Generate the query
         query = _generate_paginate_query(context, session, marker, limit,
-                                         sort_keys, sort_dirs, filters, offset)
+                                         sort_keys, sort_dirs, filters, offset,
+                                         fields=fields)
         # No volumes would match, return empty list
         if query is None:
             return []
@@ -2376,7 +2403,7 @@ def volume_get_all_by_project(context, project_id, marker, limit,
 
 def _generate_paginate_query(context, session, marker, limit, sort_keys,
                              sort_dirs, filters, offset=None,
-                             paginate_type=models.Volume):
+                             paginate_type=models.Volume, fields=None):
     """Generate the query to include the filters and the paginate options.
 
     Returns a query with sorting / pagination criteria added or None
@@ -2385,7 +2412,8 @@ def _generate_paginate_query(context, session, marker, limit, sort_keys,
     :param context: context to query under
     :param session: the session to use
     :param marker: the last item of the previous page; we returns the next
-                    results after this value.
+                    results after this value. It can also be the PageToken
+                    of the previous page for seek pagination.
     :param limit: maximum number of items to return
     :param sort_keys: list of attributes by which results should be sorted,
                       paired with corresponding item in sort_dirs
@@ -2397,6 +2425,8 @@ def _generate_paginate_query(context, session, marker, limit, sort_keys,
                     function for more information
     :param offset: number of items to skip
     :param paginate_type: type of pagination to generate
+    :param fields: names of the object fields to load, only supported for
+                   volumes
     :returns: updated query or None
     """
     get_query, process_filters, get = PAGINATION_HELPERS[paginate_type]
@@ -2404,7 +2434,10 @@ def _generate_paginate_query(context, session, marker, limit, sort_keys,
     sort_keys, sort_dirs = process_sort_params(sort_keys,
                                                sort_dirs,
                                                default_dir='desc')
-    query = get_query(context, session=session)
+    if fields is None:
+        query = get_query(context, session=session)
+    else:
+        query = get_query(context, session=session, fields=fields)
 
     if filters:
         query = process_filters(query, filters)
@@ -2412,14 +2445,18 @@ def _generate_paginate_query(context, session, marker, limit, sort_keys,
             return None
 
     marker_object = None
-    if marker is not None:
+    marker_values = None
+    if isinstance(marker, common.PageToken):
+        marker_values = marker.values
+    elif marker is not None:
         marker_object = get(context, marker, session)
 
     return sqlalchemyutils.paginate_query(query, paginate_type, limit,
                                           sort_keys,
                                           marker=marker_object,
                                           sort_dirs=sort_dirs,
-                                          offset=offset)
+                                          offset=offset,
+                                          marker_values=marker_values)
 
 
 def calculate_resource_count(context, resource_type, filters):
@@ -3329,21 +3366,47 @@ def snapshot_data_get_for_project(context, project_id,
                                           host=host)
 
 
+def _active_by_window_filters(query, model, begin, end, project_id,
+                              marker, limit, project_range):
+    """Filter a query on the rows active during a window.
+
+    When limit or marker are given the rows are sorted by id, so that the
+    window can be read in batches of limit rows, each one starting after the
+    id of the last row of the previous batch given as marker.
+
+    :param project_range: tuple with the first project ID included and the
+                          first excluded, either can be None for no bound
+    """
+    query = query.filter(or_(model.deleted_at == None,  # noqa
+                             model.deleted_at > begin))
+    if end:
+        query = query.filter(model.created_at < end)
+    if project_id:
+        query = query.filter_by(project_id=project_id)
+    if project_range:
+        first_project_id, last_project_id = project_range
+        if first_project_id is not None:
+            query = query.filter(model.project_id >= first_project_id)
+        if last_project_id is not None:
+            query = query.filter(model.project_id < last_project_id)
+    if marker is None and limit is None:
+        return query
+    if marker is not None:
+        query = query.filter(model.id > marker)
+    return query.order_by(model.id).limit(limit)
+
+
 @require_context
 def snapshot_get_all_active_by_window(context, begin, end=None,
-                                      project_id=None):
+                                      project_id=None, marker=None,
+                                      limit=None, project_range=None):
     """Return snapshots that were active during window."""
 
     query = model_query(context, models.Snapshot, read_deleted="yes")
-    query = query.filter(or_(models.Snapshot.deleted_at == None,  # noqa
-                             models.Snapshot.deleted_at > begin))
-    query = query.options(joinedload(models.Snapshot.volume))
     query = query.options(joinedload('snapshot_metadata'))
-    if end:
-        query = query.filter(models.Snapshot.created_at < end)
-    if project_id:
-        query = query.filter_by(project_id=project_id)
-
+    query = _active_by_window_filters(query, models.Snapshot, begin, end,
+                                      project_id, marker, limit,
+                                      project_range)
     return query.all()
 
 
@@ -4197,25 +4260,16 @@ def group_type_destroy(context, id):
 def volume_get_all_active_by_window(context,
                                     begin,
                                     end=None,
-                                    project_id=None):
+                                    project_id=None,
+                                    marker=None,
+                                    limit=None,
+                                    project_range=None,
+                                    fields=None):
     """Return volumes that were active during window."""
-    query = model_query(context, models.Volume, read_deleted="yes")
-    query = query.filter(or_(models.Volume.deleted_at == None,  # noqa
-                             models.Volume.deleted_at > begin))
-    if end:
-        query = query.filter(models.Volume.created_at < end)
-    if project_id:
-        query = query.filter_by(project_id=project_id)
-
-    query = (query.options(joinedload('volume_metadata')).
-             options(joinedload('volume_type')).
-             options(joinedload('volume_attachment')).
-             options(joinedload('consistencygroup')).
-             options(joinedload('group')))
-
-    if is_admin_context(context):
-        query = query.options(joinedload('volume_admin_metadata'))
-
+    query = _volume_get_query(context, fields=fields, read_deleted="yes")
+    query = _active_by_window_filters(query, models.Volume, begin, end,
+                                      project_id, marker, limit,
+                                      project_range)
     return query.all()
 
 
@@ -5257,18 +5311,16 @@ def backup_get_all_by_volume(context, volume_id, filters=None):
 
 
 @require_context
-def backup_get_all_active_by_window(context, begin, end=None, project_id=None):
+def backup_get_all_active_by_window(context, begin, end=None, project_id=None,
+                                    marker=None, limit=None,
+                                    project_range=None):
     """Return backups that were active during window."""
 
     query = model_query(context, models.Backup, read_deleted="yes").options(
         joinedload('backup_metadata'))
-    query = query.filter(or_(models.Backup.deleted_at == None,  # noqa
-                             models.Backup.deleted_at > begin))
-    if end:
-        query = query.filter(models.Backup.created_at < end)
-    if project_id:
-        query = query.filter_by(project_id=project_id)
-
+    query = _active_by_window_filters(query, models.Backup, begin, end,
+                                      project_id, marker, limit,
+                                      project_range)
     return query.all()
 
 
@@ -6514,9 +6566,55 @@ def group_snapshot_creating_from_src():
 ###############################
 
 
+def _purge_table_rows(session, table, criterion, batch_size, sleep):
+    """Delete the rows of a table matching criterion in batches.
+
+    Rows are deleted in primary key order, one transaction per batch, so an
+    interrupted purge only loses the batch in progress and the next purge
+    carries on with the rows left.
+    """
+    primary_key = list(table.primary_key.columns)
+    if not batch_size or len(primary_key) != 1:
+        with session.begin():
+            return session.execute(table.delete().where(criterion)).rowcount
+
+    primary_key = primary_key[0]
+    rows_purged = 0
+    last_key = None
+    while True:
+        query = sql.select([primary_key]).where(criterion)
+        if last_key is not None:
+            query = query.where(primary_key > last_key)
+        with session.begin():
+            keys = [row[0] for row in session.execute(
+                query.order_by(primary_key).limit(batch_size))]
+            if not keys:
+                break
+            result = session.execute(table.delete().where(
+                and_(primary_key.in_(keys), criterion)))
+        rows_purged += result.rowcount
+        last_key = keys[-1]
+        LOG.debug('Deleted %(row)d rows from table=%(table)s so far.',
+                  {'row': rows_purged, 'table': table})
+        if len(keys) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return rows_purged
+
+
 @require_admin_context
-def purge_deleted_rows(context, age_in_days):
-    """Purge deleted rows older than age from cinder tables."""
+def purge_deleted_rows(context, age_in_days, batch_size=None, sleep=0,
+                       dry_run=False):
+    """Purge deleted rows older than age from cinder tables.
+
+    :param batch_size: maximum number of rows deleted per transaction, all
+                       the rows of a table are deleted at once when None or 0
+    :param sleep: seconds to wait between two batches
+    :param dry_run: only count the rows that would be purged
+    :returns: OrderedDict with the number of rows purged, or to purge on a
+              dry run, for each table in purge order
+    """
     try:
         age_in_days = int(age_in_days)
     except ValueError:
@@ -6529,36 +6627,42 @@ def purge_deleted_rows(context, age_in_days):
     metadata = MetaData()
     metadata.reflect(engine)
 
+    purged = collections.OrderedDict()
     for table in reversed(metadata.sorted_tables):
         if 'deleted' not in table.columns.keys():
             continue
+        deleted_age = timeutils.utcnow() - dt.timedelta(days=age_in_days)
+        criterion = table.c.deleted_at < deleted_age
+        if dry_run:
+            purged[table.name] = session.query(
+                func.count()).select_from(table).filter(criterion).scalar()
+            continue
+
         LOG.info('Purging deleted rows older than age=%(age)d days '
                  'from table=%(table)s', {'age': age_in_days,
                                           'table': table})
-        deleted_age = timeutils.utcnow() - dt.timedelta(days=age_in_days)
+        rows_purged = 0
         try:
-            with session.begin():
-                # Delete child records first from quality_of_service_specs
-                # table to avoid FK constraints
-                if six.text_type(table) == "quality_of_service_specs":
-                    session.query(models.QualityOfServiceSpecs).filter(
-                        and_(models.QualityOfServiceSpecs.specs_id.isnot(
-                            None), models.QualityOfServiceSpecs.
-                            deleted.is_(True), models.QualityOfServiceSpecs.
-                            deleted_at < deleted_age)).delete()
-                result = session.execute(
-                    table.delete()
-                    .where(table.c.deleted_at < deleted_age))
+            # Delete child records first from quality_of_service_specs
+            # table to avoid FK constraints
+            if six.text_type(table) == "quality_of_service_specs":
+                rows_purged += _purge_table_rows(
+                    session, table,
+                    and_(table.c.specs_id.isnot(None), criterion),
+                    batch_size, sleep)
+            rows_purged += _purge_table_rows(session, table, criterion,
+                                             batch_size, sleep)
         except db_exc.DBReferenceError as ex:
             LOG.error('DBError detected when purging from '
                       '%(tablename)s: %(error)s.',
                       {'tablename': table, 'error': ex})
             raise
 
-        rows_purged = result.rowcount
+        purged[table.name] = rows_purged
         if rows_purged != 0:
             LOG.info("Deleted %(row)d rows from table=%(table)s",
                      {'row': rows_purged, 'table': table})
+    return purged
 
 
 ###############################
@@ -6837,6 +6941,7 @@ def image_volume_cache_get_and_update_last_used(context, image_id, **filters):
 
         if entry:
             entry.last_used = timeutils.utcnow()
+            entry.hit_count = (entry.hit_count or 0) + 1
             entry.save(session=session)
         return entry
 
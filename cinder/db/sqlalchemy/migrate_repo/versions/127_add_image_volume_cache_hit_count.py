@@ -0,0 +1,22 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy import Column, Integer, MetaData, Table
+
+
+def upgrade(migrate_engine):
+    """Add the hit_count column to the image_volume_cache_entries table."""
+    meta = MetaData(bind=migrate_engine)
+    entries = Table('image_volume_cache_entries', meta, autoload=True)
+    if not hasattr(entries.c, 'hit_count'):
+        entries.create_column(Column('hit_count', Integer, default=0,
+                                     server_default='0', nullable=False))
@@ -0,0 +1,39 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy import Index
+from sqlalchemy import MetaData
+from sqlalchemy import Table
+
+
+TABLES = ('volumes', 'snapshots', 'backups')
+
+
+def upgrade(migrate_engine):
+    """Add indexes on the default sort keys of paginated listings."""
+    meta = MetaData(bind=migrate_engine)
+    inspector = Inspector(migrate_engine)
+
+    for table_name in TABLES:
+        table = Table(table_name, meta, autoload=True)
+        index_names = [i['name'] for i in inspector.get_indexes(table_name)]
+
+        index_name = '%s_project_deleted_created_idx' % table_name
+        if index_name not in index_names:
+            Index(index_name, table.c.project_id, table.c.deleted,
+                  table.c.created_at, table.c.id).create()
+
+        index_name = '%s_deleted_created_idx' % table_name
+        if index_name not in index_names:
+            Index(index_name, table.c.deleted, table.c.created_at,
+                  table.c.id).create()
@@ -244,6 +244,10 @@ class Volume(BASE, CinderBase):
     __tablename__ = 'volumes'
     __table_args__ = (Index('volumes_service_uuid_idx',
                             'deleted', 'service_uuid'),
+                      Index('volumes_project_deleted_created_idx',
+                            'project_id', 'deleted', 'created_at', 'id'),
+                      Index('volumes_deleted_created_idx',
+                            'deleted', 'created_at', 'id'),
                       CinderBase.__table_args__)
 
     id = Column(String(36), primary_key=True)
@@ -681,6 +685,11 @@ class Reservation(BASE, CinderBase):
 class Snapshot(BASE, CinderBase):
     """Represents a snapshot of volume."""
     __tablename__ = 'snapshots'
+    __table_args__ = (Index('snapshots_project_deleted_created_idx',
+                            'project_id', 'deleted', 'created_at', 'id'),
+                      Index('snapshots_deleted_created_idx',
+                            'deleted', 'created_at', 'id'),
+                      CinderBase.__table_args__)
     id = Column(String(36), primary_key=True)
 
     @property
@@ -747,6 +756,11 @@ class SnapshotMetadata(BASE, CinderBase):
 class Backup(BASE, CinderBase):
     """Represents a backup of a volume to Swift."""
     __tablename__ = 'backups'
+    __table_args__ = (Index('backups_project_deleted_created_idx',
+                            'project_id', 'deleted', 'created_at', 'id'),
+                      Index('backups_deleted_created_idx',
+                            'deleted', 'created_at', 'id'),
+                      CinderBase.__table_args__)
     id = Column(String(36), primary_key=True)
 
     @property
@@ -885,6 +899,7 @@ class ImageVolumeCacheEntry(BASE, models.ModelBase):
     volume_id = Column(String(36), nullable=False)
     size = Column(Integer, nullable=False)
     last_used = Column(DateTime, default=lambda: timeutils.utcnow())
+    hit_count = Column(Integer, default=0, nullable=False)
 
 
 class Worker(BASE, CinderBase):
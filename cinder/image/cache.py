@@ -27,14 +27,27 @@ CONF = cfg.CONF
 
 LOG = logging.getLogger(__name__)
 
+# Sort keys for the cache entries for each eviction policy, the entries with
+# the lowest values are evicted first.
+EVICTION_POLICIES = {
+    # Least recently used.
+    'lru': lambda entry: entry['last_used'],
+    # Least frequently used, least recently used among the same hit count.
+    'lfu': lambda entry: (entry['hit_count'] or 0, entry['last_used']),
+    # Fewest hits per GB, so big and rarely used image-volumes go first.
+    'size': lambda entry: ((entry['hit_count'] or 0) / float(entry['size']),
+                           entry['last_used']),
+}
+
 
 class ImageVolumeCache(object):
     def __init__(self, db, volume_api, max_cache_size_gb=0,
-                 max_cache_size_count=0):
+                 max_cache_size_count=0, eviction_policy='lru'):
         self.db = db
         self.volume_api = volume_api
         self.max_cache_size_gb = int(max_cache_size_gb)
         self.max_cache_size_count = int(max_cache_size_count)
+        self.eviction_policy = eviction_policy or 'lru'
         self.notifier = rpc.get_notifier('volume', CONF.host)
 
     def get_by_image_volume(self, context, volume_id):
@@ -131,10 +144,14 @@ class ImageVolumeCache(object):
                 volume.size > self.max_cache_size_gb):
             return False
 
-        # Assume the entries are ordered by most recently used to least used.
+        # The entries come ordered by most recently used to least used,
+        # reorder them so the ones to evict first are at the end.
         entries = self.db.image_volume_cache_get_all(
             context,
             **self._get_query_filters(volume))
+        if self.eviction_policy != 'lru':
+            entries.sort(key=EVICTION_POLICIES[self.eviction_policy],
+                         reverse=True)
 
         current_count = len(entries)
 
@@ -34,6 +34,7 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import timeutils
 import six
+from six.moves import http_client
 from six.moves import range
 from six.moves import urllib
 
@@ -335,22 +336,36 @@ class GlanceImageService(object):
         except Exception:
             _reraise_translated_image_exception(image_id)
 
+    def get_direct_file_path(self, context, image_id):
+        """Get the path of a local file with the image data.
+
+        Returns None unless 'file' is in allowed_direct_url_schemes and the
+        image has a file:// location.
+        """
+        if 'file' not in CONF.allowed_direct_url_schemes:
+            return None
+
+        direct_url, locations = self.get_location(context, image_id)
+        urls = [direct_url] + [loc.get('url') for loc in locations or []]
+        for url in urls:
+            if url is None:
+                continue
+            parsed_url = urllib.parse.urlparse(url)
+            if parsed_url.scheme == "file":
+                return parsed_url.path
+        return None
+
     def download(self, context, image_id, data=None):
         """Calls out to Glance for data and writes data."""
-        if data and 'file' in CONF.allowed_direct_url_schemes:
-            direct_url, locations = self.get_location(context, image_id)
-            urls = [direct_url] + [loc.get('url') for loc in locations or []]
-            for url in urls:
-                if url is None:
-                    continue
-                parsed_url = urllib.parse.urlparse(url)
-                if parsed_url.scheme == "file":
-                    # a system call to cp could have significant performance
-                    # advantages, however we do not have the path to files at
-                    # this point in the abstraction.
-                    with open(parsed_url.path, "r") as f:
-                        shutil.copyfileobj(f, data)
-                    return
+        if data:
+            path = self.get_direct_file_path(context, image_id)
+            if path:
+                # a system call to cp could have significant performance
+                # advantages, however we do not have the path to files at
+                # this point in the abstraction.
+                with open(path, "r") as f:
+                    shutil.copyfileobj(f, data)
+                return
 
         try:
             image_chunks = self._client.call(context, 'data', image_id)
@@ -367,6 +382,26 @@ class GlanceImageService(object):
             for chunk in image_chunks:
                 data.write(chunk)
 
+    def download_range(self, context, image_id, offset, length):
+        """Calls out to Glance for a byte range of the image data.
+
+        Returns an iterator over the data of the range, or None if the image
+        store does not support ranged downloads and sent the whole image.
+        """
+        url = '/v2/images/%s/file' % image_id
+        headers = {'Range': 'bytes=%d-%d' % (offset, offset + length - 1)}
+        try:
+            resp, body = self._client.call(context, 'get', url,
+                                           headers=headers,
+                                           controller='http_client')
+        except Exception:
+            _reraise_translated_image_exception(image_id)
+
+        if resp.status_code != http_client.PARTIAL_CONTENT:
+            resp.close()
+            return None
+        return body
+
     def create(self, context, image_meta, data=None):
         """Store the image data and return the new image object."""
         sent_service_image_meta = self._translate_to_glance(image_meta)
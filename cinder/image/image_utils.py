@@ -26,14 +26,17 @@ we should look at maybe pushing this up to Oslo
 
 import contextlib
 import errno
+import hashlib
 import math
 import os
 import re
+import sys
 import tempfile
 
 import cryptography
 from cursive import exception as cursive_exception
 from cursive import signature_utils
+import eventlet
 from eventlet import tpool
 from oslo_concurrency import processutils
 from oslo_config import cfg
@@ -56,7 +59,33 @@ LOG = logging.getLogger(__name__)
 image_helper_opts = [cfg.StrOpt('image_conversion_dir',
                                 default='$state_path/conversion',
                                 help='Directory used for temporary storage '
-                                'during image conversion'), ]
+                                'during image conversion'),
+                     cfg.BoolOpt('image_stream_raw_to_volume',
+                                 default=True,
+                                 help='Write raw images straight from the '
+                                 'image service into the volume instead of '
+                                 'downloading them to image_conversion_dir '
+                                 'first. Images with a signature to verify '
+                                 'and copies throttled with '
+                                 'volume_copy_bps_limit always use a '
+                                 'temporary file.'),
+                     cfg.IntOpt('image_download_workers',
+                                default=1,
+                                min=1,
+                                help='Number of connections used to '
+                                'download an image to image_conversion_dir, '
+                                'each of them fetching a different byte '
+                                'range of the image. Only used when the '
+                                'image store supports ranged downloads, 1 '
+                                'downloads images over a single '
+                                'connection.'),
+                     cfg.IntOpt('image_download_range_size',
+                                default=256,
+                                min=1,
+                                help='Size in MiB of the byte ranges '
+                                'downloaded in parallel when '
+                                'image_download_workers is greater '
+                                'than 1.'), ]
 
 CONF = cfg.CONF
 CONF.register_opts(image_helper_opts)
@@ -74,6 +103,12 @@ QEMU_IMG_FORMAT_MAP = {
 }
 QEMU_IMG_FORMAT_MAP_INV = {v: k for k, v in QEMU_IMG_FORMAT_MAP.items()}
 
+# Image properties with the signature of the image, see
+# verify_glance_image_signature.
+SIGNATURE_PROPERTIES = ('img_signature', 'img_signature_hash_method',
+                        'img_signature_certificate_uuid',
+                        'img_signature_key_type')
+
 QEMU_IMG_VERSION = None
 QEMU_IMG_MIN_FORCE_SHARE_VERSION = [2, 10, 0]
 QEMU_IMG_MIN_CONVERT_LUKS_VERSION = '2.10'
@@ -373,8 +408,10 @@ def fetch(context, image_service, image_id, path, _user_id, _project_id):
     with fileutils.remove_path_on_error(path):
         with open(path, "wb") as image_file:
             try:
-                image_service.download(context, image_id,
-                                       tpool.Proxy(image_file))
+                if not _fetch_ranges(context, image_service, image_id,
+                                     path):
+                    image_service.download(context, image_id,
+                                           tpool.Proxy(image_file))
             except IOError as e:
                 if e.errno == errno.ENOSPC:
                     params = {'path': os.path.dirname(path),
@@ -403,6 +440,214 @@ def fetch(context, image_service, image_id, path, _user_id, _project_id):
     LOG.info(msg, {"sz": fsz_mb, "mbps": mbps})
 
 
+def _fetch_ranges(context, image_service, image_id, path):
+    """Download an image over several connections, a byte range on each.
+
+    Returns False without writing anything when parallel downloads are
+    disabled, the image can be copied from a local file, the image is smaller
+    than a range, or the image store does not support ranged downloads, in
+    which case the image has to be downloaded by the image service.
+    """
+    workers = CONF.image_download_workers
+    range_size = CONF.image_download_range_size * units.Mi
+    if workers < 2 or not hasattr(image_service, 'download_range'):
+        return False
+
+    # The image service copies images with a file:// location locally.
+    if image_service.get_direct_file_path(context, image_id):
+        return False
+
+    image_meta = image_service.show(context, image_id)
+    image_size = image_meta.get('size')
+    if not image_size or image_size <= range_size:
+        return False
+
+    ranges = [[offset, min(range_size, image_size - offset), None]
+              for offset in six.moves.range(0, image_size, range_size)]
+    # Check if the image store supports ranges with the first one.
+    ranges[0][2] = image_service.download_range(context, image_id,
+                                                *ranges[0][:2])
+    if ranges[0][2] is None:
+        LOG.debug('Image store of image %s does not support ranged '
+                  'downloads.', image_id)
+        return False
+
+    # Error of the first range that failed, the others stop when it's set.
+    failed = []
+
+    def _fetch_range(offset, length, chunks):
+        if chunks is None and not failed:
+            chunks = image_service.download_range(context, image_id, offset,
+                                                  length)
+            if chunks is None:
+                raise exception.ImageDownloadFailed(
+                    image_href=image_id,
+                    reason=_('the image store stopped supporting ranged '
+                             'downloads.'))
+        try:
+            if failed:
+                return
+            written = 0
+            # Each range has its own file, and so its own position to write
+            # at.
+            with open(path, 'r+b') as range_file:
+                range_file.seek(offset)
+                writer = tpool.Proxy(range_file)
+                for chunk in chunks:
+                    if failed:
+                        return
+                    writer.write(chunk)
+                    written += len(chunk)
+        finally:
+            # Release the connection of ranges that were stopped halfway.
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        if written != length:
+            raise exception.ImageDownloadFailed(
+                image_href=image_id,
+                reason=_('got %(written)d bytes instead of %(length)d at '
+                         'offset %(offset)d.') % {'written': written,
+                                                  'length': length,
+                                                  'offset': offset})
+
+    def _fetch_range_or_stop(offset, length, chunks):
+        try:
+            _fetch_range(offset, length, chunks)
+        except Exception:
+            failed.append(sys.exc_info())
+
+    LOG.debug('Downloading image %(image_id)s in %(ranges)d ranges over '
+              '%(workers)d connections.',
+              {'image_id': image_id, 'ranges': len(ranges),
+               'workers': workers})
+    pool = eventlet.GreenPool(workers)
+    for offset, length, chunks in ranges:
+        pool.spawn_n(_fetch_range_or_stop, offset, length, chunks)
+    # Wait for all the ranges to stop writing before the file can be removed.
+    pool.waitall()
+    if failed:
+        six.reraise(*failed[0])
+
+    # The image service checks the checksum of single stream downloads,
+    # ranges have to be checked once they are all written.
+    expected_checksum = image_meta.get('checksum')
+    if expected_checksum:
+        checksum = tpool.execute(_file_checksum, path)
+        if checksum != expected_checksum:
+            raise exception.ImageDownloadFailed(
+                image_href=image_id,
+                reason=_('checksum %(checksum)s does not match the expected '
+                         '%(expected)s.') % {'checksum': checksum,
+                                             'expected': expected_checksum})
+    return True
+
+
+def _file_checksum(path):
+    checksum = hashlib.md5()
+    with open(path, 'rb') as image_file:
+        for chunk in iter(lambda: image_file.read(units.Mi), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def can_stream_image(image_meta, volume_format='raw'):
+    """Check if an image can be written straight into a volume.
+
+    Only raw images are streamed, and only when there is no signature to
+    verify and no volume copy throttling, the rest are downloaded to a
+    temporary file first to be verified, inspected or converted.
+    """
+    if not CONF.image_stream_raw_to_volume or not image_meta:
+        return False
+
+    if (volume_format != 'raw' or
+            image_meta.get('disk_format') != 'raw' or
+            image_meta.get('container_format') not in (None, 'bare') or
+            image_meta.get('size') is None):
+        return False
+
+    # The throttling only applies to the processes it runs.
+    if throttling.Throttle.DEFAULT is not None:
+        return False
+
+    properties = image_meta.get('properties') or {}
+    return not any(properties.get(key) for key in SIGNATURE_PROPERTIES)
+
+
+def stream_to_volume(context, image_service, image_meta, dest, size=None,
+                     run_as_root=True):
+    """Write a raw image from the image service straight into a volume.
+
+    The checksum of the image is calculated while it is written, and the
+    result is inspected like a downloaded image would be to make sure it is
+    not using a backing file.
+    """
+    image_id = image_meta['id']
+    if size is not None:
+        check_virtual_size(image_meta['size'], size, image_id)
+
+    LOG.debug('Streaming image %(image_id)s to volume %(dest)s - size: '
+              '%(size)s', {'image_id': image_id, 'dest': dest,
+                           'size': image_meta['size']})
+    start_time = timeutils.utcnow()
+    checksum = hashlib.md5()
+    try:
+        if (os.name == 'nt' or not os.path.exists(dest) or
+                os.access(dest, os.W_OK)):
+            _write_image_chunks(context, image_service, image_id, dest,
+                                checksum)
+        else:
+            with utils.temporary_chown(dest):
+                _write_image_chunks(context, image_service, image_id, dest,
+                                    checksum)
+    except IOError as e:
+        if e.errno != errno.ENOSPC:
+            raise
+        reason = _("No space left in %(dest)s while streaming image "
+                   "%(image)s.") % {'dest': dest, 'image': image_id}
+        LOG.exception(reason)
+        raise exception.ImageTooBig(image_id=image_id, reason=reason)
+
+    expected_checksum = image_meta.get('checksum')
+    if expected_checksum and checksum.hexdigest() != expected_checksum:
+        raise exception.ImageDownloadFailed(
+            image_href=image_id,
+            reason=_('checksum %(checksum)s does not match the expected '
+                     '%(expected)s.') % {'checksum': checksum.hexdigest(),
+                                         'expected': expected_checksum})
+
+    duration = max(timeutils.delta_seconds(start_time, timeutils.utcnow()), 1)
+    size_mb = float(image_meta['size']) / units.Mi
+    LOG.info("Image stream %(sz).2f MB at %(mbps).2f MB/s",
+             {'sz': size_mb, 'mbps': size_mb / duration})
+
+    # Like for the images that are converted, make sure what we copied was
+    # in fact a raw image and not a different format with a backing file,
+    # which may be malicious.
+    try:
+        data = qemu_img_info(dest, run_as_root=run_as_root)
+    except processutils.ProcessExecutionError:
+        # qemu-img is not installed, which is fine for raw images.
+        data = None
+    if data is not None and data.backing_file is not None:
+        raise exception.ImageUnacceptable(
+            image_id=image_id,
+            reason=_("fmt=%(fmt)s backed by:%(backing_file)s")
+            % {'fmt': data.file_format, 'backing_file': data.backing_file})
+
+
+def _write_image_chunks(context, image_service, image_id, dest, checksum):
+    # Don't truncate the destination, it can be a preallocated file.
+    mode = 'r+b' if os.path.exists(dest) else 'wb'
+    with open(dest, mode) as volume_file:
+        image_file = tpool.Proxy(volume_file)
+        for chunk in image_service.download(context, image_id):
+            checksum.update(chunk)
+            image_file.write(chunk)
+        image_file.flush()
+        os.fsync(volume_file.fileno())
+
+
 def get_qemu_data(image_id, has_meta, disk_format_raw, dest, run_as_root,
                   force_share=False):
     # We may be on a system that doesn't have qemu-img installed.  That
@@ -500,6 +745,13 @@ def fetch_to_volume_format(context, image_service,
     qemu_img = True
     image_meta = image_service.show(context, image_id)
 
+    tmp_images = TemporaryImages.for_image_service(image_service)
+    if (not tmp_images.get(context, image_id) and
+            can_stream_image(image_meta, volume_format)):
+        stream_to_volume(context, image_service, image_meta, dest, size=size,
+                         run_as_root=run_as_root)
+        return
+
     # NOTE(avishay): I'm not crazy about creating temp files which may be
     # large and cause disk full errors which would confuse users.
     # Unfortunately it seems that you can't pipe to 'qemu-img convert' because
@@ -515,7 +767,6 @@ def fetch_to_volume_format(context, image_service,
         if data is None:
             qemu_img = False
 
-        tmp_images = TemporaryImages.for_image_service(image_service)
         tmp_image = tmp_images.get(context, image_id)
         if tmp_image:
             tmp = tmp_image
@@ -156,7 +156,8 @@ class KeyMigrator(object):
     def _log_migration_status(self):
         volumes_to_migrate = len(objects.volume.VolumeList.get_all(
             context=self.admin_context,
-            filters={'encryption_key_id': self.fixed_key_id}))
+            filters={'encryption_key_id': self.fixed_key_id},
+            fields=('id',)))
         if volumes_to_migrate == 0:
             LOG.info("No volumes are using the ConfKeyManager's "
                      "encryption_key_id.")
@@ -63,6 +63,7 @@ from cinder import db
 from cinder.db import base
 from cinder import exception
 from cinder import objects
+from cinder.objects import cleanable
 from cinder import rpc
 from cinder.scheduler import rpcapi as scheduler_rpcapi
 from cinder import utils
@@ -235,7 +236,13 @@ class CleanableManager(object):
             service_id=cleanup_request.service_id,
             until=until)
 
+        types = cleanable.CinderCleanableObject.cleanable_resource_types
         for clean in to_clean:
+            # Entries for other kinds of work, like the deferred wipes of the
+            # LVM driver, are handled by their owners.
+            if clean.resource_type not in types:
+                continue
+
             original_service_id = clean.service_id
             original_time = clean.updated_at
             # Try to do a soft delete to mark the entry as being cleaned up
@@ -254,8 +254,11 @@ class BackupList(base.ObjectListBase, base.CinderObject):
                                   backups, expected_attrs=expected_attrs)
 
     @classmethod
-    def get_all_active_by_window(cls, context, begin, end):
-        backups = db.backup_get_all_active_by_window(context, begin, end)
+    def get_all_active_by_window(cls, context, begin, end, marker=None,
+                                 limit=None, project_range=None):
+        backups = db.backup_get_all_active_by_window(
+            context, begin, end, marker=marker, limit=limit,
+            project_range=project_range)
         expected_attrs = Backup._get_expected_attrs(context)
         return base.obj_make_list(context, cls(context), objects.Backup,
                                   backups, expected_attrs=expected_attrs)
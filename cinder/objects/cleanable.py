@@ -196,6 +196,11 @@ class CinderCleanableObject(base.CinderPersistentObject):
                 else:
                     candidates = list(args)
                     candidates.extend(kwargs.values())
+                # Lists of objects, like in batch operations, are also
+                # taken care of.
+                candidates = [obj for cand in candidates
+                              for obj in (cand if isinstance(cand, list)
+                                          else [cand])]
                 cleanables = [cand for cand in candidates
                               if (isinstance(cand, CinderCleanableObject)
                                   and cand.is_cleanable(pinned=False))]
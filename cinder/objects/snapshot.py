@@ -340,8 +340,11 @@ class SnapshotList(base.ObjectListBase, base.CinderObject):
                                   snapshots, expected_attrs=expected_attrs)
 
     @classmethod
-    def get_all_active_by_window(cls, context, begin, end):
-        snapshots = db.snapshot_get_all_active_by_window(context, begin, end)
+    def get_all_active_by_window(cls, context, begin, end, marker=None,
+                                 limit=None, project_range=None):
+        snapshots = db.snapshot_get_all_active_by_window(
+            context, begin, end, marker=marker, limit=limit,
+            project_range=project_range)
         expected_attrs = Snapshot._get_expected_attrs(context)
         return base.obj_make_list(context, cls(context), objects.Snapshot,
                                   snapshots, expected_attrs=expected_attrs)
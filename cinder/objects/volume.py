@@ -250,12 +250,18 @@ class Volume(cleanable.CinderCleanableObject, base.CinderObject,
                     primitive.pop(obj_field, None)
 
     @classmethod
-    def _from_db_object(cls, context, volume, db_volume, expected_attrs=None):
+    def _from_db_object(cls, context, volume, db_volume, expected_attrs=None,
+                        loaded_fields=None):
         if expected_attrs is None:
             expected_attrs = []
         for name, field in volume.fields.items():
             if name in cls.OPTIONAL_FIELDS:
                 continue
+            # Fields that were not projected are not in db_volume and would
+            # be lazy loaded one volume at a time.
+            if (loaded_fields is not None and name not in loaded_fields and
+                    name != 'id'):
+                continue
             value = db_volume.get(name)
             if isinstance(field, fields.IntegerField):
                 value = value or 0
@@ -289,7 +295,7 @@ class Volume(cleanable.CinderCleanableObject, base.CinderObject,
                 objects.VolumeAttachment,
                 db_volume.get('volume_attachment'))
             volume.volume_attachment = attachments
-        if volume.consistencygroup_id and 'consistencygroup' in expected_attrs:
+        if 'consistencygroup' in expected_attrs and volume.consistencygroup_id:
             consistencygroup = objects.ConsistencyGroup(context)
             consistencygroup._from_db_object(context,
                                              consistencygroup,
@@ -311,7 +317,7 @@ class Volume(cleanable.CinderCleanableObject, base.CinderObject,
                                                 db_cluster)
             else:
                 volume.cluster = None
-        if volume.group_id and 'group' in expected_attrs:
+        if 'group' in expected_attrs and volume.group_id:
             group = objects.Group(context)
             group._from_db_object(context,
                                   group,
@@ -606,15 +612,29 @@ class VolumeList(base.ObjectListBase, base.CinderObject):
 
         return expected_attrs
 
+    @classmethod
+    def _get_projected_attrs(cls, context, fields):
+        expected_attrs = cls._get_expected_attrs(context)
+        if fields is None:
+            return expected_attrs
+        return [attr for attr in expected_attrs if attr in fields]
+
     @classmethod
     def get_all(cls, context, marker=None, limit=None, sort_keys=None,
-                sort_dirs=None, filters=None, offset=None):
+                sort_dirs=None, filters=None, offset=None, fields=None):
+        """Get all volumes.
+
+        When fields is given only these fields of the volumes are loaded
+        from the database, the others are left unset.
+        """
         volumes = db.volume_get_all(context, marker, limit,
                                     sort_keys=sort_keys, sort_dirs=sort_dirs,
-                                    filters=filters, offset=offset)
-        expected_attrs = cls._get_expected_attrs(context)
+                                    filters=filters, offset=offset,
+                                    fields=fields)
+        expected_attrs = cls._get_projected_attrs(context, fields)
         return base.obj_make_list(context, cls(context), objects.Volume,
-                                  volumes, expected_attrs=expected_attrs)
+                                  volumes, expected_attrs=expected_attrs,
+                                  loaded_fields=fields)
 
     @classmethod
     def get_all_by_host(cls, context, host, filters=None):
@@ -643,14 +663,17 @@ class VolumeList(base.ObjectListBase, base.CinderObject):
     @classmethod
     def get_all_by_project(cls, context, project_id, marker=None, limit=None,
                            sort_keys=None, sort_dirs=None, filters=None,
-                           offset=None):
+                           offset=None, fields=None):
+        """Get all volumes of a project, see get_all for fields."""
         volumes = db.volume_get_all_by_project(context, project_id, marker,
                                                limit, sort_keys=sort_keys,
                                                sort_dirs=sort_dirs,
-                                               filters=filters, offset=offset)
-        expected_attrs = cls._get_expected_attrs(context)
+                                               filters=filters, offset=offset,
+                                               fields=fields)
+        expected_attrs = cls._get_projected_attrs(context, fields)
         return base.obj_make_list(context, cls(context), objects.Volume,
-                                  volumes, expected_attrs=expected_attrs)
+                                  volumes, expected_attrs=expected_attrs,
+                                  loaded_fields=fields)
 
     @classmethod
     def get_volume_summary(cls, context, project_only):
@@ -658,8 +681,13 @@ class VolumeList(base.ObjectListBase, base.CinderObject):
         return volumes
 
     @classmethod
-    def get_all_active_by_window(cls, context, begin, end):
-        volumes = db.volume_get_all_active_by_window(context, begin, end)
-        expected_attrs = cls._get_expected_attrs(context)
+    def get_all_active_by_window(cls, context, begin, end, marker=None,
+                                 limit=None, project_range=None,
+                                 fields=None):
+        volumes = db.volume_get_all_active_by_window(
+            context, begin, end, marker=marker, limit=limit,
+            project_range=project_range, fields=fields)
+        expected_attrs = cls._get_projected_attrs(context, fields)
         return base.obj_make_list(context, cls(context), objects.Volume,
-                                  volumes, expected_attrs=expected_attrs)
+                                  volumes, expected_attrs=expected_attrs,
+                                  loaded_fields=fields)
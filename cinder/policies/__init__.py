@@ -27,6 +27,7 @@ from cinder.policies import group_snapshots
 from cinder.policies import group_types
 from cinder.policies import groups
 from cinder.policies import hosts
+from cinder.policies import image_cache
 from cinder.policies import limits
 from cinder.policies import manageable_snapshots
 from cinder.policies import manageable_volumes
@@ -74,6 +75,7 @@ def list_rules():
         services.list_rules(),
         scheduler_stats.list_rules(),
         hosts.list_rules(),
+        image_cache.list_rules(),
         limits.list_rules(),
         manageable_volumes.list_rules(),
         volume_type.list_rules(),
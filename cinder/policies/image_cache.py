@@ -0,0 +1,36 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from oslo_policy import policy
+
+from cinder.policies import base
+
+
+WARM_POLICY = 'image_cache:warm'
+
+
+image_cache_policies = [
+    policy.DocumentedRuleDefault(
+        name=WARM_POLICY,
+        check_str=base.RULE_ADMIN_API,
+        description="Add an image to the image-volume cache of a backend.",
+        operations=[
+            {
+                'method': 'POST',
+                'path': '/image_cache/warm'
+            }
+        ])
+]
+
+
+def list_rules():
+    return image_cache_policies
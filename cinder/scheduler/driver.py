@@ -35,6 +35,14 @@ scheduler_driver_opts = [
     cfg.IntOpt('scheduler_max_attempts',
                default=3,
                help='Maximum number of attempts to schedule a volume'),
+    cfg.StrOpt('scheduler_batch_placement_policy',
+               default='spread',
+               choices=['spread', 'pack'],
+               help='How volumes created in a batch are placed on the '
+                    'backends passing the filters. "spread" weighs the '
+                    'backends again after each volume, so the consumed '
+                    'capacity spreads the batch over them. "pack" fills the '
+                    'best backend before moving to the next one.'),
 ]
 
 CONF = cfg.CONF
@@ -132,6 +140,26 @@ class Scheduler(object):
         """Must override schedule method for scheduler to work."""
         raise NotImplementedError(_("Must implement schedule_create_volume"))
 
+    def schedule_create_volumes(self, context, request_spec_list,
+                                filter_properties_list):
+        """Schedule a batch of volume creations.
+
+        Returns a list with, for each request, None when the volume has been
+        sent to a backend or the exception raised while scheduling it.
+        Schedulers can override it to place the whole batch at once.
+        """
+        results = []
+        for request_spec, filter_properties in zip(request_spec_list,
+                                                   filter_properties_list):
+            try:
+                self.schedule_create_volume(context, request_spec,
+                                            filter_properties)
+            except Exception as e:
+                results.append(e)
+            else:
+                results.append(None)
+        return results
+
     def schedule_create_group(self, context, group,
                               group_spec,
                               request_spec_list,
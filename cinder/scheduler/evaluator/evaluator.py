@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import operator
 import re
 
@@ -37,12 +38,17 @@ def _operatorOperands(tokenList):
 class EvalConstant(object):
     def __init__(self, toks):
         self.value = toks[0]
+        # Variables are split once at parse time so evaluating the
+        # expression is just a lookup in the namespace.
+        self.variable = None
+        if (isinstance(self.value, six.string_types) and
+                re.match(r"^[a-zA-Z_]+\.[a-zA-Z_]+$", self.value)):
+            self.variable = tuple(self.value.split('.'))
 
     def eval(self):
         result = self.value
-        if (isinstance(result, six.string_types) and
-                re.match(r"^[a-zA-Z_]+\.[a-zA-Z_]+$", result)):
-            (which_dict, entry) = result.split('.')
+        if self.variable:
+            (which_dict, entry) = self.variable
             try:
                 result = _vars[which_dict][entry]
             except KeyError as e:
@@ -224,6 +230,9 @@ class EvalBoolOrOp(object):
 _parser = None
 _vars = {}
 
+MAX_CACHED_EXPRESSIONS = 1024
+_expressions = collections.OrderedDict()
+
 
 def _def_parser():
     # Enabling packrat parsing greatly speeds up the parsing.
@@ -272,6 +281,50 @@ def _def_parser():
     return expr
 
 
+class Expression(object):
+    """An expression parsed once and evaluated many times."""
+
+    def __init__(self, expression):
+        global _parser
+        if _parser is None:
+            _parser = _def_parser()
+
+        self.expression = expression
+        self._root = None
+        self._error = None
+        try:
+            self._root = _parser.parseString(expression, parseAll=True)[0]
+        except pyparsing.ParseException as e:
+            # Keep the error, a broken function is reported by every
+            # backend using it on every request.
+            self._error = _("ParseException: %s") % e
+
+    def evaluate(self, **kwargs):
+        if self._error:
+            raise exception.EvaluatorParseException(self._error)
+
+        global _vars
+        _vars = kwargs
+        return self._root.eval()
+
+
+def compile_expression(expression):
+    """Returns the parsed form of an expression, parsing it only once.
+
+    Parsed expressions are kept by text, so a backend reporting a different
+    function gets it parsed on its next use, and the least recently used
+    ones are dropped once there are more than MAX_CACHED_EXPRESSIONS.
+    """
+    try:
+        compiled = _expressions.pop(expression)
+    except KeyError:
+        compiled = Expression(expression)
+        while len(_expressions) >= MAX_CACHED_EXPRESSIONS:
+            _expressions.popitem(last=False)
+    _expressions[expression] = compiled
+    return compiled
+
+
 def evaluate(expression, **kwargs):
     """Evaluates an expression.
 
@@ -281,17 +334,4 @@ def evaluate(expression, **kwargs):
     Supports both integer and floating point values, and automatic
     promotion where necessary.
     """
-    global _parser
-    if _parser is None:
-        _parser = _def_parser()
-
-    global _vars
-    _vars = kwargs
-
-    try:
-        result = _parser.parseString(expression, parseAll=True)[0]
-    except pyparsing.ParseException as e:
-        raise exception.EvaluatorParseException(
-            _("ParseException: %s") % e)
-
-    return result.eval()
+    return compile_expression(expression).evaluate(**kwargs)
@@ -20,6 +20,8 @@ You can customize this scheduler by specifying your own volume Filters and
 Weighing Functions.
 """
 
+import collections
+
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
@@ -93,7 +95,123 @@ class FilterScheduler(driver.Scheduler):
             raise exception.NoValidBackend(reason=_("No weighed backends "
                                                     "available"))
 
-        backend = backend.obj
+        self._create_volume_on_backend(context, request_spec,
+                                       filter_properties, backend.obj)
+
+    def schedule_create_volumes(self, context, request_spec_list,
+                                filter_properties_list):
+        """Place a batch of volumes filtering once per kind of request.
+
+        Requests that would get the same filtering results (same volume type,
+        size, availability zone, QoS and scheduler hints) are filtered and
+        weighed together, and then placed one after the other consuming the
+        capacity of the chosen pools, following
+        scheduler_batch_placement_policy.
+        """
+        results = [None] * len(request_spec_list)
+        batches = collections.OrderedDict()
+        for index, request_spec in enumerate(request_spec_list):
+            filter_properties = filter_properties_list[index]
+            # Rescheduled requests and requests tied to a backend keep going
+            # through the one at a time path.
+            if (filter_properties.get('retry') or
+                    request_spec.get('resource_backend')):
+                key = index
+            else:
+                key = self._get_batch_key(request_spec, filter_properties)
+            batches.setdefault(key, []).append(index)
+
+        for indexes in batches.values():
+            if len(indexes) == 1:
+                index = indexes[0]
+                try:
+                    self.schedule_create_volume(context,
+                                                request_spec_list[index],
+                                                filter_properties_list[index])
+                except Exception as e:
+                    results[index] = e
+                continue
+
+            batch_results = self._schedule_create_volume_batch(
+                context,
+                [request_spec_list[i] for i in indexes],
+                [filter_properties_list[i] for i in indexes])
+            for index, result in zip(indexes, batch_results):
+                results[index] = result
+        return results
+
+    @staticmethod
+    def _get_batch_key(request_spec, filter_properties):
+        """Requests with the same key pass and fail the same filters."""
+        vol = request_spec['volume_properties']
+        return jsonutils.dumps({
+            'volume_type_id': vol.get('volume_type_id'),
+            'size': vol.get('size'),
+            'availability_zone': vol.get('availability_zone'),
+            'multiattach': vol.get('multiattach', False),
+            'qos_specs': vol.get('qos_specs'),
+            'scheduler_hints': filter_properties.get('scheduler_hints'),
+            'snapshot_id': request_spec.get('snapshot_id'),
+            'source_volid': request_spec.get('source_volid'),
+            'group_id': request_spec.get('group_id'),
+        }, sort_keys=True)
+
+    def _schedule_create_volume_batch(self, context, request_spec_list,
+                                      filter_properties_list):
+        try:
+            weighed_backends = self._get_weighted_candidates(
+                context, request_spec_list[0], filter_properties_list[0])
+            for request_spec, filter_properties in zip(
+                    request_spec_list[1:], filter_properties_list[1:]):
+                self._prepare_filter_properties(context, request_spec,
+                                                filter_properties)
+        except Exception as e:
+            return [e] * len(request_spec_list)
+
+        if not weighed_backends:
+            LOG.warning('No weighed backend found for %(count)s volumes '
+                        'with properties: %(type)s',
+                        {'count': len(request_spec_list),
+                         'type': request_spec_list[0].get('volume_type')})
+
+        pack = CONF.scheduler_batch_placement_policy == 'pack'
+        check_capacity = (
+            'CapacityFilter' in [cls.__name__ for cls in
+                                 self.host_manager.enabled_filters])
+        results = []
+        for request_spec, filter_properties in zip(request_spec_list,
+                                                   filter_properties_list):
+            if not weighed_backends:
+                results.append(exception.NoValidBackend(
+                    reason=_("No weighed backends available")))
+                continue
+
+            backend = weighed_backends[0].obj
+            LOG.debug("Choosing %s", backend.backend_id)
+            backend.consume_from_volume(request_spec['volume_properties'])
+            try:
+                self._create_volume_on_backend(context, request_spec,
+                                               filter_properties, backend)
+            except Exception as e:
+                results.append(e)
+            else:
+                results.append(None)
+
+            # All the requests in the batch have the same size, so only the
+            # backend we just used may have stopped fitting them.
+            if check_capacity and not self.host_manager.get_filtered_backends(
+                    [backend], filter_properties, ['CapacityFilter']):
+                weighed_backends = weighed_backends[1:]
+            if not pack and len(weighed_backends) > 1:
+                # Weigh again with the consumed capacity to spread the
+                # batch over the backends.
+                weighed_backends = self.host_manager.get_weighed_backends(
+                    [weighed.obj for weighed in weighed_backends],
+                    filter_properties)
+        return results
+
+    def _create_volume_on_backend(self, context, request_spec,
+                                  filter_properties, backend):
         volume_id = request_spec['volume_id']
 
         updated_volume = driver.volume_update_db(
@@ -274,14 +392,9 @@ class FilterScheduler(driver.Scheduler):
                 {'max_attempts': max_attempts,
                  'resource_id': resource_id})
 
-    def _get_weighted_candidates(self, context, request_spec,
-                                 filter_properties=None):
-        """Return a list of backends that meet required specs.
-
-        Returned list is ordered by their fitness.
-        """
-        elevated = context.elevated()
-
+    def _prepare_filter_properties(self, context, request_spec,
+                                   filter_properties):
+        """Fill filter_properties with everything the filters need."""
         # Since Cinder is using mixed filters from Oslo and it's own, which
         # takes 'resource_XX' and 'volume_XX' as input respectively, copying
         # 'volume_XX' to 'resource_XX' will make both filters happy.
@@ -290,8 +403,6 @@ class FilterScheduler(driver.Scheduler):
 
         config_options = self._get_configuration_options()
 
-        if filter_properties is None:
-            filter_properties = {}
         self._populate_retry(filter_properties,
                              request_spec)
 
@@ -319,6 +430,19 @@ class FilterScheduler(driver.Scheduler):
             resource_type['extra_specs'].update(
                 multiattach='<is> True')
 
+    def _get_weighted_candidates(self, context, request_spec,
+                                 filter_properties=None):
+        """Return a list of backends that meet required specs.
+
+        Returned list is ordered by their fitness.
+        """
+        elevated = context.elevated()
+
+        if filter_properties is None:
+            filter_properties = {}
+        self._prepare_filter_properties(context, request_spec,
+                                        filter_properties)
+
         # Revert volume consumed capacity if it's a rescheduled request
         retry = filter_properties.get('retry', {})
         if retry.get('backends', []):
@@ -331,7 +455,8 @@ class FilterScheduler(driver.Scheduler):
 
         # Note: remember, we are using an iterator here. So only
         # traverse this list once.
-        backends = self.host_manager.get_all_backend_states(elevated)
+        backends = self.host_manager.get_all_backend_states(
+            elevated, filter_properties)
 
         # Filter local hosts based on requirements ...
         backends = self.host_manager.get_filtered_backends(backends,
@@ -30,17 +30,18 @@ class AffinityFilter(filters.BaseBackendFilter):
             filters['cluster_name'] = backend_state.cluster_name
         else:
             filters['host'] = backend_state.host
-        return self.volume_api.get_all(context, filters=filters)
+        return self.volume_api.get_all(context, filters=filters,
+                                       fields=('id',))
 
+    @staticmethod
+    def _get_affinity_uuids(filter_properties, hint):
+        """Get the volume uuids of a scheduler hint.
 
-class DifferentBackendFilter(AffinityFilter):
-    """Schedule volume on a different back-end from a set of volumes."""
-
-    def backend_passes(self, backend_state, filter_properties):
-        context = filter_properties['context']
+        Returns None if the hint isn't a uuid or a list of uuids.
+        """
         scheduler_hints = filter_properties.get('scheduler_hints') or {}
 
-        affinity_uuids = scheduler_hints.get('different_host', [])
+        affinity_uuids = scheduler_hints.get(hint, [])
 
         # scheduler hint verification: affinity_uuids can be a list of uuids
         # or single uuid.  The checks here is to make sure every single string
@@ -49,15 +50,73 @@ class DifferentBackendFilter(AffinityFilter):
         # like a uuid, it is better to fail the request than serving it wrong.
         if isinstance(affinity_uuids, list):
             for uuid in affinity_uuids:
-                if uuidutils.is_uuid_like(uuid):
-                    continue
-                else:
-                    return False
+                if not uuidutils.is_uuid_like(uuid):
+                    return None
+            return affinity_uuids
         elif uuidutils.is_uuid_like(affinity_uuids):
-            affinity_uuids = [affinity_uuids]
-        else:
-            # Not a list, not a string looks like uuid, don't pass it
-            # to DB for query to avoid potential risk.
+            return [affinity_uuids]
+        # Not a list, not a string looks like uuid, don't pass it
+        # to DB for query to avoid potential risk.
+        return None
+
+    @staticmethod
+    def _host_matches(value, host):
+        """Match a host or cluster name like the DB host and cluster filters.
+
+        A value with a pool must match exactly, a backend also matches all its
+        pools, and a host all its backends and pools.
+        """
+        if not host:
+            return False
+        if host == value or '#' in value:
+            return host == value
+        if '@' in value:
+            return host.startswith(value + '#')
+        return host.startswith((value + '@', value + '#'))
+
+    def _backend_has_volumes(self, backend_state, volumes):
+        for vol in volumes:
+            if backend_state.cluster_name:
+                if self._host_matches(backend_state.cluster_name,
+                                      vol.cluster_name):
+                    return True
+            elif self._host_matches(backend_state.host, vol.host):
+                return True
+        return False
+
+    def _filter_all(self, filter_obj_list, filter_properties, hint,
+                    same_backend):
+        """Yield the backends that pass the filter for the request.
+
+        The volumes in the scheduler hint are retrieved with a single query
+        and compared with each backend in memory, instead of querying them
+        for each backend.
+        """
+        affinity_uuids = self._get_affinity_uuids(filter_properties, hint)
+        if affinity_uuids is None:
+            return
+
+        if affinity_uuids:
+            context = filter_properties['context']
+            volumes = self.volume_api.get_all(
+                context, filters={'id': affinity_uuids, 'deleted': False},
+                fields=('id', 'host', 'cluster_name'))
+
+        for backend_state in filter_obj_list:
+            if (not affinity_uuids or
+                    self._backend_has_volumes(backend_state, volumes) ==
+                    same_backend):
+                yield backend_state
+
+
+class DifferentBackendFilter(AffinityFilter):
+    """Schedule volume on a different back-end from a set of volumes."""
+
+    def backend_passes(self, backend_state, filter_properties):
+        context = filter_properties['context']
+        affinity_uuids = self._get_affinity_uuids(filter_properties,
+                                                  'different_host')
+        if affinity_uuids is None:
             return False
 
         if affinity_uuids:
@@ -66,32 +125,19 @@ class DifferentBackendFilter(AffinityFilter):
         # With no different_host key
         return True
 
+    def filter_all(self, filter_obj_list, filter_properties):
+        return self._filter_all(filter_obj_list, filter_properties,
+                                'different_host', same_backend=False)
+
 
 class SameBackendFilter(AffinityFilter):
     """Schedule volume on the same back-end as another volume."""
 
     def backend_passes(self, backend_state, filter_properties):
         context = filter_properties['context']
-        scheduler_hints = filter_properties.get('scheduler_hints') or {}
-
-        affinity_uuids = scheduler_hints.get('same_host', [])
-
-        # scheduler hint verification: affinity_uuids can be a list of uuids
-        # or single uuid.  The checks here is to make sure every single string
-        # in the list looks like a uuid, otherwise, this filter will fail to
-        # pass.  Note that the filter does *NOT* ignore string doesn't look
-        # like a uuid, it is better to fail the request than serving it wrong.
-        if isinstance(affinity_uuids, list):
-            for uuid in affinity_uuids:
-                if uuidutils.is_uuid_like(uuid):
-                    continue
-                else:
-                    return False
-        elif uuidutils.is_uuid_like(affinity_uuids):
-            affinity_uuids = [affinity_uuids]
-        else:
-            # Not a list, not a string looks like uuid, don't pass it
-            # to DB for query to avoid potential risk.
+        affinity_uuids = self._get_affinity_uuids(filter_properties,
+                                                  'same_host')
+        if affinity_uuids is None:
             return False
 
         if affinity_uuids:
@@ -99,3 +145,7 @@ class SameBackendFilter(AffinityFilter):
 
         # With no same_host key
         return True
+
+    def filter_all(self, filter_obj_list, filter_properties):
+        return self._filter_all(filter_obj_list, filter_properties,
+                                'same_host', same_backend=True)
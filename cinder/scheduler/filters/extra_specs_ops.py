@@ -38,6 +38,11 @@ _op_methods = {'=': lambda x, y: float(x) >= float(y),
                's>=': operator.ge}
 
 
+def is_operator(word):
+    """Return True if word is an operator understood by match()."""
+    return word == '<or>' or word in _op_methods
+
+
 def match(value, req):
     if req is None:
         if value is None:
@@ -69,17 +69,8 @@ class InstanceLocalityFilter(filters.BaseBackendFilter):
 
         return self._nova_ext_srv_attr
 
-    def backend_passes(self, backend_state, filter_properties):
-        context = filter_properties['context']
-        backend = volume_utils.extract_host(backend_state.backend_id, 'host')
-
-        scheduler_hints = filter_properties.get('scheduler_hints') or {}
-        instance_uuid = scheduler_hints.get(HINT_KEYWORD, None)
-
-        # Without 'local_to_instance' hint
-        if not instance_uuid:
-            return True
-
+    def _get_instance_host(self, context, instance_uuid):
+        """Get the host of an instance, querying Nova only once for it."""
         if not uuidutils.is_uuid_like(instance_uuid):
             raise exception.InvalidUUID(uuid=instance_uuid)
 
@@ -93,7 +84,7 @@ class InstanceLocalityFilter(filters.BaseBackendFilter):
 
         # First, lookup for already-known information in local cache
         if instance_uuid in self._cache:
-            return self._cache[instance_uuid] == backend
+            return self._cache[instance_uuid]
 
         if not self._nova_has_extended_server_attributes(context):
             LOG.warning('Hint "%s" dropped because '
@@ -115,6 +106,46 @@ class InstanceLocalityFilter(filters.BaseBackendFilter):
                                             HINT_KEYWORD)
 
         self._cache[instance_uuid] = getattr(server, INSTANCE_HOST_PROP)
+        return self._cache[instance_uuid]
+
+    def backend_passes(self, backend_state, filter_properties):
+        context = filter_properties['context']
+        backend = volume_utils.extract_host(backend_state.backend_id, 'host')
+
+        scheduler_hints = filter_properties.get('scheduler_hints') or {}
+        instance_uuid = scheduler_hints.get(HINT_KEYWORD, None)
+
+        # Without 'local_to_instance' hint
+        if not instance_uuid:
+            return True
 
         # Match if given instance is hosted on backend
-        return self._cache[instance_uuid] == backend
+        return self._get_instance_host(context, instance_uuid) == backend
+
+    def filter_all(self, filter_obj_list, filter_properties):
+        """Yield the backends on the host of the hinted instance.
+
+        The instance's host is retrieved once for all the backends.
+        """
+        scheduler_hints = filter_properties.get('scheduler_hints') or {}
+        instance_uuid = scheduler_hints.get(HINT_KEYWORD, None)
+
+        # Without 'local_to_instance' hint all backends pass
+        if not instance_uuid:
+            for backend_state in filter_obj_list:
+                yield backend_state
+            return
+
+        # The input is usually a generator from the previous filter, so we
+        # have to consume it to know if there's any backend left to check.
+        backends = list(filter_obj_list)
+        if not backends:
+            return
+
+        context = filter_properties['context']
+        instance_host = self._get_instance_host(context, instance_uuid)
+        for backend_state in backends:
+            backend = volume_utils.extract_host(backend_state.backend_id,
+                                                'host')
+            if instance_host == backend:
+                yield backend_state
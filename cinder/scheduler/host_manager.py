@@ -24,12 +24,16 @@ from oslo_log import log as logging
 from oslo_utils import importutils
 from oslo_utils import strutils
 from oslo_utils import timeutils
+import six
 
 from cinder.common import constants
 from cinder import context as cinder_context
 from cinder import exception
 from cinder import objects
 from cinder.scheduler import filters
+from cinder.scheduler.filters import capabilities_filter
+from cinder.scheduler.filters import capacity_filter
+from cinder.scheduler.filters import extra_specs_ops
 from cinder import utils
 from cinder.volume import utils as vol_utils
 from cinder.volume import volume_types
@@ -58,6 +62,17 @@ host_manager_opts = [
                default='cinder.scheduler.weights.OrderedHostWeightHandler',
                help='Which handler to use for selecting the host/pool '
                     'after weighing'),
+    cfg.IntOpt('scheduler_backend_cache_time',
+               default=0,
+               min=0,
+               help='Number of seconds the scheduler reuses the list of '
+                    'active volume services before reading it again from '
+                    'the database. Capability reports from known backends '
+                    'are applied to the cache as they arrive, and a report '
+                    'from an unknown backend forces a refresh. Services '
+                    'going down, being disabled or frozen are noticed up to '
+                    'this many seconds later. 0 reads the service list on '
+                    'every scheduling request.'),
 ]
 
 CONF = cfg.CONF
@@ -392,6 +407,113 @@ class PoolState(BackendState):
         pass
 
 
+class PoolIndex(object):
+    """Pools of the active backends, bucketed by capability value.
+
+    Backends are re-indexed one at a time when their capabilities or
+    service status change, so scheduling requests neither rebuild the pool
+    map nor scan every pool when the volume type pins one of the indexed
+    capabilities to a plain value.
+    """
+
+    INDEXED_CAPABILITIES = ('volume_backend_name', 'storage_protocol')
+
+    def __init__(self):
+        # { <backend_key>: [(<pool_key>, <PoolState>, <index keys>), ...] }
+        self._backends = {}
+        self._pools = collections.OrderedDict()
+        # { (<capability>, <value>): {<pool_key>: <PoolState>} }
+        self._buckets = collections.defaultdict(collections.OrderedDict)
+        # Pools whose capability value can't be hashed are kept aside and
+        # always returned, the filters will decide about them.
+        self._unindexed = collections.defaultdict(collections.OrderedDict)
+
+    def __len__(self):
+        return len(self._pools)
+
+    @classmethod
+    def _get_index_keys(cls, pool):
+        keys = []
+        capabilities = pool.capabilities or {}
+        for capability in cls.INDEXED_CAPABILITIES:
+            # A pool that doesn't report the capability goes in no bucket,
+            # like CapabilitiesFilter it can't match any required value.
+            if capability not in capabilities:
+                continue
+            value = capabilities[capability]
+            values = value if isinstance(value, list) else [value]
+            for value in values:
+                try:
+                    hash(value)
+                except TypeError:
+                    keys.append((capability, None, False))
+                else:
+                    keys.append((capability, value, True))
+        return tuple(keys)
+
+    def update_backend(self, backend_key, backend_state):
+        """Index the current pools of a backend, replacing the old ones."""
+        entries = []
+        for pool in backend_state.pools.values():
+            # use backend_key.pool_name to make sure key is unique
+            pool_key = '.'.join([backend_key, pool.pool_name])
+            entries.append((pool_key, pool, self._get_index_keys(pool)))
+
+        old_entries = self._backends.get(backend_key)
+        if old_entries == entries:
+            return
+        if old_entries:
+            self._remove_entries(old_entries)
+
+        self._backends[backend_key] = entries
+        for pool_key, pool, keys in entries:
+            self._pools[pool_key] = pool
+            for capability, value, hashable in keys:
+                if hashable:
+                    self._buckets[(capability, value)][pool_key] = pool
+                else:
+                    self._unindexed[capability][pool_key] = pool
+
+    def remove_backend(self, backend_key):
+        """Drop all the pools of a backend from the index."""
+        entries = self._backends.pop(backend_key, None)
+        if entries:
+            self._remove_entries(entries)
+
+    def _remove_entries(self, entries):
+        for pool_key, pool, keys in entries:
+            self._pools.pop(pool_key, None)
+            for capability, value, hashable in keys:
+                if hashable:
+                    bucket = self._buckets[(capability, value)]
+                    bucket.pop(pool_key, None)
+                    if not bucket:
+                        del self._buckets[(capability, value)]
+                else:
+                    self._unindexed[capability].pop(pool_key, None)
+
+    def get_pools(self, constraints=None):
+        """Return the pools matching all the (capability, value) pairs."""
+        if not constraints:
+            return list(self._pools.values())
+
+        candidates = None
+        for capability, value in constraints:
+            try:
+                matches = dict(self._buckets.get((capability, value), {}))
+            except TypeError:
+                return list(self._pools.values())
+            matches.update(self._unindexed.get(capability, {}))
+            if candidates is None:
+                candidates = matches
+            else:
+                candidates = {key: pool for key, pool in candidates.items()
+                              if key in matches}
+            if not candidates:
+                return []
+        return list(candidates.values())
+
+
 class HostManager(object):
     """Base HostManager class."""
 
@@ -422,6 +544,9 @@ class HostManager(object):
         self.weight_classes = self.weight_handler.get_all_classes()
 
         self._no_capabilities_backends = set()  # Services without capabilities
+        self._pool_index = PoolIndex()
+        self._backend_state_map_updated = None
+        self._backend_state_map_stale = False
         self._update_backend_state_map(cinder_context.get_admin_context())
         self.service_states_last_update = {}
 
@@ -551,6 +676,17 @@ class HostManager(object):
 
         self._no_capabilities_backends.discard(backend)
 
+        backend_state = self.backend_state_map.get(backend)
+        if backend_state:
+            # Apply the report right away so cached backend states don't
+            # have to wait for the next service list refresh.
+            backend_state.update_from_volume_capability(
+                capab_copy, service=backend_state.service)
+            self._pool_index.update_backend(backend, backend_state)
+        else:
+            # New backend, or a service that has just joined a cluster.
+            self._backend_state_map_stale = True
+
     def notify_service_capabilities(self, service_name, backend, capabilities,
                                     timestamp):
         """Notify the ceilometer with updated volume stats"""
@@ -584,7 +720,16 @@ class HostManager(object):
     def has_all_capabilities(self):
         return len(self._no_capabilities_backends) == 0
 
+    def _backend_state_map_is_fresh(self):
+        cache_time = CONF.scheduler_backend_cache_time
+        return bool(cache_time and not self._backend_state_map_stale and
+                    self._backend_state_map_updated and
+                    not timeutils.is_older_than(
+                        self._backend_state_map_updated, cache_time))
+
     def _update_backend_state_map(self, context):
+        if self._backend_state_map_is_fresh():
+            return
 
         # Get resource usage across the available volume nodes:
         topic = constants.VOLUME_TOPIC
@@ -629,6 +774,7 @@ class HostManager(object):
             # update capabilities and attributes in backend_state
             backend_state.update_from_volume_capability(capabilities,
                                                         service=dict(service))
+            self._pool_index.update_backend(backend_key, backend_state)
             active_backends.add(backend_key)
 
         self._no_capabilities_backends = no_capabilities_backends
@@ -643,6 +789,10 @@ class HostManager(object):
                 LOG.info("Removing non-active backend: %(backend)s from "
                          "scheduler cache.", {'backend': backend_key})
             del self.backend_state_map[backend_key]
+            self._pool_index.remove_backend(backend_key)
+
+        self._backend_state_map_updated = timeutils.utcnow()
+        self._backend_state_map_stale = False
 
     def revert_volume_consumed_capacity(self, pool_name, size):
         for backend_key, state in self.backend_state_map.items():
@@ -652,29 +802,86 @@ class HostManager(object):
                     pool_state.consume_from_volume({'size': -size},
                                                    update_time=False)
 
-    def get_all_backend_states(self, context):
-        """Returns a dict of all the backends the HostManager knows about.
+    def get_all_backend_states(self, context, filter_properties=None):
+        """Returns a list of all the pools the HostManager knows about.
 
-        Each of the consumable resources in BackendState are
+        Each of the consumable resources in PoolState are
         populated with capabilities scheduler received from RPC.
 
-        For example:
-          {'192.168.1.100': BackendState(), ...}
+        If filter_properties are given, pools that the enabled
+        CapabilitiesFilter and CapacityFilter would reject for sure are left
+        out, using the pool index instead of going through every pool.
         """
 
         self._update_backend_state_map(context)
 
-        # build a pool_state map and return that map instead of
-        # backend_state_map
-        all_pools = {}
-        for backend_key, state in self.backend_state_map.items():
-            for key in state.pools:
-                pool = state.pools[key]
-                # use backend_key.pool_name to make sure key is unique
-                pool_key = '.'.join([backend_key, pool.pool_name])
-                all_pools[pool_key] = pool
+        if not filter_properties:
+            return self._pool_index.get_pools()
 
-        return all_pools.values()
+        pools = self._pool_index.get_pools(
+            self._get_index_constraints(filter_properties))
+        requested_size = self._get_prunable_size(filter_properties)
+        if requested_size:
+            pools = [pool for pool in pools
+                     if self._pool_may_fit(pool, requested_size)]
+        return pools
+
+    def _get_index_constraints(self, filter_properties):
+        """Return the indexed capabilities pinned by the volume type."""
+        if capabilities_filter.CapabilitiesFilter not in self.enabled_filters:
+            return []
+
+        resource_type = filter_properties.get('resource_type') or {}
+        extra_specs = resource_type.get('extra_specs', {}) or {}
+        constraints = []
+        for key, req in extra_specs.items():
+            scope = key.split(':')
+            if len(scope) == 2 and scope[0] == 'capabilities':
+                del scope[0]
+            if (len(scope) != 1 or
+                    scope[0] not in PoolIndex.INDEXED_CAPABILITIES):
+                continue
+            # Only plain values are matched by equality, anything using an
+            # operator goes through the filter.
+            if not isinstance(req, six.string_types):
+                continue
+            words = req.split()
+            if not words or extra_specs_ops.is_operator(words[0]):
+                continue
+            constraints.append((scope[0], req))
+        return constraints
+
+    def _get_prunable_size(self, filter_properties):
+        """Return the size CapacityFilter will check on every pool."""
+        if capacity_filter.CapacityFilter not in self.enabled_filters:
+            return None
+        # Extends and retypes have their own rules in the filter.
+        if (filter_properties.get('vol_exists_on') or
+                filter_properties.get('new_size')):
+            return None
+        return filter_properties.get('size')
+
+    @staticmethod
+    def _pool_may_fit(pool, requested_size):
+        """Cheap upper bound of CapacityFilter.backend_passes.
+
+        Reserved space and the provisioned ratio can only lower what the
+        filter accepts, so a pool can't pass if its free space, scaled by the
+        over subscription ratio when thin provisioned, is under the size.
+        """
+        free = pool.free_capacity_gb
+        total = pool.total_capacity_gb
+        # Let the filter handle and log all the special values.
+        if (free is None or free in ('infinite', 'unknown') or
+                total in ('infinite', 'unknown')):
+            return True
+        try:
+            free = float(free)
+            if pool.thin_provisioning_support:
+                free *= max(float(pool.max_over_subscription_ratio), 1)
+        except (TypeError, ValueError):
+            return True
+        return free >= requested_size
 
     def _filter_pools_by_volume_type(self, context, volume_type, pools):
         """Return the pools filtered by volume type specs"""
@@ -214,6 +214,45 @@ class SchedulerManager(manager.CleanableManager, manager.Manager):
         with flow_utils.DynamicLogListener(flow_engine, logger=LOG):
             flow_engine.run()
 
+    @objects.Volume.set_workers
+    @append_operation_type(name='create_volume')
+    def create_volumes(self, context, volumes, request_spec_list=None,
+                       filter_properties_list=None):
+        """Schedule the creation of a batch of volumes.
+
+        The request specs are expected to share a volume type, so the
+        scheduler driver can filter the backends once and spread or pack the
+        volumes over them.
+        """
+        self._wait_for_scheduler()
+
+        if filter_properties_list is None:
+            filter_properties_list = [{} for volume in volumes]
+        filter_properties_list = [filter_properties or {}
+                                  for filter_properties in
+                                  filter_properties_list]
+
+        try:
+            results = self.driver.schedule_create_volumes(
+                context, request_spec_list, filter_properties_list)
+        except Exception as e:
+            LOG.exception("Failed to schedule the creation of %s volumes.",
+                          len(volumes))
+            results = [e] * len(volumes)
+
+        for volume, request_spec, result in zip(volumes, request_spec_list,
+                                                results):
+            if result is None:
+                continue
+            self.message_api.create(
+                context,
+                message_field.Action.SCHEDULE_ALLOCATE_VOLUME,
+                resource_uuid=volume.id,
+                exception=result)
+            self._set_volume_state_and_notify(
+                'create_volume', {'volume_state': {'status': 'error'}},
+                context, result, request_spec)
+
     @append_operation_type()
     def create_snapshot(self, ctxt, volume, snapshot, backend,
                         request_spec=None, filter_properties=None):
@@ -72,9 +72,10 @@ class SchedulerAPI(rpc.RPCAPI):
         3.9 - Adds create_snapshot method
         3.10 - Adds backup_id to create_volume method.
         3.11 - Adds manage_existing_snapshot method.
+        3.12 - Adds create_volumes method.
     """
 
-    RPC_API_VERSION = '3.11'
+    RPC_API_VERSION = '3.12'
     RPC_DEFAULT_VERSION = '3.0'
     TOPIC = constants.SCHEDULER_TOPIC
     BINARY = 'cinder-scheduler'
@@ -108,6 +109,17 @@ class SchedulerAPI(rpc.RPCAPI):
             msg_args.pop('backup_id')
         return cctxt.cast(ctxt, 'create_volume', **msg_args)
 
+    @rpc.assert_min_rpc_version('3.12')
+    def create_volumes(self, ctxt, volumes, request_spec_list,
+                       filter_properties_list=None):
+        for volume in volumes:
+            volume.create_worker()
+        cctxt = self._get_cctxt()
+        msg_args = {'volumes': volumes,
+                    'request_spec_list': request_spec_list,
+                    'filter_properties_list': filter_properties_list}
+        return cctxt.cast(ctxt, 'create_volumes', **msg_args)
+
     @rpc.assert_min_rpc_version('3.8')
     def validate_host_capacity(self, ctxt, backend, request_spec,
                                filter_properties=None):
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 from oslo_config import cfg
 
 from cinder import db
@@ -38,15 +40,39 @@ class VolumeNumberWeigher(weights.BaseHostWeigher):
     number and the weighing has the opposite effect of the default.
     """
 
+    _volume_numbers = None
+
     def weight_multiplier(self):
         """Override the weight multiplier."""
         return CONF.volume_number_multiplier
 
+    def weigh_objects(self, weighed_obj_list, weight_properties):
+        """Weigh the hosts counting the volumes of all of them at once.
+
+        Volumes in a pool are also counted for the backend that owns the pool,
+        the same way volume_data_get_for_host matches them.
+        """
+        context = weight_properties['context'].elevated()
+        self._volume_numbers = collections.defaultdict(int)
+        for host, count in db.volume_count_get_by_host(context).items():
+            if not host:
+                continue
+            self._volume_numbers[host] += count
+            backend = host.partition('#')[0]
+            if backend != host:
+                self._volume_numbers[backend] += count
+
+        return super(VolumeNumberWeigher, self).weigh_objects(
+            weighed_obj_list, weight_properties)
+
     def _weigh_object(self, host_state, weight_properties):
         """Less volume number weights win.
 
         We want spreading to be the default.
         """
+        if self._volume_numbers is not None:
+            return self._volume_numbers.get(host_state.host, 0)
+
         context = weight_properties['context']
         context = context.elevated()
         volume_number = db.volume_data_get_for_host(context=context,
@@ -76,6 +76,10 @@ class FakeLoggingVolumeDriver(lvm.LVMVolumeDriver):
     def ensure_export(self, context, volume):
         pass
 
+    @utils.trace_method
+    def ensure_exports(self, context, volumes):
+        return {}
+
     @utils.trace_method
     def create_export(self, context, volume, connector):
         pass
@@ -18,6 +18,10 @@
 Test suites for 'common' code used throughout the OpenStack HTTP API.
 """
 
+import base64
+import datetime
+import json
+
 import ddt
 import mock
 from testtools import matchers
@@ -25,9 +29,12 @@ import webob
 import webob.exc
 
 from oslo_config import cfg
+from six.moves import urllib
 
 from cinder.api import common
+from cinder.api import microversions as mv
 from cinder import test
+from cinder.tests.unit.api import fakes
 
 
 NS = "{http://docs.openstack.org/compute/api/v1.1}"
@@ -359,6 +366,100 @@ class TestCollectionLinks(test.TestCase):
                                  should_link_exist)
 
 
+@ddt.ddt
+class PageTokenTest(test.TestCase):
+    """Tests the page tokens of seek paginated listings."""
+
+    def setUp(self):
+        super(PageTokenTest, self).setUp()
+        self.item = {'id': 'fake_id', 'display_name': 'fake_name',
+                     'size': 1,
+                     'created_at': datetime.datetime(2018, 1, 2, 3, 4, 5)}
+
+    def test_from_item(self):
+        token = common.PageToken.from_item(self.item, ['display_name'],
+                                           ['asc'])
+        self.assertEqual(['display_name:asc'], token.sort)
+        self.assertEqual({'display_name': 'fake_name',
+                          'created_at': '2018-01-02T03:04:05',
+                          'id': 'fake_id'}, token.values)
+
+    def test_encode_decode(self):
+        token = common.PageToken.from_item(self.item, ['size', 'id'],
+                                           ['desc', 'asc'])
+        decoded = common.PageToken.decode(token.encode())
+        self.assertEqual(['size:desc', 'id:asc'], decoded.sort)
+        self.assertEqual(token.values, decoded.values)
+
+    @ddt.data('not base64', 'bm90IGpzb24=', 'eyJzb3J0IjogW119')
+    def test_decode_invalid(self, token):
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          common.PageToken.decode, token)
+
+    @ddt.data({'sort': 'id:asc', 'values': {'id': 'fake_id'}},
+              {'sort': ['id:asc'], 'values': ['fake_id']},
+              {'sort': ['id:asc'], 'values': {'id': ['fake_id']}},
+              {'sort': ['id:asc'], 'values': {'id': {'id': 'fake_id'}}},
+              {'sort': ['id:asc'], 'values': {'created_at': 'not a date'}},
+              {'sort': ['id:asc'], 'values': {'created_at': 1}})
+    def test_decode_invalid_values(self, data):
+        token = base64.urlsafe_b64encode(
+            json.dumps(data).encode()).decode('ascii')
+        self.assertRaises(webob.exc.HTTPBadRequest,
+                          common.PageToken.decode, token)
+
+    def test_get_page_token_without_token(self):
+        params = {'limit': '1'}
+        self.assertEqual(mock.sentinel.marker,
+                         common.get_page_token(params, mock.sentinel.marker,
+                                               ['id'], ['asc']))
+        self.assertEqual({'limit': '1'}, params)
+
+    def test_get_page_token(self):
+        token = common.PageToken.from_item(self.item, ['display_name'],
+                                           ['asc'])
+        params = {'page_token': token.encode()}
+        result = common.get_page_token(params, None, ['name'], ['asc'])
+        self.assertEqual({}, params)
+        self.assertEqual(token.values, result.values)
+
+    def test_get_page_token_with_marker(self):
+        token = common.PageToken.from_item(self.item, ['id'], ['asc'])
+        self.assertRaises(webob.exc.HTTPBadRequest, common.get_page_token,
+                          {'page_token': token.encode()}, 'fake_id', ['id'],
+                          ['asc'])
+
+    def test_get_page_token_different_sort(self):
+        token = common.PageToken.from_item(self.item, ['id'], ['asc'])
+        self.assertRaises(webob.exc.HTTPBadRequest, common.get_page_token,
+                          {'page_token': token.encode()}, None, ['id'],
+                          ['desc'])
+
+    @ddt.data((mv.PAGE_TOKEN, True),
+              (mv.get_prior_version(mv.PAGE_TOKEN), False))
+    @ddt.unpack
+    def test_next_link(self, version, use_token):
+        builder = common.ViewBuilder()
+        builder._page_token_version = mv.PAGE_TOKEN
+        req = fakes.HTTPRequest.blank(
+            '/v3/volumes?limit=1&sort=name:asc&marker=fake_marker',
+            version=version)
+
+        links = builder._get_collection_links(req, [self.item], 'volumes')
+
+        self.assertEqual(1, len(links))
+        query = urllib.parse.parse_qs(
+            urllib.parse.urlsplit(links[0]['href']).query)
+        if use_token:
+            self.assertNotIn('marker', query)
+            token = common.PageToken.decode(query['page_token'][0])
+            self.assertEqual(['display_name:asc'], token.sort)
+            self.assertEqual('fake_name', token.values['display_name'])
+        else:
+            self.assertNotIn('page_token', query)
+            self.assertEqual(['fake_id'], query['marker'])
+
+
 @ddt.ddt
 class GeneralFiltersTest(test.TestCase):
 
@@ -807,6 +807,20 @@ class VolumeApiTest(test.TestCase):
                           self.controller.update,
                           req, fake.VOLUME_ID, body=body)
 
+    def test_volume_list_summary_loads_summary_fields(self):
+        vol = utils.create_volume(self.ctxt, display_name='vol1',
+                                  metadata={'key': 'value'})
+
+        with mock.patch.object(db, 'volume_get_all_by_project',
+                               wraps=db.volume_get_all_by_project) as get_all:
+            req = fakes.HTTPRequest.blank('/v2/volumes')
+            res_dict = self.controller.index(req)
+
+        self.assertEqual(('id', 'display_name'),
+                         get_all.call_args[1]['fields'])
+        self.assertEqual([vol.id], [v['id'] for v in res_dict['volumes']])
+        self.assertEqual('vol1', res_dict['volumes'][0]['name'])
+
     def test_volume_list_summary(self):
         self.mock_object(volume_api.API, 'get_all',
                          v2_fakes.fake_volume_api_get_all_by_project)
@@ -903,7 +917,7 @@ class VolumeApiTest(test.TestCase):
                                            sort_keys=None, sort_dirs=None,
                                            filters=None,
                                            viewable_admin_meta=False,
-                                           offset=0):
+                                           offset=0, fields=None):
             return [
                 v2_fakes.create_fake_volume(fake.VOLUME_ID,
                                             display_name='vol1'),
@@ -1010,7 +1024,7 @@ class VolumeApiTest(test.TestCase):
                                            sort_keys=None, sort_dirs=None,
                                            filters=None,
                                            viewable_admin_meta=False,
-                                           offset=0):
+                                           offset=0, fields=None):
             return [
                 v2_fakes.create_fake_volume(fake.VOLUME_ID,
                                             display_name='vol1'),
@@ -1194,7 +1208,7 @@ class VolumeApiTest(test.TestCase):
                                            sort_keys=None, sort_dirs=None,
                                            filters=None,
                                            viewable_admin_meta=False,
-                                           offset=0):
+                                           offset=0, fields=None):
             self.assertTrue(filters['no_migration_targets'])
             self.assertNotIn('all_tenants', filters)
             return [v2_fakes.create_fake_volume(fake.VOLUME_ID,
@@ -1203,7 +1217,8 @@ class VolumeApiTest(test.TestCase):
         def fake_volume_get_all(context, marker, limit,
                                 sort_keys=None, sort_dirs=None,
                                 filters=None,
-                                viewable_admin_meta=False, offset=0):
+                                viewable_admin_meta=False, offset=0,
+                                fields=None):
             return []
         self.mock_object(db, 'volume_get_all_by_project',
                          fake_volume_get_all_by_project)
@@ -1222,7 +1237,7 @@ class VolumeApiTest(test.TestCase):
                                             sort_keys=None, sort_dirs=None,
                                             filters=None,
                                             viewable_admin_meta=False,
-                                            offset=0):
+                                            offset=0, fields=None):
             self.assertNotIn('no_migration_targets', filters)
             return [v2_fakes.create_fake_volume(fake.VOLUME_ID,
                                                 display_name='vol2')]
@@ -1230,7 +1245,8 @@ class VolumeApiTest(test.TestCase):
         def fake_volume_get_all2(context, marker, limit,
                                  sort_keys=None, sort_dirs=None,
                                  filters=None,
-                                 viewable_admin_meta=False, offset=0):
+                                 viewable_admin_meta=False, offset=0,
+                                 fields=None):
             return []
         self.mock_object(db, 'volume_get_all_by_project',
                          fake_volume_get_all_by_project2)
@@ -1247,13 +1263,14 @@ class VolumeApiTest(test.TestCase):
                                             sort_keys=None, sort_dirs=None,
                                             filters=None,
                                             viewable_admin_meta=False,
-                                            offset=0):
+                                            offset=0, fields=None):
             return []
 
         def fake_volume_get_all3(context, marker, limit,
                                  sort_keys=None, sort_dirs=None,
                                  filters=None,
-                                 viewable_admin_meta=False, offset=0):
+                                 viewable_admin_meta=False, offset=0,
+                                 fields=None):
             self.assertNotIn('no_migration_targets', filters)
             self.assertNotIn('all_tenants', filters)
             return [v2_fakes.create_fake_volume(fake.VOLUME3_ID,
@@ -1496,7 +1513,7 @@ class VolumeApiTest(test.TestCase):
             context, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'display_name': display_name},
-            viewable_admin_meta=True, offset=0)
+            viewable_admin_meta=True, offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_string(self, get_all):
@@ -1537,7 +1554,7 @@ class VolumeApiTest(test.TestCase):
             context, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'display_name': 'Volume-573108026', 'bootable': True},
-            viewable_admin_meta=True, offset=0)
+            viewable_admin_meta=True, offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_false(self, get_all):
@@ -1551,7 +1568,7 @@ class VolumeApiTest(test.TestCase):
             context, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'display_name': 'Volume-573108026', 'bootable': False},
-            viewable_admin_meta=True, offset=0)
+            viewable_admin_meta=True, offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_list(self, get_all):
@@ -1567,7 +1584,7 @@ class VolumeApiTest(test.TestCase):
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'id': [fake.VOLUME_ID, fake.VOLUME2_ID, fake.VOLUME3_ID]},
             viewable_admin_meta=True,
-            offset=0)
+            offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_expression(self, get_all):
@@ -1580,7 +1597,8 @@ class VolumeApiTest(test.TestCase):
         get_all.assert_called_once_with(
             context, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
-            filters={'display_name': 'd-'}, viewable_admin_meta=True, offset=0)
+            filters={'display_name': 'd-'}, viewable_admin_meta=True, offset=0,
+            fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_status(self, get_all):
@@ -1595,7 +1613,7 @@ class VolumeApiTest(test.TestCase):
             ctxt, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'status': 'available'}, viewable_admin_meta=True,
-            offset=0)
+            offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_metadata(self, get_all):
@@ -1610,7 +1628,7 @@ class VolumeApiTest(test.TestCase):
             ctxt, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'metadata': {'fake_key': 'fake_value'}},
-            viewable_admin_meta=True, offset=0)
+            viewable_admin_meta=True, offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_availability_zone(self, get_all):
@@ -1625,7 +1643,7 @@ class VolumeApiTest(test.TestCase):
             ctxt, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'availability_zone': 'nova'}, viewable_admin_meta=True,
-            offset=0)
+            offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_bootable(self, get_all):
@@ -1640,7 +1658,7 @@ class VolumeApiTest(test.TestCase):
             ctxt, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'bootable': True}, viewable_admin_meta=True,
-            offset=0)
+            offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_filter_with_invalid_filter(self, get_all):
@@ -1656,7 +1674,7 @@ class VolumeApiTest(test.TestCase):
             ctxt, None, CONF.osapi_max_limit,
             sort_keys=['created_at'], sort_dirs=['desc'],
             filters={'availability_zone': 'nova'}, viewable_admin_meta=True,
-            offset=0)
+            offset=0, fields=None)
 
     @mock.patch('cinder.volume.api.API.get_all')
     def test_get_volumes_sort_by_name(self, get_all):
@@ -1672,7 +1690,7 @@ class VolumeApiTest(test.TestCase):
         get_all.assert_called_once_with(
             ctxt, None, CONF.osapi_max_limit,
             sort_dirs=['desc'], viewable_admin_meta=True,
-            sort_keys=['display_name'], filters={}, offset=0)
+            sort_keys=['display_name'], filters={}, offset=0, fields=None)
 
     def test_get_volume_filter_options_using_config(self):
         filter_list = ['name', 'status', 'metadata', 'bootable',
@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import ddt
+import mock
+from oslo_serialization import jsonutils
+from six.moves import http_client
+import webob
+
+from cinder.api import microversions as mv
+from cinder.api.v3 import router as router_v3
+from cinder.common import constants
+from cinder import context
+from cinder import exception
+from cinder import objects
+from cinder import test
+from cinder.tests.unit.api import fakes
+from cinder.tests.unit import fake_constants as fake
+
+
+def app():
+    # no auth, just let environ['cinder.context'] pass through
+    api = router_v3.APIRouter()
+    mapper = fakes.urlmap.URLMap()
+    mapper['/v3'] = api
+    return mapper
+
+
+@ddt.ddt
+@mock.patch('cinder.volume.rpcapi.VolumeAPI.warm_image_cache')
+@mock.patch('cinder.image.glance.GlanceImageService.show')
+class ImageCacheTestCase(test.TestCase):
+    def setUp(self):
+        super(ImageCacheTestCase, self).setUp()
+        self.context = context.RequestContext(user_id=None,
+                                              project_id=fake.PROJECT_ID,
+                                              is_admin=True,
+                                              read_deleted='no',
+                                              overwrite=False)
+        self.service = objects.Service(self.context, id=1, host='host1@lvm',
+                                       binary=constants.VOLUME_BINARY,
+                                       disabled=False, cluster_name=None)
+        self.mock_object(objects.Service, 'get_by_id',
+                         return_value=self.service)
+        self.mock_object(objects.Service, 'is_up', True)
+
+    def _get_resp_post(self, body, version=mv.IMAGE_CACHE_WARM, ctxt=None):
+        """Helper to execute a POST image_cache/warm API call."""
+        req = webob.Request.blank('/v3/%s/image_cache/warm' %
+                                  fake.PROJECT_ID)
+        req.method = 'POST'
+        req.headers['Content-Type'] = 'application/json'
+        req.headers['OpenStack-API-Version'] = 'volume ' + version
+        req.environ['cinder.context'] = ctxt or self.context
+        req.body = jsonutils.dump_as_bytes(body)
+        return req.get_response(app())
+
+    def test_warm(self, mock_show, mock_warm):
+        res = self._get_resp_post({'image_id': fake.IMAGE_ID,
+                                   'host': 'host1@lvm#pool1'})
+
+        self.assertEqual(http_client.ACCEPTED, res.status_code)
+        mock_show.assert_called_once_with(mock.ANY, fake.IMAGE_ID)
+        objects.Service.get_by_id.assert_called_once_with(
+            mock.ANY, None, host='host1@lvm', binary=constants.VOLUME_BINARY,
+            cluster_name=None)
+        mock_warm.assert_called_once_with(mock.ANY, self.service,
+                                          fake.IMAGE_ID, 'pool1')
+
+    def test_warm_old_api_version(self, mock_show, mock_warm):
+        res = self._get_resp_post({'image_id': fake.IMAGE_ID,
+                                   'host': 'host1@lvm#pool1'},
+                                  mv.get_prior_version(mv.IMAGE_CACHE_WARM))
+        self.assertEqual(http_client.NOT_FOUND, res.status_code)
+        mock_warm.assert_not_called()
+
+    def test_warm_not_authorized(self, mock_show, mock_warm):
+        ctxt = context.RequestContext(user_id=None,
+                                      project_id=fake.PROJECT_ID,
+                                      is_admin=False,
+                                      read_deleted='no',
+                                      overwrite=False)
+        res = self._get_resp_post({'image_id': fake.IMAGE_ID,
+                                   'host': 'host1@lvm#pool1'}, ctxt=ctxt)
+        self.assertEqual(http_client.FORBIDDEN, res.status_code)
+        mock_warm.assert_not_called()
+
+    @ddt.data({'host': 'host1@lvm#pool1'},
+              {'image_id': 'not a uuid', 'host': 'host1@lvm#pool1'},
+              {'image_id': fake.IMAGE_ID},
+              {'image_id': fake.IMAGE_ID, 'host': 'host1@lvm#pool1',
+               'cluster': 'cluster@lvm#pool1'},
+              {'image_id': fake.IMAGE_ID, 'host': 'host1@lvm'},
+              {'image_id': fake.IMAGE_ID, 'host': 'host1@lvm#pool1',
+               'fake_key': 'value'})
+    def test_warm_wrong_param(self, body, mock_show, mock_warm):
+        res = self._get_resp_post(body)
+        self.assertEqual(http_client.BAD_REQUEST, res.status_code)
+        mock_warm.assert_not_called()
+
+    def test_warm_image_not_found(self, mock_show, mock_warm):
+        mock_show.side_effect = exception.ImageNotFound(
+            image_id=fake.IMAGE_ID)
+        res = self._get_resp_post({'image_id': fake.IMAGE_ID,
+                                   'host': 'host1@lvm#pool1'})
+        self.assertEqual(http_client.NOT_FOUND, res.status_code)
+        mock_warm.assert_not_called()
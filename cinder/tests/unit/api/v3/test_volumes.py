@@ -21,6 +21,7 @@ from oslo_utils import strutils
 from six.moves import http_client
 import webob
 
+from cinder.api import common
 from cinder.api import extensions
 from cinder.api import microversions as mv
 from cinder.api.v2.views.volumes import ViewBuilder
@@ -166,6 +167,37 @@ class VolumeApiTest(test.TestCase):
         self.assertEqual(1, len(volumes))
         self.assertEqual(vols[0].id, volumes[0]['id'])
 
+    @ddt.data('index', 'detail')
+    def test_volume_list_with_page_token(self, method):
+        for name in ('test2', 'test1', 'test3'):
+            db.volume_create(self.ctxt, {'display_name': name,
+                                         'project_id': fake.PROJECT_ID})
+        url = '/v3/volumes?limit=2&sort=name:desc'
+        names = []
+        while True:
+            req = fakes.HTTPRequest.blank(url, version=mv.PAGE_TOKEN)
+            req.environ['cinder.context'] = self.ctxt
+            res_dict = getattr(self.controller, method)(req)
+            names.extend(vol['name'] for vol in res_dict['volumes'])
+            links = res_dict.get('volumes_links')
+            if not links:
+                break
+            self.assertIn('page_token=', links[0]['href'])
+            self.assertNotIn('marker=', links[0]['href'])
+            url = '/v3/volumes?%s' % links[0]['href'].split('?', 1)[1]
+        self.assertEqual(['test3', 'test2', 'test1'], names)
+
+    def test_volume_list_page_token_sort_mismatch(self):
+        token = common.PageToken.from_item(
+            {'id': fake.VOLUME_ID, 'display_name': 'test1',
+             'created_at': '2018-01-01T00:00:00'}, ['display_name'], ['asc'])
+        req = fakes.HTTPRequest.blank(
+            '/v3/volumes?sort=name:desc&page_token=%s' % token.encode(),
+            version=mv.PAGE_TOKEN)
+        req.environ['cinder.context'] = self.ctxt
+        self.assertRaises(webob.exc.HTTPBadRequest, self.controller.index,
+                          req)
+
     @ddt.data('volumes', 'volumes/detail')
     def test_list_volume_with_count_param_version_not_matched(self, action):
         self._create_multiple_volumes_with_different_project()
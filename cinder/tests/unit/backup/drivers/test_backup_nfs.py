@@ -658,6 +658,39 @@ class BackupNFSSwiftBasedTestCase(test.TestCase):
             self.assertTrue(filecmp.cmp(self.volume_file.name,
                             restored_file.name))
 
+    def test_restore_sparse(self):
+        volume_id = fake.VOLUME_ID
+
+        self._create_backup_db_entry(volume_id=volume_id)
+        self.flags(backup_compression_algorithm='none')
+        self.flags(backup_sha_block_size_bytes=1024)
+        self.flags(backup_sparse_detection=True)
+        service = nfs.NFSBackupDriver(self.ctxt)
+        self.volume_file.seek(4 * 1024)
+        self.volume_file.write(b'\0' * 8 * 1024)
+        self.volume_file.flush()
+        self.volume_file.seek(0)
+        backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+
+        service.backup(backup, self.volume_file)
+
+        backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+        self.assertEqual(2, backup.object_count)
+        metadata = service._read_metadata(backup)
+        self.assertEqual(service.SPARSE_DRIVER_VERSION, metadata['version'])
+        self.assertEqual([[4 * 1024, 8 * 1024]], metadata['holes'])
+
+        with tempfile.NamedTemporaryFile() as restored_file:
+            restored_file.write(os.urandom(self.size_volume_file))
+            restored_file.flush()
+            restored_file.seek(0)
+            backup.status = objects.fields.BackupStatus.RESTORING
+            backup.save()
+            service.restore(backup, volume_id, restored_file)
+            restored_file.flush()
+            self.assertTrue(filecmp.cmp(self.volume_file.name,
+                            restored_file.name, shallow=False))
+
     def test_restore_bz2(self):
         self.thread_original_method = bz2.decompress
         volume_id = fake.VOLUME_ID
@@ -825,6 +858,57 @@ class BackupNFSSwiftBasedTestCase(test.TestCase):
             self.assertTrue(filecmp.cmp(self.volume_file.name,
                             restored_file.name))
 
+    def test_restore_delta_binary_sha256file(self):
+        volume_id = fake.VOLUME_ID
+
+        def _fake_generate_object_name_prefix(self, backup):
+            return 'volume_%s_backup_%s' % (backup['volume_id'], backup['id'])
+
+        self.mock_object(nfs.NFSBackupDriver,
+                         '_generate_object_name_prefix',
+                         _fake_generate_object_name_prefix)
+
+        self.flags(backup_file_size=(1024 * 8))
+        self.flags(backup_sha_block_size_bytes=1024)
+
+        container_name = self.temp_dir.replace(tempfile.gettempdir() + '/',
+                                               '', 1)
+        self._create_backup_db_entry(volume_id=volume_id,
+                                     container=container_name,
+                                     backup_id=fake.BACKUP_ID)
+        service = nfs.NFSBackupDriver(self.ctxt)
+        self.volume_file.seek(0)
+        backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+        # The parent uses the JSON format and the incremental the binary one.
+        service.backup(backup, self.volume_file)
+
+        self.volume_file.seek(16 * 1024)
+        self.volume_file.write(os.urandom(1024))
+
+        self.flags(backup_sha256file_format='binary')
+        service = nfs.NFSBackupDriver(self.ctxt)
+        self._create_backup_db_entry(
+            volume_id=volume_id,
+            status=objects.fields.BackupStatus.RESTORING,
+            container=container_name,
+            backup_id=fake.BACKUP2_ID,
+            parent_id=fake.BACKUP_ID)
+        self.volume_file.seek(0)
+        deltabackup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP2_ID)
+        service.backup(deltabackup, self.volume_file, True)
+        deltabackup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP2_ID)
+
+        self.assertEqual(1, deltabackup.object_count)
+        content1 = service._read_sha256file(backup)
+        content2 = service._read_sha256file(deltabackup)
+        self.assertNotIn('sha256s', content2)
+        self.assertEqual(len(content1['digests']), len(content2['digests']))
+
+        with tempfile.NamedTemporaryFile() as restored_file:
+            service.restore(deltabackup, volume_id, restored_file)
+            self.assertTrue(filecmp.cmp(self.volume_file.name,
+                            restored_file.name))
+
     def test_delete(self):
         volume_id = fake.VOLUME_ID
         self._create_backup_db_entry(volume_id=volume_id)
@@ -25,6 +25,7 @@ import os
 import shutil
 import tempfile
 import threading
+import time
 import zlib
 
 from eventlet import tpool
@@ -621,6 +622,49 @@ class BackupSwiftTestCase(test.TestCase):
         self.assertNotEqual(content1['sha256s'][16], content2['sha256s'][16])
         self.assertNotEqual(content1['sha256s'][20], content2['sha256s'][20])
 
+    def test_backup_concurrent_upload(self):
+        volume_id = '6d3c7d7a-0f0b-4b8c-9a3e-000000c1f6a2'
+        self.flags(backup_swift_object_size=8 * 1024)
+        self.flags(backup_swift_block_size=1024)
+        self.flags(backup_chunk_upload_concurrency=4)
+        self.mock_object(swift_dr.SwiftBackupDriver,
+                         '_generate_object_name_prefix',
+                         lambda self, backup: 'volume_%s' % volume_id)
+        container_name = self.temp_dir.replace(tempfile.gettempdir() + '/',
+                                               '', 1)
+        self._create_backup_db_entry(volume_id=volume_id,
+                                     container=container_name)
+        self.mock_object(swift, 'Connection',
+                         fake_swift_client2.FakeSwiftClient2.Connection)
+        conns_in_use = set()
+        overlaps = []
+        lock = threading.Lock()
+        put_object = fake_swift_client2.FakeSwiftConnection2.put_object
+
+        def fake_put_object(conn, *args, **kwargs):
+            with lock:
+                if conn in conns_in_use:
+                    overlaps.append(conn)
+                conns_in_use.add(conn)
+            try:
+                # Give the other writers time to use the connection.
+                time.sleep(0.01)
+                return put_object(conn, *args, **kwargs)
+            finally:
+                with lock:
+                    conns_in_use.discard(conn)
+
+        self.mock_object(fake_swift_client2.FakeSwiftConnection2,
+                         'put_object', fake_put_object)
+        service = swift_dr.SwiftBackupDriver(self.ctxt)
+        self.volume_file.seek(0)
+        backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+        service.backup(backup, self.volume_file)
+
+        self.assertEqual([], overlaps)
+        self.assertNotIn(service.conn, service._object_conns)
+        self.assertLessEqual(len(service._object_conns), 4)
+
     def test_create_backup_put_object_wraps_socket_error(self):
         volume_id = 'c09b1ad4-5f0e-4d3f-8b9e-0000004caec8'
         container_name = 'socket_error_on_put'
@@ -758,6 +802,56 @@ class BackupSwiftTestCase(test.TestCase):
             self.assertTrue(filecmp.cmp(self.volume_file.name,
                             restored_file.name))
 
+    def test_restore_prefetch(self):
+        volume_id = '3a9d1f4e-8c2b-4e0a-b7d5-0000002e9c41'
+        self.flags(backup_swift_object_size=8 * 1024)
+        self.flags(backup_swift_block_size=1024)
+        self.flags(backup_restore_prefetch_objects=3)
+        self.mock_object(swift_dr.SwiftBackupDriver,
+                         '_generate_object_name_prefix',
+                         lambda self, backup: 'volume_%s' % volume_id)
+        container_name = self.temp_dir.replace(tempfile.gettempdir() + '/',
+                                               '', 1)
+        self._create_backup_db_entry(volume_id=volume_id,
+                                     container=container_name)
+        self.mock_object(swift, 'Connection',
+                         fake_swift_client2.FakeSwiftClient2.Connection)
+        service = swift_dr.SwiftBackupDriver(self.ctxt)
+        self.volume_file.seek(0)
+        backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+        service.backup(backup, self.volume_file)
+
+        conns_in_use = set()
+        overlaps = []
+        lock = threading.Lock()
+        get_object = fake_swift_client2.FakeSwiftConnection2.get_object
+
+        def fake_get_object(conn, *args, **kwargs):
+            with lock:
+                if conn in conns_in_use:
+                    overlaps.append(conn)
+                conns_in_use.add(conn)
+            try:
+                # Give the other readers time to use the connection.
+                time.sleep(0.01)
+                return get_object(conn, *args, **kwargs)
+            finally:
+                with lock:
+                    conns_in_use.discard(conn)
+
+        self.mock_object(fake_swift_client2.FakeSwiftConnection2,
+                         'get_object', fake_get_object)
+        with tempfile.NamedTemporaryFile() as restored_file:
+            backup = objects.Backup.get_by_id(self.ctxt, fake.BACKUP_ID)
+            backup.status = objects.fields.BackupStatus.RESTORING
+            backup.save()
+            service.restore(backup, volume_id, restored_file)
+            self.assertTrue(filecmp.cmp(self.volume_file.name,
+                                        restored_file.name))
+
+        self.assertEqual([], overlaps)
+        self.assertNotIn(service.conn, service._object_conns)
+
     def test_restore_wraps_socket_error(self):
         volume_id = 'c1160de7-2774-4f20-bf14-0000001ac139'
         container_name = 'socket_error_on_get'
@@ -13,7 +13,10 @@
 #    under the License.
 """Tests for the base chunkedbackupdriver class."""
 
+import binascii
+import hashlib
 import json
+import os
 import uuid
 
 import mock
@@ -31,6 +34,7 @@ from cinder import test
 CONF = cfg.CONF
 
 TEST_DATA = ('abcdefhijklmnopqrstuvwxyz' * 10).encode('utf-8')
+TEST_SHA = hashlib.sha256(TEST_DATA).hexdigest()
 
 
 class ConcreteChunkedDriver(cbd.ChunkedBackupDriver):
@@ -94,11 +98,11 @@ class TestObjectReader(object):
         metadata['volume_id'] = 'volumeid'
         metadata['backup_name'] = 'backup_name'
         metadata['backup_description'] = 'backup_description'
-        metadata['objects'] = ['obj1']
+        metadata['objects'] = [{'obj1': {'offset': 0, 'length': 1}}]
         metadata['parent_id'] = 'parent_id'
         metadata['extra_metadata'] = 'extra_metadata'
         metadata['chunk_size'] = 1
-        metadata['sha256s'] = ['sha']
+        metadata['sha256s'] = [TEST_SHA]
         metadata['volume_meta'] = json.dumps(metadata)
         metadata['version'] = '1.0.0'
         self.metadata = metadata
@@ -208,6 +212,61 @@ class ChunkedDriverTestCase(test.TestCase):
         for algo in ['bz2', 'bzip2']:
             self.assertTrue('bz' in str(self.driver._get_compressor(algo)))
 
+    def test_get_compressor_zstd(self):
+        self.override_config('backup_compression_level', 7)
+        mock_zstd = mock.Mock()
+        mock_zstd.ZstdCompressor.return_value.compress.return_value = (
+            b'compressed')
+        with mock.patch.dict('sys.modules', {'zstandard': mock_zstd}):
+            compressor = self.driver._get_compressor('zstd')
+
+        self.assertEqual(b'compressed', compressor.compress(b'data'))
+        mock_zstd.ZstdCompressor.assert_called_once_with(level=7)
+        mock_zstd.ZstdCompressor.return_value.compress.assert_called_once_with(
+            b'data')
+        compressor.decompress(b'compressed')
+        mock_zstd.ZstdDecompressor.return_value.decompress.\
+            assert_called_once_with(b'compressed')
+
+    def test_get_compressor_lz4(self):
+        mock_lz4 = mock.Mock()
+        with mock.patch.dict('sys.modules', {'lz4': mock_lz4,
+                                             'lz4.frame': mock_lz4.frame}):
+            compressor = self.driver._get_compressor('lz4')
+
+        compressor.compress(b'data')
+        mock_lz4.frame.compress.assert_called_once_with(b'data')
+        compressor.decompress(b'compressed')
+        mock_lz4.frame.decompress.assert_called_once_with(b'compressed')
+
+    def test_get_compressor_missing_library(self):
+        with mock.patch.dict('sys.modules', {'zstandard': None}):
+            self.assertRaises(ValueError, self.driver._get_compressor, 'zstd')
+
+    def test_prepare_output_data_adaptive_incompressible(self):
+        self.driver.compressor = self.driver._get_compressor('zlib')
+        self.driver.adaptive_compression = True
+        data = os.urandom(cbd.ADAPTIVE_COMPRESSION_SAMPLE_SIZE) + (
+            b'\0' * cbd.ADAPTIVE_COMPRESSION_SAMPLE_SIZE)
+
+        with mock.patch.object(self.driver.compressor, 'compress',
+                               wraps=self.driver.compressor.compress) as comp:
+            self.assertEqual(('none', data),
+                             self.driver._prepare_output_data(data))
+
+        comp.assert_called_once_with(
+            data[:cbd.ADAPTIVE_COMPRESSION_SAMPLE_SIZE])
+
+    def test_prepare_output_data_adaptive_compressible(self):
+        self.driver.compressor = self.driver._get_compressor('zlib')
+        self.driver.adaptive_compression = True
+        data = b'\0' * 2 * cbd.ADAPTIVE_COMPRESSION_SAMPLE_SIZE
+
+        algorithm, output = self.driver._prepare_output_data(data)
+
+        self.assertEqual('zlib', algorithm)
+        self.assertEqual(data, self.driver.compressor.decompress(output))
+
     def test_get_compressor_invalid(self):
         self.assertRaises(ValueError, self.driver._get_compressor, 'winzip')
 
@@ -272,7 +331,7 @@ class ChunkedDriverTestCase(test.TestCase):
         with mock.patch.object(self.driver, 'get_object_writer',
                                return_value=obj_writer):
             self.driver._write_sha256file(self.backup, 'volid', 'contain_name',
-                                          ['sha'])
+                                          [binascii.unhexlify(TEST_SHA)])
 
             self.assertIsNotNone(obj_writer.written_data)
             written_data = obj_writer.written_data.decode('utf-8')
@@ -287,7 +346,7 @@ class ChunkedDriverTestCase(test.TestCase):
                              metadata.get('backup_description'))
             self.assertEqual(self.driver.sha_block_size_bytes,
                              metadata.get('chunk_size'))
-            self.assertEqual(['sha'], metadata.get('sha256s'))
+            self.assertEqual([TEST_SHA], metadata.get('sha256s'))
 
     def test_read_metadata(self):
         obj_reader = TestObjectReader('', '')
@@ -325,6 +384,46 @@ class ChunkedDriverTestCase(test.TestCase):
                              metadata['backup_description'])
             self.assertEqual(expected['chunk_size'], metadata['chunk_size'])
             self.assertEqual(expected['sha256s'], metadata['sha256s'])
+            self.assertEqual(binascii.unhexlify(TEST_SHA),
+                             metadata['digests'])
+
+    def test_write_read_sha256file_binary(self):
+        self.driver.sha256file_format = 'binary'
+        digests = [hashlib.sha256(b'a').digest() +
+                   hashlib.sha256(b'b').digest(),
+                   hashlib.sha256(b'\n').digest()]
+        obj_writer = TestObjectWriter('', '')
+        with mock.patch.object(self.driver, 'get_object_writer',
+                               return_value=obj_writer):
+            self.driver._write_sha256file(self.backup, 'volid',
+                                          'contain_name', digests)
+
+        self.assertTrue(obj_writer.written_data.startswith(
+            cbd.SHA256FILE_BINARY_MAGIC))
+        self.assertTrue(obj_writer.written_data.endswith(b''.join(digests)))
+        obj_reader = mock.MagicMock()
+        obj_reader.__enter__.return_value = obj_reader
+        obj_reader.read.return_value = obj_writer.written_data
+        with mock.patch.object(self.driver, 'get_object_reader',
+                               return_value=obj_reader):
+            sha256file = self.driver._read_sha256file(self.backup)
+
+        self.assertEqual(self.driver.DRIVER_VERSION, sha256file['version'])
+        self.assertEqual(self.backup.id, sha256file['backup_id'])
+        self.assertEqual('volid', sha256file['volume_id'])
+        self.assertEqual(self.driver.sha_block_size_bytes,
+                         sha256file['chunk_size'])
+        self.assertEqual(b''.join(digests), sha256file['digests'])
+        self.assertNotIn('sha256s', sha256file)
+
+    def test_calculate_sha(self):
+        self.driver.sha_block_size_bytes = 100
+
+        digests = self.driver._calculate_sha(TEST_DATA)
+
+        self.assertEqual(b''.join(hashlib.sha256(TEST_DATA[i:i + 100]).digest()
+                                  for i in (0, 100, 200)),
+                         digests)
 
     def test_prepare_backup(self):
         (object_meta, object_sha256, extra_metadata, container,
@@ -444,6 +543,57 @@ class ChunkedDriverTestCase(test.TestCase):
         self.assert_notify_called(mock_notify,
                                   (['INFO', 'backup.createprogress'],))
 
+    @mock.patch('cinder.tests.unit.fake_notifier.FakeNotifier._notify')
+    def test_backup_concurrent_uploads(self, mock_notify):
+        self.driver.chunk_upload_concurrency = 2
+        volume_file = mock.Mock()
+        volume_file.tell.side_effect = [0, 1, 2, 3]
+        volume_file.read.side_effect = [b'a', b'b', b'c', b'']
+        writers = {}
+
+        def _get_writer(container, object_name, extra_metadata=None):
+            writers[object_name] = TestObjectWriter(container, object_name,
+                                                    extra_metadata)
+            return writers[object_name]
+
+        with mock.patch.object(self.driver, 'get_object_writer',
+                               side_effect=_get_writer), \
+                mock.patch.object(self.driver, '_finalize_backup') as fin:
+            self.driver.backup(self.backup, volume_file,
+                               backup_metadata=False)
+
+        object_meta = fin.call_args[0][2]
+        names = [list(obj.keys())[0] for obj in object_meta['list']]
+        self.assertEqual(['test--00001', 'test--00002', 'test--00003'], names)
+        for offset, (name, data) in enumerate(zip(names, (b'a', b'b', b'c'))):
+            obj = object_meta['list'][offset][name]
+            self.assertEqual(offset, obj['offset'])
+            self.assertEqual('none', obj['compression'])
+            self.assertIn('md5', obj)
+            self.assertEqual(data, writers[name].written_data)
+
+    def test_backup_upload_failure_waits_for_pending(self):
+        self.driver.chunk_upload_concurrency = 2
+        volume_file = mock.Mock()
+        volume_file.tell.side_effect = [0, 1, 2]
+        volume_file.read.side_effect = [b'a', b'b', b'']
+        done = []
+
+        def _write_chunk(container, object_name, obj, data, extra_metadata):
+            if data == b'a':
+                raise exception.BackupOperationError('fail')
+            done.append(object_name)
+
+        with mock.patch.object(self.driver, '_write_chunk',
+                               side_effect=_write_chunk), \
+                mock.patch.object(self.driver, '_finalize_backup') as fin:
+            self.assertRaises(exception.BackupOperationError,
+                              self.driver.backup, self.backup, volume_file,
+                              backup_metadata=False)
+
+        self.assertEqual(['test--00002'], done)
+        fin.assert_not_called()
+
     def test_backup_invalid_size(self):
         self.driver.chunk_size_bytes = 999
         self.driver.sha_block_size_bytes = 1024
@@ -467,6 +617,172 @@ class ChunkedDriverTestCase(test.TestCase):
 
         restore_test.assert_called()
 
+    def test_get_restore_extents(self):
+        def _metadata(*objs):
+            return {'objects': [{name: {'offset': offset, 'length': length}}
+                                for name, offset, length in objs]}
+
+        full = _metadata(('full1', 0, 8), ('full2', 8, 8), ('full3', 16, 8))
+        full['holes'] = [[24, 8]]
+        incr1 = _metadata(('incr1-1', 2, 4), ('incr1-2', 8, 8),
+                          ('incr1-3', 26, 2))
+        incr2 = _metadata(('incr2-1', 4, 4), ('incr2-2', 20, 2))
+        incr2['holes'] = [[12, 2]]
+
+        extents = self.driver._get_restore_extents([full, incr1, incr2])
+
+        self.assertEqual([({'full1': [(0, 2)],
+                            'full3': [(16, 20), (22, 24)]},
+                           [(24, 26), (28, 32)]),
+                          ({'incr1-1': [(2, 4)],
+                            'incr1-2': [(8, 12), (14, 16)],
+                            'incr1-3': [(26, 28)]},
+                           []),
+                          ({'incr2-1': [(4, 8)],
+                            'incr2-2': [(20, 22)]},
+                           [(12, 14)])],
+                         extents)
+
+    def test_get_chunk_extents(self):
+        self.driver.sha_block_size_bytes = 2
+        self.driver.sparse_detection = True
+        zero = self.driver._get_zero_sha(2)
+        a, b, c, x, y = (hashlib.sha256(v).digest()
+                         for v in (b'a', b'b', b'c', b'x', b'y'))
+        digests = b''.join((a, zero, zero, b, c,
+                            self.driver._get_zero_sha(1)))
+        parent_digests = b''.join((a, x, zero, y, c,
+                                   self.driver._get_zero_sha(1)))
+
+        self.assertEqual([(False, 0, 2), (True, 2, 6), (False, 6, 10),
+                          (True, 10, 11)],
+                         self.driver._get_chunk_extents(digests, None, 11))
+        self.assertEqual([(True, 2, 4), (False, 6, 8)],
+                         self.driver._get_chunk_extents(
+                             digests, parent_digests, 11))
+        self.assertEqual([],
+                         self.driver._get_chunk_extents(
+                             digests, memoryview(digests), 11))
+
+        self.driver.sparse_detection = False
+        self.assertEqual([(False, 0, 11)],
+                         self.driver._get_chunk_extents(digests, None, 11))
+
+    def test_add_hole(self):
+        object_meta = {}
+        self.driver._add_hole(object_meta, 4, 4)
+        self.driver._add_hole(object_meta, 8, 2)
+        self.driver._add_hole(object_meta, 16, 2)
+
+        self.assertEqual([[4, 6], [16, 2]], object_meta['holes'])
+
+    @mock.patch('cinder.volume.utils.punch_hole')
+    def test_restore_hole(self, mock_punch):
+        volume_file = mock.Mock()
+        volume_file.fileno.return_value = 42
+
+        self.driver._restore_hole(volume_file, 4, 12)
+
+        mock_punch.assert_called_once_with(42, 4, 8)
+        volume_file.write.assert_not_called()
+
+    @mock.patch('cinder.volume.utils.punch_hole',
+                side_effect=OSError(95, 'Operation not supported'))
+    def test_restore_hole_write_zeros(self, mock_punch):
+        self.driver.sha_block_size_bytes = 3
+        volume_file = mock.Mock()
+
+        self.driver._restore_hole(volume_file, 4, 12)
+
+        volume_file.seek.assert_called_once_with(4)
+        self.assertEqual([mock.call(b'\0' * 3), mock.call(b'\0' * 3),
+                          mock.call(b'\0' * 2)],
+                         volume_file.write.call_args_list)
+
+    def test_restore_v1_extents(self):
+        self.backup.status = fields.BackupStatus.RESTORING
+        self.backup.save()
+        metadata = {'objects': [
+            {'obj1': {'offset': 0, 'length': 4, 'compression': 'none'}},
+            {'obj2': {'offset': 4, 'length': 4, 'compression': 'none'}},
+            {'obj3': {'offset': 8, 'length': 4, 'compression': 'none'}}]}
+        readers = {'obj1': b'abcd', 'obj2': b'efgh', 'obj3': b'ijkl'}
+        reader = mock.MagicMock()
+        reader.__enter__.return_value = reader
+        volume_file = mock.Mock()
+        volume_file.fileno.side_effect = IOError
+
+        def _get_reader(container, object_name, extra_metadata=None):
+            reader.read.return_value = readers[object_name]
+            return reader
+
+        with mock.patch.object(self.driver, '_generate_object_names',
+                               return_value=list(readers)), \
+                mock.patch.object(self.driver, 'get_object_reader',
+                                  side_effect=_get_reader) as mock_reader:
+            self.driver._restore_v1(self.backup, self.volume, metadata,
+                                    volume_file, self.backup,
+                                    extents={'obj1': [(0, 4)],
+                                             'obj3': [(8, 9), (11, 12)]})
+
+        self.assertEqual(['obj1', 'obj3'],
+                         [c[0][1] for c in mock_reader.call_args_list])
+        self.assertEqual([mock.call(0), mock.call(8), mock.call(11)],
+                         volume_file.seek.call_args_list)
+        self.assertEqual([b'abcd', b'i', b'l'],
+                         [bytes(c[0][0])
+                          for c in volume_file.write.call_args_list])
+
+    @mock.patch('os.fsync')
+    def test_restore_v1_prefetch(self, mock_fsync):
+        self.backup.status = fields.BackupStatus.RESTORING
+        self.backup.save()
+        self.driver.restore_prefetch_objects = 2
+        self.driver.restore_fsync_interval_bytes = 8
+        names = ['obj%d' % i for i in range(5)]
+        metadata = {'objects': [
+            {name: {'offset': i * 4, 'length': 4, 'compression': 'none'}}
+            for i, name in enumerate(names)]}
+        volume_file = mock.Mock()
+
+        with mock.patch.object(self.driver, '_generate_object_names',
+                               return_value=names), \
+                mock.patch.object(self.driver, '_read_object_data',
+                                  side_effect=lambda c, name, *a:
+                                  name.encode('utf-8')) as mock_read:
+            self.driver._restore_v1(self.backup, self.volume, metadata,
+                                    volume_file, self.backup)
+
+        self.assertEqual(names, [c[0][1] for c in mock_read.call_args_list])
+        self.assertEqual([mock.call(name.encode('utf-8')) for name in names],
+                         volume_file.write.call_args_list)
+        self.assertEqual([mock.call(i * 4) for i in range(5)],
+                         volume_file.seek.call_args_list)
+        # Synced every 8 bytes and once more for the last object.
+        self.assertEqual(3, mock_fsync.call_count)
+
+    def test_restore_v1_prefetch_cancel(self):
+        self.backup.status = fields.BackupStatus.AVAILABLE
+        self.backup.save()
+        self.driver.restore_prefetch_objects = 2
+        names = ['obj%d' % i for i in range(5)]
+        metadata = {'objects': [
+            {name: {'offset': i * 4, 'length': 4, 'compression': 'none'}}
+            for i, name in enumerate(names)]}
+        volume_file = mock.Mock()
+
+        with mock.patch.object(self.driver, '_generate_object_names',
+                               return_value=names), \
+                mock.patch.object(self.driver, '_read_object_data',
+                                  return_value=b'data') as mock_read:
+            self.assertRaises(exception.BackupRestoreCancel,
+                              self.driver._restore_v1, self.backup,
+                              self.volume, metadata, volume_file,
+                              self.backup)
+
+        self.assertEqual(3, mock_read.call_count)
+        volume_file.write.assert_not_called()
+
     def test_delete_backup(self):
         with mock.patch.object(self.driver, 'delete_object') as mock_delete:
             self.driver.delete_backup(self.backup)
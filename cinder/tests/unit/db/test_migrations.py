@@ -409,6 +409,21 @@ class MigrationsMixin(test_migrations.WalkVersionsMixin):
         volume_transfer = db_utils.get_table(engine, 'transfers')
         self.assertIn('no_snapshots', volume_transfer.c)
 
+    def _check_127(self, engine, data):
+        entries = db_utils.get_table(engine, 'image_volume_cache_entries')
+        self.assertIsInstance(entries.c.hit_count.type,
+                              self.INTEGER_TYPE)
+
+    def _check_128(self, engine, data):
+        for table_name in ('volumes', 'snapshots', 'backups'):
+            table = db_utils.get_table(engine, table_name)
+            indexes = {idx.name: idx.columns.keys() for idx in table.indexes}
+            self.assertEqual(
+                ['project_id', 'deleted', 'created_at', 'id'],
+                indexes['%s_project_deleted_created_idx' % table_name])
+            self.assertEqual(['deleted', 'created_at', 'id'],
+                             indexes['%s_deleted_created_idx' % table_name])
+
     def test_walk_versions(self):
         self.walk_versions(False, False)
         self.assert_each_foreign_key_is_part_of_an_index()
@@ -18,6 +18,8 @@
 import datetime
 import uuid
 
+import mock
+
 from oslo_db import exception as db_exc
 from oslo_utils import timeutils
 from sqlalchemy.dialects import sqlite
@@ -354,6 +356,34 @@ class PurgeDeletedTest(test.TestCase):
         self.assertEqual(4, vol_glance_meta_rows)
         self.assertEqual(4, qos_rows)
 
+    @mock.patch('time.sleep')
+    def test_purge_deleted_rows_in_batches(self, mock_sleep):
+        dialect = self.engine.url.get_dialect()
+        if dialect == sqlite.dialect:
+            import sqlite3
+            tup = sqlite3.sqlite_version_info
+            if tup[0] > 3 or (tup[0] == 3 and tup[1] >= 7):
+                self.conn.execute("PRAGMA foreign_keys = ON")
+        # Purge at 10 days old in batches of 1 row
+        purged = db.purge_deleted_rows(self.context, age_in_days=10,
+                                       batch_size=1, sleep=0.5)
+
+        self.assertEqual(2, self.session.query(self.volumes).count())
+        self.assertEqual(2, self.session.query(self.vm).count())
+        self.assertEqual(4, self.session.query(self.qos).count())
+        self.assertEqual(4, purged['volumes'])
+        self.assertEqual(4, purged['volume_metadata'])
+        self.assertEqual(8, purged['quality_of_service_specs'])
+        mock_sleep.assert_any_call(0.5)
+
+    def test_purge_deleted_rows_dry_run(self):
+        purged = db.purge_deleted_rows(self.context, age_in_days=10,
+                                       dry_run=True)
+
+        self.assertEqual(6, self.session.query(self.volumes).count())
+        self.assertEqual(4, purged['volumes'])
+        self.assertEqual(8, purged['quality_of_service_specs'])
+
     def test_purge_deleted_rows_bad_args(self):
         # Test with no age argument
         self.assertRaises(TypeError, db.purge_deleted_rows, self.context)
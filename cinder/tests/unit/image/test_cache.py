@@ -42,15 +42,16 @@ class ImageVolumeCacheTestCase(test.TestCase):
         self.volume.update(vol_params)
         self.volume_ovo = objects.Volume(self.context, **vol_params)
 
-    def _build_cache(self, max_gb=0, max_count=0):
+    def _build_cache(self, max_gb=0, max_count=0, eviction_policy='lru'):
         cache = image_cache.ImageVolumeCache(self.mock_db,
                                              self.mock_volume_api,
                                              max_gb,
-                                             max_count)
+                                             max_count,
+                                             eviction_policy)
         cache.notifier = self.notifier
         return cache
 
-    def _build_entry(self, size=10):
+    def _build_entry(self, size=10, hit_count=0):
         entry = {
             'id': 1,
             'host': 'test@foo#bar',
@@ -59,7 +60,8 @@ class ImageVolumeCacheTestCase(test.TestCase):
             'image_updated_at': timeutils.utcnow(with_timezone=True),
             'volume_id': '70a599e0-31e7-49b7-b260-868f441e862b',
             'size': size,
-            'last_used': timeutils.utcnow(with_timezone=True)
+            'last_used': timeutils.utcnow(with_timezone=True),
+            'hit_count': hit_count,
         }
         return entry
 
@@ -294,6 +296,41 @@ class ImageVolumeCacheTestCase(test.TestCase):
         mock_delete.assert_any_call(self.context, entry2)
         mock_delete.assert_any_call(self.context, entry3)
 
+    def test_ensure_space_lfu(self):
+        cache = self._build_cache(max_gb=0, max_count=2,
+                                  eviction_policy='lfu')
+        mock_delete = mock.patch.object(cache, '_delete_image_volume').start()
+
+        entry1 = self._build_entry(size=10, hit_count=1)
+        entry2 = self._build_entry(size=10, hit_count=5)
+        entry3 = self._build_entry(size=10, hit_count=3)
+        self.mock_db.image_volume_cache_get_all.return_value = [
+            entry1, entry2, entry3]
+
+        self.volume_ovo.size = 10
+        has_space = cache.ensure_space(self.context, self.volume_ovo)
+        self.assertTrue(has_space)
+        self.assertEqual([mock.call(self.context, entry1),
+                          mock.call(self.context, entry3)],
+                         mock_delete.call_args_list)
+
+    def test_ensure_space_size(self):
+        cache = self._build_cache(max_gb=30, max_count=0,
+                                  eviction_policy='size')
+        mock_delete = mock.patch.object(cache, '_delete_image_volume').start()
+
+        # 0.5, 0.2 and 0.8 hits per GB
+        entry1 = self._build_entry(size=10, hit_count=5)
+        entry2 = self._build_entry(size=10, hit_count=2)
+        entry3 = self._build_entry(size=5, hit_count=4)
+        self.mock_db.image_volume_cache_get_all.return_value = [
+            entry1, entry2, entry3]
+
+        self.volume_ovo.size = 15
+        has_space = cache.ensure_space(self.context, self.volume_ovo)
+        self.assertTrue(has_space)
+        mock_delete.assert_called_once_with(self.context, entry2)
+
     def test_ensure_space_cant_free_enough_gb(self):
         cache = self._build_cache(max_gb=30, max_count=10)
         mock_delete = mock.patch.object(cache, '_delete_image_volume').start()
@@ -743,6 +743,37 @@ class TestGlanceImageService(test.TestCase):
         self.service.download(self.context, image_id, writer)
         self.assertIsNone(mock_copyfileobj.call_args)
 
+    def test_download_range(self):
+        client = mock.Mock()
+        client.http_client.get.return_value = (
+            mock.Mock(status_code=206), mock.sentinel.body)
+        service = self._create_image_service(client)
+
+        body = service.download_range(self.context, 'image-id', 1024, 512)
+
+        self.assertEqual(mock.sentinel.body, body)
+        client.http_client.get.assert_called_once_with(
+            '/v2/images/image-id/file', headers={'Range': 'bytes=1024-1535'})
+
+    def test_download_range_not_supported(self):
+        client = mock.Mock()
+        resp = mock.Mock(status_code=200)
+        client.http_client.get.return_value = (resp, mock.sentinel.body)
+        service = self._create_image_service(client)
+
+        body = service.download_range(self.context, 'image-id', 0, 512)
+
+        self.assertIsNone(body)
+        resp.close.assert_called_once_with()
+
+    def test_download_range_notfound(self):
+        client = mock.Mock()
+        client.http_client.get.side_effect = glanceclient.exc.HTTPNotFound
+        service = self._create_image_service(client)
+
+        self.assertRaises(exception.ImageNotFound, service.download_range,
+                          self.context, 'image-id', 0, 512)
+
     def test_glance_client_image_id(self):
         fixture = self._make_fixture(name='test image')
         image_id = self.service.create(self.context, fixture)['id']
@@ -598,6 +598,25 @@ class TestVolumeList(test_objects.BaseObjectsTestCase):
         self.assertEqual(1, len(volumes))
         TestVolume._compare(self, db_volume, volumes[0])
 
+    @mock.patch('cinder.db.volume_get_all_by_project')
+    def test_get_all_by_project_fields(self, get_all_by_project):
+        db_volume = fake_volume.fake_db_volume(
+            volume_metadata=[{'key': 'foo', 'value': 'bar'}])
+        get_all_by_project.return_value = [db_volume]
+        fields = ('id', 'display_name', 'metadata')
+
+        volumes = objects.VolumeList.get_all_by_project(
+            self.context, self.context.project_id, fields=fields)
+
+        get_all_by_project.assert_called_once_with(
+            self.context, self.context.project_id, None, None,
+            sort_keys=None, sort_dirs=None, filters=None, offset=None,
+            fields=fields)
+        self.assertEqual(db_volume['display_name'], volumes[0].display_name)
+        self.assertEqual({'foo': 'bar'}, volumes[0].metadata)
+        self.assertFalse(volumes[0].obj_attr_is_set('size'))
+        self.assertFalse(volumes[0].obj_attr_is_set('volume_type'))
+
     @mock.patch('cinder.db.volume_get_all_by_host')
     def test_get_by_host(self, get_all_by_host):
         db_volume = fake_volume.fake_db_volume()
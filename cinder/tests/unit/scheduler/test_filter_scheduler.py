@@ -144,7 +144,7 @@ class FilterSchedulerTestCase(test_scheduler.SchedulerTestCase):
         # a non-admin context.  DB actions should work.
         self.was_admin = False
 
-        def fake_get(ctxt):
+        def fake_get(ctxt, filter_properties=None):
             # Make sure this is called with admin context, even though
             # we're using user context below.
             self.was_admin = ctxt.is_admin
@@ -184,6 +184,89 @@ class FilterSchedulerTestCase(test_scheduler.SchedulerTestCase):
         self.assertIsNotNone(weighed_host.obj)
         self.assertTrue(_mock_service_get_all.called)
 
+    def _schedule_create_volumes(self, _mock_service_get_all, sizes):
+        sched = fakes.FakeFilterScheduler()
+        sched.host_manager = fakes.FakeHostManager()
+        sched.volume_rpcapi = mock.Mock()
+        # Leave two backends of the same size to place the volumes on
+        for host, state in sched.host_manager.service_states.items():
+            state.update(total_capacity_gb=1000, reserved_percentage=0,
+                         thin_provisioning_support=False,
+                         free_capacity_gb=(1000 if host in ('host1', 'host2')
+                                           else 0))
+        fakes.mock_host_manager_db_calls(_mock_service_get_all)
+        fake_context = context.RequestContext('user', 'project',
+                                              is_admin=True)
+        volume_ids = [fake.VOLUME_ID, fake.VOLUME2_ID, fake.VOLUME3_ID,
+                      fake.VOLUME4_ID]
+        request_spec_list = [
+            objects.RequestSpec.from_primitives(
+                {'volume_id': volume_id,
+                 'volume_type': {'name': 'LVM_iSCSI'},
+                 'volume_properties': {'project_id': 1,
+                                       'availability_zone': 'zone1',
+                                       'size': size}})
+            for volume_id, size in zip(volume_ids, sizes)]
+        filter_properties_list = [{} for size in sizes]
+
+        with mock.patch('cinder.scheduler.driver.volume_update_db') as update:
+            results = sched.schedule_create_volumes(fake_context,
+                                                    request_spec_list,
+                                                    filter_properties_list)
+        return results, [call[0][2] for call in update.call_args_list]
+
+    @mock.patch('cinder.db.service_get_all')
+    def test_schedule_create_volumes_spread(self, _mock_service_get_all):
+        results, hosts = self._schedule_create_volumes(_mock_service_get_all,
+                                                       [100] * 4)
+        self.assertEqual([None] * 4, results)
+        self.assertEqual(2, hosts.count('host1#lvm1'))
+        self.assertEqual(2, hosts.count('host2#lvm2'))
+
+    @mock.patch('cinder.db.service_get_all')
+    def test_schedule_create_volumes_pack(self, _mock_service_get_all):
+        self.flags(scheduler_batch_placement_policy='pack')
+        results, hosts = self._schedule_create_volumes(_mock_service_get_all,
+                                                       [400] * 3)
+        self.assertEqual([None] * 3, results)
+        self.assertEqual(hosts[0], hosts[1])
+        self.assertNotEqual(hosts[0], hosts[2])
+
+    @mock.patch('cinder.db.service_get_all')
+    def test_schedule_create_volumes_no_valid_backend(self,
+                                                      _mock_service_get_all):
+        results, hosts = self._schedule_create_volumes(_mock_service_get_all,
+                                                       [600] * 3)
+        self.assertEqual(2, len(hosts))
+        self.assertEqual([None, None], results[:2])
+        self.assertIsInstance(results[2], exception.NoValidBackend)
+
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch.object(filter_scheduler.FilterScheduler,
+                       '_get_weighted_candidates',
+                       autospec=True,
+                       side_effect=filter_scheduler.FilterScheduler.
+                       _get_weighted_candidates)
+    def test_schedule_create_volumes_batches(self, _mock_get_candidates,
+                                             _mock_service_get_all):
+        results, hosts = self._schedule_create_volumes(_mock_service_get_all,
+                                                       [100, 200, 100, 200])
+        self.assertEqual([None] * 4, results)
+        self.assertEqual(2, _mock_get_candidates.call_count)
+
+    @ddt.data('snapshot_id', 'source_volid', 'group_id')
+    def test_get_batch_key_source(self, source):
+        request_spec = {'volume_properties': {'size': 1}}
+        key = filter_scheduler.FilterScheduler._get_batch_key(request_spec,
+                                                              {})
+        source_keys = set()
+        for source_id in (fake.VOLUME_ID, fake.VOLUME2_ID):
+            request_spec[source] = source_id
+            source_keys.add(filter_scheduler.FilterScheduler._get_batch_key(
+                request_spec, {}))
+        self.assertEqual(2, len(source_keys))
+        self.assertNotIn(key, source_keys)
+
     @ddt.data(('host10@BackendA', True),
               ('host10@BackendB#openstack_nfs_1', True),
               ('host10', False))
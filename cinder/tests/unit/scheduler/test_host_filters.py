@@ -818,6 +818,70 @@ class AffinityFilterTestCase(BackendFiltersTestCase):
 
         self.assertFalse(filt_cls.backend_passes(host, filter_properties))
 
+    def _get_affinity_backends(self):
+        return [fakes.FakeBackendState('host1', {}),
+                fakes.FakeBackendState('host1@lvm', {}),
+                fakes.FakeBackendState('host1@lvm2', {}),
+                fakes.FakeBackendState('host1@lvm#pool1', {}),
+                fakes.FakeBackendState('host2@lvm', {}),
+                fakes.FakeBackendState('host3@lvm',
+                                       {'cluster_name': 'cluster1@lvm'}),
+                fakes.FakeBackendState('host3@lvm',
+                                       {'cluster_name': 'cluster2@lvm'})]
+
+    def _test_affinity_filter_all(self, filter_name, hint, expected):
+        filt_cls = self.class_map[filter_name]()
+        vol1 = utils.create_volume(self.context, host='host1@lvm#pool0')
+        vol2 = utils.create_volume(self.context, host='host4@lvm#pool0',
+                                   cluster_name='cluster1@lvm#pool0')
+        filter_properties = {'context': self.context.elevated(),
+                             'scheduler_hints': {hint: [vol1.id, vol2.id]}}
+        backends = self._get_affinity_backends()
+
+        with mock.patch.object(filt_cls.volume_api, 'get_all',
+                               wraps=filt_cls.volume_api.get_all) as get_all:
+            result = list(filt_cls.filter_all(backends, filter_properties))
+        get_all.assert_called_once_with(
+            mock.ANY, filters={'id': [vol1.id, vol2.id], 'deleted': False},
+            fields=('id', 'host', 'cluster_name'))
+
+        self.assertEqual(expected, [backends.index(b) for b in result])
+        # Results match filtering each backend with its own query
+        self.assertEqual(
+            expected,
+            [i for i, backend in enumerate(backends)
+             if filt_cls.backend_passes(backend, filter_properties)])
+
+    def test_different_filter_all(self):
+        self._test_affinity_filter_all('DifferentBackendFilter',
+                                       'different_host', [2, 3, 4, 6])
+
+    def test_same_filter_all(self):
+        self._test_affinity_filter_all('SameBackendFilter', 'same_host',
+                                       [0, 1, 5])
+
+    def test_affinity_filter_all_no_hint(self):
+        for filter_name in ('DifferentBackendFilter', 'SameBackendFilter'):
+            filt_cls = self.class_map[filter_name]()
+            backends = self._get_affinity_backends()
+            filter_properties = {'context': self.context.elevated(),
+                                 'scheduler_hints': None}
+            with mock.patch.object(filt_cls.volume_api,
+                                   'get_all') as get_all:
+                self.assertEqual(
+                    backends,
+                    list(filt_cls.filter_all(backends, filter_properties)))
+            get_all.assert_not_called()
+
+    def test_affinity_filter_all_nonuuid_hint(self):
+        filt_cls = self.class_map['DifferentBackendFilter']()
+        filter_properties = {'context': self.context.elevated(),
+                             'scheduler_hints': {
+            'different_host': "NOT-a-valid-UUID", }}
+        self.assertEqual(
+            [], list(filt_cls.filter_all(self._get_affinity_backends(),
+                                         filter_properties)))
+
 
 class DriverFilterTestCase(BackendFiltersTestCase):
     def test_passing_function(self):
@@ -1110,6 +1174,51 @@ class InstanceLocalityFilterTestCase(BackendFiltersTestCase):
         self.assertRaises(exception.APITimeout,
                           filt_cls.backend_passes, host, filter_properties)
 
+    @mock.patch('novaclient.client.discover_extensions')
+    @mock.patch('cinder.compute.nova.novaclient')
+    def test_filter_all(self, _mock_novaclient, fake_extensions):
+        _mock_novaclient.return_value = fakes.FakeNovaClient()
+        fake_extensions.return_value = (
+            fakes.FakeNovaClient().list_extensions.show_all())
+        filt_cls = self.class_map['InstanceLocalityFilter']()
+        backends = [fakes.FakeBackendState('host1@lvm#pool0', {}),
+                    fakes.FakeBackendState('host2@lvm#pool0', {}),
+                    fakes.FakeBackendState('host1@lvm#pool1', {})]
+        uuid = nova.novaclient().servers.create('host1')
+
+        filter_properties = {'context': self.context,
+                             'scheduler_hints': {'local_to_instance': uuid},
+                             'request_spec': {'volume_id': fake.VOLUME_ID}}
+        with mock.patch.object(nova.API, 'get_server',
+                               wraps=nova.API().get_server) as get_server:
+            result = list(filt_cls.filter_all(backends, filter_properties))
+
+        self.assertEqual([backends[0], backends[2]], result)
+        get_server.assert_called_once_with(self.context, uuid,
+                                           privileged_user=True,
+                                           timeout=mock.ANY)
+
+    @mock.patch.object(nova.API, 'get_server')
+    def test_filter_all_no_backends(self, mock_get_server):
+        filt_cls = self.class_map['InstanceLocalityFilter']()
+        filter_properties = {'context': self.context,
+                             'scheduler_hints': {
+                                 'local_to_instance': fake.INSTANCE_ID}}
+        backends = (b for b in [])
+
+        self.assertEqual([], list(filt_cls.filter_all(backends,
+                                                      filter_properties)))
+        mock_get_server.assert_not_called()
+
+    def test_filter_all_handles_none(self):
+        filt_cls = self.class_map['InstanceLocalityFilter']()
+        backends = [fakes.FakeBackendState('host1', {})]
+        filter_properties = {'context': self.context,
+                             'scheduler_hints': None}
+        self.assertEqual(backends,
+                         list(filt_cls.filter_all(backends,
+                                                  filter_properties)))
+
 
 class TestFilter(filters.BaseBackendFilter):
     pass
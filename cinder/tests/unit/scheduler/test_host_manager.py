@@ -768,6 +768,147 @@ class HostManagerTestCase(test.TestCase):
             test_service.TestService._compare(self, volume_node,
                                               backend_state_map[host].service)
 
+    def _setup_cached_backends(self, _mock_service_get_all,
+                               _mock_service_is_up):
+        services = [
+            dict(id=1, host='host1', topic='volume', disabled=False,
+                 availability_zone='zone1', updated_at=timeutils.utcnow(),
+                 uuid='a3a593da-7f8d-4bb7-8b4c-f2bc1e0b4824'),
+            dict(id=2, host='host2', topic='volume', disabled=False,
+                 availability_zone='zone1', updated_at=timeutils.utcnow(),
+                 uuid='4200b32b-0bf9-436c-86b2-0675f6ac218e'),
+        ]
+        _mock_service_get_all.return_value = services
+        _mock_service_is_up.return_value = True
+        timestamp = datetime.utcnow()
+        capabilities = {
+            'host1': dict(volume_backend_name='AAA', storage_protocol='iSCSI',
+                          total_capacity_gb=512, free_capacity_gb=200,
+                          reserved_percentage=0),
+            'host2': dict(volume_backend_name='BBB', storage_protocol='FC',
+                          total_capacity_gb=256, free_capacity_gb=100,
+                          reserved_percentage=0),
+        }
+        for host, capabs in capabilities.items():
+            self.host_manager.update_service_capabilities('volume', host,
+                                                          capabs, None,
+                                                          timestamp)
+        return timestamp
+
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch('cinder.objects.service.Service.is_up',
+                new_callable=mock.PropertyMock)
+    def test_get_all_backend_states_cache_time(self, _mock_service_is_up,
+                                               _mock_service_get_all):
+        self.flags(scheduler_backend_cache_time=60)
+        context = 'fake_context'
+        timestamp = self._setup_cached_backends(_mock_service_get_all,
+                                                _mock_service_is_up)
+
+        res = self.host_manager.get_all_backend_states(context)
+        self.assertEqual(2, len(res))
+        self.assertEqual(1, _mock_service_get_all.call_count)
+
+        # Reports from known backends are applied without a refresh
+        self.host_manager.update_service_capabilities(
+            'volume', 'host1',
+            dict(volume_backend_name='AAA', storage_protocol='iSCSI',
+                 total_capacity_gb=512, free_capacity_gb=150,
+                 reserved_percentage=0),
+            None, timestamp + timedelta(seconds=1))
+        res = self.host_manager.get_all_backend_states(context)
+        self.assertEqual(1, _mock_service_get_all.call_count)
+        self.assertEqual({'host1#AAA': 150, 'host2#BBB': 100},
+                         {pool.host: pool.free_capacity_gb for pool in res})
+
+        # An unknown backend makes the next request read the services
+        self.host_manager.update_service_capabilities(
+            'volume', 'host3', dict(free_capacity_gb=300), None,
+            timestamp)
+        self.host_manager.get_all_backend_states(context)
+        self.assertEqual(2, _mock_service_get_all.call_count)
+
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch('cinder.objects.service.Service.is_up',
+                new_callable=mock.PropertyMock)
+    def test_get_all_backend_states_no_cache_time(self, _mock_service_is_up,
+                                                  _mock_service_get_all):
+        context = 'fake_context'
+        self._setup_cached_backends(_mock_service_get_all,
+                                    _mock_service_is_up)
+
+        self.host_manager.get_all_backend_states(context)
+        self.host_manager.get_all_backend_states(context)
+        self.assertEqual(2, _mock_service_get_all.call_count)
+
+        # A service going down is removed from the index
+        _mock_service_is_up.side_effect = [True, False]
+        res = self.host_manager.get_all_backend_states(context)
+        self.assertEqual(['host1#AAA'], [pool.host for pool in res])
+
+    @ddt.data(({'volume_backend_name': 'AAA'}, ['host1#AAA']),
+              ({'capabilities:volume_backend_name': 'BBB'}, ['host2#BBB']),
+              ({'storage_protocol': 'FC'}, ['host2#BBB']),
+              ({'volume_backend_name': 'AAA', 'storage_protocol': 'FC'}, []),
+              ({'volume_backend_name': '<or> AAA <or> BBB'},
+               ['host1#AAA', 'host2#BBB']),
+              ({'vendor:volume_backend_name': 'CCC'},
+               ['host1#AAA', 'host2#BBB']))
+    @ddt.unpack
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch('cinder.objects.service.Service.is_up',
+                new_callable=mock.PropertyMock)
+    def test_get_all_backend_states_indexed(self, extra_specs, expected,
+                                            _mock_service_is_up,
+                                            _mock_service_get_all):
+        context = 'fake_context'
+        self._setup_cached_backends(_mock_service_get_all,
+                                    _mock_service_is_up)
+        filter_properties = {'size': 1,
+                             'resource_type': {'extra_specs': extra_specs}}
+
+        res = self.host_manager.get_all_backend_states(context,
+                                                       filter_properties)
+        self.assertEqual(sorted(expected), sorted(pool.host for pool in res))
+
+    @ddt.data(({'size': 150}, ['host1#AAA']),
+              ({'size': 150, 'vol_exists_on': 'host2'},
+               ['host1#AAA', 'host2#BBB']),
+              ({'size': 1, 'new_size': 151}, ['host1#AAA', 'host2#BBB']),
+              ({'size': 0}, ['host1#AAA', 'host2#BBB']))
+    @ddt.unpack
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch('cinder.objects.service.Service.is_up',
+                new_callable=mock.PropertyMock)
+    def test_get_all_backend_states_capacity(self, filter_properties,
+                                             expected, _mock_service_is_up,
+                                             _mock_service_get_all):
+        context = 'fake_context'
+        self._setup_cached_backends(_mock_service_get_all,
+                                    _mock_service_is_up)
+
+        res = self.host_manager.get_all_backend_states(context,
+                                                       filter_properties)
+        self.assertEqual(sorted(expected), sorted(pool.host for pool in res))
+
+    @mock.patch('cinder.db.service_get_all')
+    @mock.patch('cinder.objects.service.Service.is_up',
+                new_callable=mock.PropertyMock)
+    def test_get_all_backend_states_capacity_filter_disabled(
+            self, _mock_service_is_up, _mock_service_get_all):
+        self.flags(scheduler_default_filters=['CapabilitiesFilter'])
+        self.host_manager = host_manager.HostManager()
+        context = 'fake_context'
+        self._setup_cached_backends(_mock_service_get_all,
+                                    _mock_service_is_up)
+        filter_properties = {
+            'size': 1000,
+            'resource_type': {'extra_specs': {'volume_backend_name': 'AAA'}}}
+
+        res = self.host_manager.get_all_backend_states(context,
+                                                       filter_properties)
+        self.assertEqual(['host1#AAA'], [pool.host for pool in res])
+
     @mock.patch('cinder.db.service_get_all')
     @mock.patch('cinder.objects.service.Service.is_up',
                 new_callable=mock.PropertyMock)
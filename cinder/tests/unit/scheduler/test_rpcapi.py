@@ -79,6 +79,29 @@ class SchedulerRPCAPITestCase(test.RPCAPITestCase):
         create_worker_mock.assert_called_once()
         can_send_version.assert_called_once_with('3.10')
 
+    @mock.patch('oslo_messaging.RPCClient.can_send_version',
+                return_value=True)
+    def test_create_volumes(self, can_send_version_mock):
+        create_worker_mock = self.mock_object(self.fake_volume,
+                                              'create_worker')
+        self._test_rpc_api('create_volumes',
+                           rpc_method='cast',
+                           volumes=[self.fake_volume],
+                           request_spec_list=[self.fake_rs_obj],
+                           filter_properties_list=[self.fake_fp_dict])
+        create_worker_mock.assert_called_once()
+
+    @mock.patch('oslo_messaging.RPCClient.can_send_version',
+                return_value=False)
+    def test_create_volumes_capped(self, can_send_version_mock):
+        self.assertRaises(exception.ServiceTooOld,
+                          self._test_rpc_api,
+                          'create_volumes',
+                          rpc_method='cast',
+                          volumes=[self.fake_volume],
+                          request_spec_list=[self.fake_rs_obj],
+                          version='3.11')
+
     @mock.patch('oslo_messaging.RPCClient.can_send_version',
                 return_value=True)
     def test_create_snapshot(self, can_send_version_mock):
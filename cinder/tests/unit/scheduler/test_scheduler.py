@@ -336,6 +336,49 @@ class SchedulerManagerTestCase(test.TestCase):
                                    filter_properties={})
         volume.set_worker.assert_called_once_with()
 
+    @mock.patch('cinder.scheduler.driver.Scheduler.schedule_create_volumes')
+    @mock.patch('cinder.message.api.API.create')
+    @mock.patch('cinder.db.volume_update')
+    def test_create_volumes(self, _mock_volume_update, _mock_message_create,
+                            _mock_sched_create):
+        volumes = [fake_volume.fake_volume_obj(self.context, id=volume_id)
+                   for volume_id in (fake.VOLUME_ID, fake.VOLUME2_ID)]
+        request_spec_list = [
+            objects.RequestSpec.from_primitives({'volume_id': volume.id})
+            for volume in volumes]
+        error = exception.NoValidBackend(reason="")
+        _mock_sched_create.return_value = [None, error]
+
+        self.manager.create_volumes(self.context, volumes,
+                                    request_spec_list=request_spec_list)
+
+        _mock_sched_create.assert_called_once_with(self.context,
+                                                   request_spec_list,
+                                                   [{}, {}])
+        # Only the volume that couldn't be placed is errored out
+        _mock_volume_update.assert_called_once_with(self.context,
+                                                    fake.VOLUME2_ID,
+                                                    {'status': 'error'})
+        _mock_message_create.assert_called_once_with(
+            self.context, message_field.Action.SCHEDULE_ALLOCATE_VOLUME,
+            resource_uuid=fake.VOLUME2_ID,
+            exception=error)
+
+    @mock.patch('cinder.scheduler.driver.Scheduler.schedule_create_volumes')
+    @mock.patch('eventlet.sleep')
+    def test_create_volumes_set_worker(self, _mock_sleep,
+                                       _mock_sched_create):
+        """Make sure that workers are created for all the volumes."""
+        volumes = [tests_utils.create_volume(self.context, status='creating')
+                   for i in range(2)]
+        _mock_sched_create.return_value = [None, None]
+
+        self.manager.create_volumes(self.context, volumes,
+                                    request_spec_list=[{}, {}])
+        # set_worker is mocked in the class, so calls add up
+        self.assertEqual([mock.call(), mock.call()],
+                         volumes[0].set_worker.call_args_list)
+
     @mock.patch('cinder.scheduler.driver.Scheduler.schedule_create_volume')
     @mock.patch('cinder.scheduler.driver.Scheduler.is_ready')
     @mock.patch('eventlet.sleep')
@@ -599,6 +642,19 @@ class SchedulerDriverBaseTestCase(SchedulerTestCase):
     that will fail if the driver is changed.
     """
 
+    @mock.patch('cinder.scheduler.driver.Scheduler.schedule_create_volume')
+    def test_schedule_create_volumes(self, _mock_sched_create):
+        error = exception.NoValidBackend(reason="")
+        _mock_sched_create.side_effect = [None, error]
+
+        results = self.driver.schedule_create_volumes(
+            self.context, ['spec1', 'spec2'], ['props1', 'props2'])
+
+        self.assertEqual([None, error], results)
+        _mock_sched_create.assert_has_calls(
+            [mock.call(self.context, 'spec1', 'props1'),
+             mock.call(self.context, 'spec2', 'props2')])
+
     def test_unimplemented_schedule(self):
         fake_args = (1, 2, 3)
         fake_kwargs = {'cat': 'meow'}
@@ -28,20 +28,13 @@ from cinder.tests.unit.scheduler import fakes
 from cinder.volume import utils
 
 
-def fake_volume_data_get_for_host(context, host, count_only=False):
-    host = utils.extract_host(host)
-    if host == 'host1':
-        return 1
-    elif host == 'host2':
-        return 2
-    elif host == 'host3':
-        return 3
-    elif host == 'host4':
-        return 4
-    elif host == 'host5':
-        return 5
-    else:
-        return 6
+def fake_volume_count_get_by_host(context):
+    return {'host1#lvm1': 1,
+            'host2#lvm2': 2,
+            'host3#lvm3': 3,
+            'host4#lvm4': 4,
+            'host5#_pool0': 5,
+            'host6#lvm6': 6}
 
 
 class VolumeNumberWeigherTestCase(test.TestCase):
@@ -91,8 +84,8 @@ class VolumeNumberWeigherTestCase(test.TestCase):
         # host4: 4 volumes
         # host5: 5 volumes   Norm=-1.0
         # so, host1 should win:
-        with mock.patch.object(api, 'volume_data_get_for_host',
-                               fake_volume_data_get_for_host):
+        with mock.patch.object(api, 'volume_count_get_by_host',
+                               fake_volume_count_get_by_host):
             weighed_host = self._get_weighed_host(backend_info_list)
             self.assertEqual(0.0, weighed_host.weight)
             self.assertEqual('host1',
@@ -108,9 +101,34 @@ class VolumeNumberWeigherTestCase(test.TestCase):
         # host4: 4 volumes
         # host5: 5 volumes     Norm=1
         # so, host5 should win:
-        with mock.patch.object(api, 'volume_data_get_for_host',
-                               fake_volume_data_get_for_host):
+        with mock.patch.object(api, 'volume_count_get_by_host',
+                               fake_volume_count_get_by_host):
             weighed_host = self._get_weighed_host(backend_info_list)
             self.assertEqual(1.0, weighed_host.weight)
             self.assertEqual('host5',
                              utils.extract_host(weighed_host.obj.host))
+
+    @mock.patch.object(api, 'volume_data_get_for_host')
+    @mock.patch.object(api, 'volume_count_get_by_host',
+                       side_effect=fake_volume_count_get_by_host)
+    def test_volume_number_counted_once(self, mock_count, mock_data):
+        self.flags(volume_number_multiplier=-1.0)
+        backend_info_list = self._get_all_backends()
+
+        self._get_weighed_host(backend_info_list)
+
+        mock_count.assert_called_once_with(mock.ANY)
+        mock_data.assert_not_called()
+
+    def test_volume_number_includes_pools(self):
+        weigher = weights.volume_number.VolumeNumberWeigher()
+        backends = [fakes.FakeBackendState('host1@lvm', {}),
+                    fakes.FakeBackendState('host1@lvm#pool1', {})]
+        objs = [weights.WeighedHost(backend, 0.0) for backend in backends]
+        counts = {'host1@lvm': 1, 'host1@lvm#pool1': 2,
+                  'host1@lvm#pool2': 3, None: 4}
+
+        with mock.patch.object(api, 'volume_count_get_by_host',
+                               return_value=counts):
+            self.assertEqual(
+                [6, 2], weigher.weigh_objects(objs, {'context': self.context}))
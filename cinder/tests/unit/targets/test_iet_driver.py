@@ -12,6 +12,7 @@
 
 import contextlib
 
+import eventlet
 import mock
 from oslo_concurrency import processutils as putils
 import six
@@ -183,6 +184,34 @@ class TestIetAdmDriver(tf.TargetDriverFixture):
                                                    self.fake_volumes_dir))
         self.assertTrue(mock_execute.called)
 
+    def test_ensure_exports(self):
+        ctxt = context.get_admin_context()
+        self.configuration.safe_get = mock.Mock(return_value=2)
+        volumes = [dict(self.testvol, id=str(i)) for i in range(4)]
+        volume_paths = {volume['id']: self.fake_volumes_dir
+                        for volume in volumes}
+        running = []
+        max_running = []
+        error = exception.ISCSITargetCreateFailed(volume_id='3')
+
+        def _ensure_export(context, volume, volume_path):
+            running.append(volume['id'])
+            max_running.append(len(running))
+            eventlet.sleep(0)
+            running.remove(volume['id'])
+            if volume['id'] == '3':
+                raise error
+
+        with mock.patch.object(self.target, 'ensure_export',
+                               side_effect=_ensure_export) as m_export:
+            failed = self.target.ensure_exports(ctxt, volumes, volume_paths)
+
+        self.configuration.safe_get.assert_called_once_with(
+            'init_host_export_workers')
+        self.assertEqual(4, m_export.call_count)
+        self.assertEqual(2, max(max_running))
+        self.assertEqual({'3': error}, failed)
+
     @mock.patch('cinder.volume.targets.iet.IetAdm._get_target_chap_auth',
                 return_value=None)
     @mock.patch('cinder.volume.targets.iet.IetAdm._get_target',
@@ -226,6 +226,25 @@ class TestLioAdmDriver(tf.TargetDriverFixture):
                                   self.fake_volumes_dir)
         self.assertFalse(mock_restore.called)
 
+    @mock.patch.object(lio.LioAdm, '_get_targets', return_value=None)
+    @mock.patch.object(lio.LioAdm, '_restore_configuration')
+    def test_ensure_exports(self, mock_restore, mock_get_targets):
+        ctxt = context.get_admin_context()
+        volumes = [self.testvol, self.testvol_2]
+        self.assertEqual({}, self.target.ensure_exports(ctxt, volumes, {}))
+        mock_get_targets.assert_called_once_with()
+        mock_restore.assert_called_once_with()
+
+    @mock.patch.object(lio.LioAdm, '_get_targets', return_value=None)
+    @mock.patch.object(lio.LioAdm, '_restore_configuration')
+    def test_ensure_exports_failed(self, mock_restore, mock_get_targets):
+        ctxt = context.get_admin_context()
+        error = exception.ISCSITargetCreateFailed(
+            volume_id=self.testvol['id'])
+        mock_restore.side_effect = error
+        self.assertEqual({self.testvol['id']: error},
+                         self.target.ensure_exports(ctxt, [self.testvol], {}))
+
     @mock.patch.object(lio.LioAdm, '_execute', side_effect=lio.LioAdm._execute)
     @mock.patch.object(lio.LioAdm, '_persist_configuration')
     @mock.patch('cinder.utils.execute')
@@ -388,6 +388,62 @@ class TestTgtAdmDriver(tf.TargetDriverFixture):
             portals_ips=[self.configuration.target_ip_address],
             portals_port=self.configuration.target_port)
 
+    @mock.patch.object(tgt.TgtAdm, '_get_target_chap_auth',
+                       return_value=('foo', 'bar'))
+    @mock.patch.object(tgt.TgtAdm, 'ensure_export')
+    @mock.patch('cinder.utils.execute')
+    def test_ensure_exports(self, mock_execute, mock_ensure, mock_get_chap):
+        ctxt = context.get_admin_context()
+        mock_execute.return_value = (self.fake_iscsi_scan, None)
+        mock_ensure.side_effect = exception.ISCSITargetCreateFailed(
+            volume_id=self.testvol['id'])
+        volume = dict(self.testvol, id=self.VOLUME_ID, name=self.VOLUME_NAME)
+        volume_paths = {volume['id']: self.testvol_path,
+                        self.testvol['id']: self.fake_volumes_dir}
+
+        failed = self.target.ensure_exports(ctxt, [volume, self.testvol],
+                                            volume_paths)
+
+        # Both persistence files are written and tgtd is updated once, only
+        # the volume missing from tgtd is exported again on its own.
+        self.assertTrue(os.path.exists(
+            os.path.join(self.fake_volumes_dir, self.VOLUME_NAME)))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.fake_volumes_dir, self.testvol['name'])))
+        mock_execute.assert_has_calls(
+            [mock.call('tgt-admin', '--update', 'ALL', run_as_root=True),
+             mock.call('tgt-admin', '--show', run_as_root=True)])
+        self.assertEqual(2, mock_execute.call_count)
+        mock_ensure.assert_called_once_with(ctxt, self.testvol,
+                                            self.fake_volumes_dir)
+        self.assertEqual([self.testvol['id']], list(failed))
+
+    @mock.patch.object(tgt.TgtAdm, '_get_target_chap_auth')
+    @mock.patch.object(tgt.TgtAdm, 'ensure_export')
+    @mock.patch('cinder.utils.execute')
+    def test_ensure_exports_errors(self, mock_execute, mock_ensure,
+                                   mock_get_chap):
+        ctxt = context.get_admin_context()
+        mock_execute.side_effect = [
+            (None, None),
+            putils.ProcessExecutionError(cmd='tgt-admin --show')]
+        volume = dict(self.testvol, id=self.VOLUME_ID, name=self.VOLUME_NAME)
+        error = exception.CinderException()
+        mock_get_chap.side_effect = [error, ('foo', 'bar')]
+        volume_paths = {volume['id']: self.testvol_path,
+                        self.testvol['id']: self.fake_volumes_dir}
+
+        failed = self.target.ensure_exports(ctxt, [volume, self.testvol],
+                                            volume_paths)
+
+        # The volume whose persistence file couldn't be written fails alone,
+        # and the other one is checked on its own when tgtd can't be listed.
+        self.assertEqual({volume['id']: error}, failed)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.fake_volumes_dir, self.VOLUME_NAME)))
+        mock_ensure.assert_called_once_with(ctxt, self.testvol,
+                                            self.fake_volumes_dir)
+
     @test.testtools.skipIf(sys.platform == "darwin", "SKIP on OSX")
     def test_create_iscsi_target_retry(self):
         with mock.patch('cinder.utils.execute', return_value=('', '')),\
@@ -76,6 +76,25 @@ class TestCleanableManager(test.TestCase):
         vol.refresh()
         self.assertEqual('creating_cleaned', vol.status)
 
+    def test_do_cleanup_skip_non_cleanable_types(self):
+        """Entries of non cleanable resource types are left alone."""
+        vol = utils.create_volume(self.context, status='deleting')
+        worker = db.worker_create(self.context, status='wiping',
+                                  resource_type='LVMDeferredWipe',
+                                  resource_id=vol.id,
+                                  service_id=self.service.id)
+
+        clean_req = objects.CleanupRequest(service_id=self.service.id)
+        mngr = FakeManager(self.service.id)
+        mngr.do_cleanup(self.context, clean_req)
+
+        workers = db.worker_get_all(self.context)
+        self.assertEqual(1, len(workers))
+        self.assertEqual(worker.id, workers[0].id)
+        self.assertEqual(self.service.id, workers[0].service_id)
+        vol.refresh()
+        self.assertEqual('deleting', vol.status)
+
     def test_do_cleanup_not_cleaning_already_claimed(self):
         """Basic cleanup that doesn't touch already cleaning works."""
         vol = utils.create_volume(self.context, status='creating')
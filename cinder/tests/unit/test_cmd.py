@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import datetime
 import iso8601
 import sys
@@ -52,6 +53,7 @@ from cinder.tests.unit import fake_volume
 from cinder.tests.unit import utils
 from cinder import version
 from cinder.volume import rpcapi
+from cinder.volume import utils as volume_utils
 
 CONF = cfg.CONF
 
@@ -598,14 +600,41 @@ Running batches of 50 until complete.
                                       is_admin=True)
         get_admin_context.return_value = ctxt
 
-        purge_deleted_rows.return_value = None
+        purge_deleted_rows.return_value = {'volumes': 2}
 
         db_cmds = cinder_manage.DbCommands()
-        db_cmds.purge(age_in_days)
+        with mock.patch('sys.stdout', new=six.StringIO()) as fake_out:
+            db_cmds.purge(age_in_days)
 
         get_admin_context.assert_called_once_with()
         purge_deleted_rows.assert_called_once_with(
-            ctxt, age_in_days=age_in_days)
+            ctxt, age_in_days=age_in_days, batch_size=1000, sleep=0,
+            dry_run=False)
+        self.assertEqual('volumes: 2\n', fake_out.getvalue())
+
+    @mock.patch('cinder.db.sqlalchemy.api.purge_deleted_rows')
+    @mock.patch('cinder.context.get_admin_context')
+    def test_purge_dry_run(self, get_admin_context, purge_deleted_rows):
+        get_admin_context.return_value = mock.sentinel.ctxt
+        purge_deleted_rows.return_value = collections.OrderedDict(
+            [('volume_metadata', 4), ('volumes', 2)])
+
+        db_cmds = cinder_manage.DbCommands()
+        with mock.patch('sys.stdout', new=six.StringIO()) as fake_out:
+            db_cmds.purge(10, batch_size=10, sleep=0.5, dry_run=True)
+
+        purge_deleted_rows.assert_called_once_with(
+            mock.sentinel.ctxt, age_in_days=10, batch_size=10, sleep=0.5,
+            dry_run=True)
+        self.assertEqual('Rows that would be purged:\nvolume_metadata: 4\n'
+                         'volumes: 2\n', fake_out.getvalue())
+
+    @ddt.data({'batch_size': -1}, {'sleep': -1})
+    def test_purge_negative_batch_params(self, kwargs):
+        db_cmds = cinder_manage.DbCommands()
+        with mock.patch('sys.stdout', new=six.StringIO()):
+            ex = self.assertRaises(SystemExit, db_cmds.purge, 10, **kwargs)
+        self.assertEqual(1, ex.code)
 
     @mock.patch('cinder.db.service_get_all')
     @mock.patch('cinder.context.get_admin_context')
@@ -1797,6 +1826,22 @@ class TestCinderRtstoolCmd(test.TestCase):
         self.assertEqual(0, rc)
 
 
+class _ContextCopy(object):
+    """Matches a copy of a context."""
+
+    def __init__(self, ctxt):
+        self.ctxt = ctxt
+
+    def __eq__(self, other):
+        return (other is not self.ctxt and
+                other.user_id == self.ctxt.user_id and
+                other.project_id == self.ctxt.project_id)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+@ddt.ddt
 @test.testtools.skipIf(sys.platform == 'darwin', 'Not supported on macOS')
 class TestCinderVolumeUsageAuditCmd(test.TestCase):
 
@@ -1850,6 +1895,7 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         end = datetime.datetime(2014, 2, 2, 2, 0, tzinfo=iso8601.UTC)
         ctxt = context.RequestContext(fake.USER_ID, fake.PROJECT_ID)
         get_admin_context.return_value = ctxt
+        ctxt_copy = _ContextCopy(ctxt)
         last_completed_audit_period.return_value = (begin, end)
         volume1_created = datetime.datetime(2014, 1, 1, 2, 0,
                                             tzinfo=iso8601.UTC)
@@ -1885,13 +1931,15 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         get_logger.assert_called_once_with('cinder')
         rpc_init.assert_called_once_with(CONF)
         last_completed_audit_period.assert_called_once_with()
-        volume_get_all_active_by_window.assert_called_once_with(ctxt, begin,
-                                                                end)
+        volume_get_all_active_by_window.assert_called_once_with(
+            ctxt, begin, end, marker=None, limit=1000, project_range=None,
+            fields=volume_utils.VOLUME_USAGE_FIELDS)
         notify_about_volume_usage.assert_has_calls([
-            mock.call(ctxt, volume1, 'exists', extra_usage_info=extra_info),
-            mock.call(ctxt, volume1, 'create.start',
+            mock.call(ctxt_copy, volume1, 'exists',
+                      extra_usage_info=extra_info),
+            mock.call(ctxt_copy, volume1, 'create.start',
                       extra_usage_info=local_extra_info),
-            mock.call(ctxt, volume1, 'create.end',
+            mock.call(ctxt_copy, volume1, 'create.end',
                       extra_usage_info=local_extra_info)
         ])
 
@@ -1916,6 +1964,7 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         end = datetime.datetime(2014, 2, 2, 2, 0, tzinfo=iso8601.UTC)
         ctxt = context.RequestContext(fake.USER_ID, fake.PROJECT_ID)
         get_admin_context.return_value = ctxt
+        ctxt_copy = _ContextCopy(ctxt)
         last_completed_audit_period.return_value = (begin, end)
         volume1_created = datetime.datetime(2014, 1, 1, 2, 0,
                                             tzinfo=iso8601.UTC)
@@ -1955,17 +2004,19 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         get_logger.assert_called_once_with('cinder')
         rpc_init.assert_called_once_with(CONF)
         last_completed_audit_period.assert_called_once_with()
-        volume_get_all_active_by_window.assert_called_once_with(ctxt, begin,
-                                                                end)
+        volume_get_all_active_by_window.assert_called_once_with(
+            ctxt, begin, end, marker=None, limit=1000, project_range=None,
+            fields=volume_utils.VOLUME_USAGE_FIELDS)
         notify_about_volume_usage.assert_has_calls([
-            mock.call(ctxt, volume1, 'exists', extra_usage_info=extra_info),
-            mock.call(ctxt, volume1, 'create.start',
+            mock.call(ctxt_copy, volume1, 'exists',
+                      extra_usage_info=extra_info),
+            mock.call(ctxt_copy, volume1, 'create.start',
                       extra_usage_info=local_extra_info_create),
-            mock.call(ctxt, volume1, 'create.end',
+            mock.call(ctxt_copy, volume1, 'create.end',
                       extra_usage_info=local_extra_info_create),
-            mock.call(ctxt, volume1, 'delete.start',
+            mock.call(ctxt_copy, volume1, 'delete.start',
                       extra_usage_info=local_extra_info_delete),
-            mock.call(ctxt, volume1, 'delete.end',
+            mock.call(ctxt_copy, volume1, 'delete.end',
                       extra_usage_info=local_extra_info_delete)
         ])
 
@@ -1995,6 +2046,7 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         end = datetime.datetime(2014, 2, 2, 2, 0, tzinfo=iso8601.UTC)
         ctxt = context.RequestContext(fake.USER_ID, fake.PROJECT_ID)
         get_admin_context.return_value = ctxt
+        ctxt_copy = _ContextCopy(ctxt)
         last_completed_audit_period.return_value = (begin, end)
         snapshot1_created = datetime.datetime(2014, 1, 1, 2, 0,
                                               tzinfo=iso8601.UTC)
@@ -2035,14 +2087,15 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         get_logger.assert_called_once_with('cinder')
         rpc_init.assert_called_once_with(CONF)
         last_completed_audit_period.assert_called_once_with()
-        volume_get_all_active_by_window.assert_called_once_with(ctxt, begin,
-                                                                end)
+        volume_get_all_active_by_window.assert_called_once_with(
+            ctxt, begin, end, marker=None, limit=1000, project_range=None,
+            fields=volume_utils.VOLUME_USAGE_FIELDS)
         self.assertFalse(notify_about_volume_usage.called)
         notify_about_snapshot_usage.assert_has_calls([
-            mock.call(ctxt, snapshot1, 'exists', extra_info),
-            mock.call(ctxt, snapshot1, 'create.start',
+            mock.call(ctxt_copy, snapshot1, 'exists', extra_info),
+            mock.call(ctxt_copy, snapshot1, 'create.start',
                       extra_usage_info=local_extra_info_create),
-            mock.call(ctxt, snapshot1, 'delete.start',
+            mock.call(ctxt_copy, snapshot1, 'delete.start',
                       extra_usage_info=local_extra_info_delete)
         ])
 
@@ -2068,6 +2121,7 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         end = datetime.datetime(2014, 2, 2, 2, 0, tzinfo=iso8601.UTC)
         ctxt = context.RequestContext('fake-user', 'fake-project')
         get_admin_context.return_value = ctxt
+        ctxt_copy = _ContextCopy(ctxt)
         last_completed_audit_period.return_value = (begin, end)
         backup1_created = datetime.datetime(2014, 1, 1, 2, 0,
                                             tzinfo=iso8601.UTC)
@@ -2101,16 +2155,17 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         self.assertEqual(CONF.version, version.version_string())
         rpc_init.assert_called_once_with(CONF)
         last_completed_audit_period.assert_called_once_with()
-        volume_get_all_active_by_window.assert_called_once_with(ctxt,
-                                                                begin, end)
+        volume_get_all_active_by_window.assert_called_once_with(
+            ctxt, begin, end, marker=None, limit=1000, project_range=None,
+            fields=volume_utils.VOLUME_USAGE_FIELDS)
         self.assertFalse(notify_about_volume_usage.called)
-        notify_about_backup_usage.assert_any_call(ctxt, backup1, 'exists',
-                                                  extra_info)
+        notify_about_backup_usage.assert_any_call(ctxt_copy, backup1,
+                                                  'exists', extra_info)
         notify_about_backup_usage.assert_any_call(
-            ctxt, backup1, 'create.start',
+            ctxt_copy, backup1, 'create.start',
             extra_usage_info=local_extra_info_create)
         notify_about_backup_usage.assert_any_call(
-            ctxt, backup1, 'delete.start',
+            ctxt_copy, backup1, 'delete.start',
             extra_usage_info=local_extra_info_delete)
 
     @mock.patch('cinder.volume.utils.notify_about_backup_usage')
@@ -2139,6 +2194,7 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         end = datetime.datetime(2014, 2, 2, 2, 0, tzinfo=iso8601.UTC)
         ctxt = context.RequestContext(fake.USER_ID, fake.PROJECT_ID)
         get_admin_context.return_value = ctxt
+        ctxt_copy = _ContextCopy(ctxt)
         last_completed_audit_period.return_value = (begin, end)
 
         volume1_created = datetime.datetime(2014, 1, 1, 2, 0,
@@ -2207,44 +2263,105 @@ class TestCinderVolumeUsageAuditCmd(test.TestCase):
         get_logger.assert_called_once_with('cinder')
         rpc_init.assert_called_once_with(CONF)
         last_completed_audit_period.assert_called_once_with()
-        volume_get_all_active_by_window.assert_called_once_with(ctxt,
-                                                                begin, end)
+        volume_get_all_active_by_window.assert_called_once_with(
+            ctxt, begin, end, marker=None, limit=1000, project_range=None,
+            fields=volume_utils.VOLUME_USAGE_FIELDS)
         notify_about_volume_usage.assert_has_calls([
-            mock.call(ctxt, volume1, 'exists', extra_usage_info=extra_info),
-            mock.call(ctxt, volume1, 'create.start',
+            mock.call(ctxt_copy, volume1, 'exists',
+                      extra_usage_info=extra_info),
+            mock.call(ctxt_copy, volume1, 'create.start',
                       extra_usage_info=extra_info_volume_create),
-            mock.call(ctxt, volume1, 'create.end',
+            mock.call(ctxt_copy, volume1, 'create.end',
                       extra_usage_info=extra_info_volume_create),
-            mock.call(ctxt, volume1, 'delete.start',
+            mock.call(ctxt_copy, volume1, 'delete.start',
                       extra_usage_info=extra_info_volume_delete),
-            mock.call(ctxt, volume1, 'delete.end',
+            mock.call(ctxt_copy, volume1, 'delete.end',
                       extra_usage_info=extra_info_volume_delete)
         ])
 
         notify_about_snapshot_usage.assert_has_calls([
-            mock.call(ctxt, snapshot1, 'exists', extra_info),
-            mock.call(ctxt, snapshot1, 'create.start',
+            mock.call(ctxt_copy, snapshot1, 'exists', extra_info),
+            mock.call(ctxt_copy, snapshot1, 'create.start',
                       extra_usage_info=extra_info_snapshot_create),
-            mock.call(ctxt, snapshot1, 'create.end',
+            mock.call(ctxt_copy, snapshot1, 'create.end',
                       extra_usage_info=extra_info_snapshot_create),
-            mock.call(ctxt, snapshot1, 'delete.start',
+            mock.call(ctxt_copy, snapshot1, 'delete.start',
                       extra_usage_info=extra_info_snapshot_delete),
-            mock.call(ctxt, snapshot1, 'delete.end',
+            mock.call(ctxt_copy, snapshot1, 'delete.end',
                       extra_usage_info=extra_info_snapshot_delete)
         ])
 
         notify_about_backup_usage.assert_has_calls([
-            mock.call(ctxt, backup1, 'exists', extra_info),
-            mock.call(ctxt, backup1, 'create.start',
+            mock.call(ctxt_copy, backup1, 'exists', extra_info),
+            mock.call(ctxt_copy, backup1, 'create.start',
                       extra_usage_info=extra_info_backup_create),
-            mock.call(ctxt, backup1, 'create.end',
+            mock.call(ctxt_copy, backup1, 'create.end',
                       extra_usage_info=extra_info_backup_create),
-            mock.call(ctxt, backup1, 'delete.start',
+            mock.call(ctxt_copy, backup1, 'delete.start',
                       extra_usage_info=extra_info_backup_delete),
-            mock.call(ctxt, backup1, 'delete.end',
+            mock.call(ctxt_copy, backup1, 'delete.end',
                       extra_usage_info=extra_info_backup_delete)
         ])
 
+    @ddt.data((1, 0, None), (2, 0, (None, '80000000')),
+              (2, 1, ('80000000', None)), (3, 1, ('55555555', 'aaaaaaaa')))
+    @ddt.unpack
+    def test_shard_project_range(self, shards, shard, expected):
+        CONF.set_override('shards', shards)
+        CONF.set_override('shard', shard)
+
+        self.assertEqual(expected,
+                         volume_usage_audit._shard_project_range(mock.Mock()))
+
+    def test_shard_project_range_invalid_shard(self):
+        CONF.set_override('shards', 2)
+        CONF.set_override('shard', 2)
+
+        exit = self.assertRaises(SystemExit,
+                                 volume_usage_audit._shard_project_range,
+                                 mock.Mock())
+        self.assertEqual(-1, exit.code)
+
+    def test_obj_ref_action_context_copy(self):
+        ctxt = context.get_admin_context()
+
+        def _notify_usage(LOG, obj_ref, extra_info, admin_context):
+            admin_context.read_deleted = 'yes'
+
+        notify_usage = mock.Mock(side_effect=_notify_usage)
+
+        volume_usage_audit._obj_ref_action(
+            notify_usage, mock.Mock(), mock.sentinel.obj_ref,
+            mock.sentinel.extra_info, ctxt, mock.sentinel.begin,
+            mock.sentinel.end, mock.Mock(), 'volume_id', 'volume')
+
+        notify_usage.assert_called_once_with(
+            mock.ANY, mock.sentinel.obj_ref, mock.sentinel.extra_info,
+            _ContextCopy(ctxt))
+        self.assertEqual('no', ctxt.read_deleted)
+
+    def test_notify_all_active_by_window(self):
+        CONF.set_override('batch_size', 2)
+        objs = [mock.Mock(id=i) for i in range(3)]
+        list_cls = mock.Mock()
+        list_cls.get_all_active_by_window.side_effect = [objs[:2], objs[2:]]
+        notify = mock.Mock()
+
+        count = volume_usage_audit._notify_all_active_by_window(
+            list_cls, mock.sentinel.ctxt, mock.sentinel.begin,
+            mock.sentinel.end, mock.sentinel.project_range, notify,
+            fields=mock.sentinel.fields)
+
+        self.assertEqual(3, count)
+        notify.assert_has_calls([mock.call(obj) for obj in objs],
+                                any_order=True)
+        list_cls.get_all_active_by_window.assert_has_calls([
+            mock.call(mock.sentinel.ctxt, mock.sentinel.begin,
+                      mock.sentinel.end, marker=marker, limit=2,
+                      project_range=mock.sentinel.project_range,
+                      fields=mock.sentinel.fields)
+            for marker in (None, 1)])
+
 
 @test.testtools.skipIf(sys.platform == 'darwin', 'Not supported on macOS')
 class TestVolumeSharedTargetsOnlineMigration(test.TestCase):
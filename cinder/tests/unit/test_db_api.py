@@ -24,6 +24,7 @@ from oslo_config import cfg
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
+import sqlalchemy
 from sqlalchemy.sql import operators
 
 from cinder.api import common
@@ -618,6 +619,18 @@ class DBAPIVolumeTestCase(BaseTest):
                              db.volume_data_get_for_host(
                                  self.ctxt, 'h%d@lvmdriver-1' % i))
 
+    def test_volume_count_get_by_host(self):
+        for i in range(THREE):
+            for j in range(i + 1):
+                db.volume_create(self.ctxt, {'host': 'h%d@lvm#pool' % i,
+                                             'size': ONE_HUNDREDS})
+        volume = db.volume_create(self.ctxt, {'host': 'h0@lvm#pool'})
+        db.volume_destroy(self.ctxt, volume.id)
+
+        self.assertEqual({'h0@lvm#pool': 1, 'h1@lvm#pool': 2,
+                          'h2@lvm#pool': 3},
+                         db.volume_count_get_by_host(self.ctxt))
+
     def test_volume_data_get_for_project(self):
         for i in range(THREE):
             for j in range(THREE):
@@ -771,6 +784,33 @@ class DBAPIVolumeTestCase(BaseTest):
         self._assertEqualListsOfObjects(volumes, db.volume_get_all(
                                         self.ctxt, None, None, ['host'], None))
 
+    def test_volume_get_all_fields(self):
+        volume = utils.create_volume(self.ctxt, display_name='vol',
+                                     metadata={'key': 'value'})
+
+        result = db.volume_get_all(self.ctxt, fields=('id', 'display_name'))
+
+        self.assertEqual(1, len(result))
+        self.assertEqual(volume.id, result[0].id)
+        self.assertEqual('vol', result[0].display_name)
+        unloaded = sqlalchemy.inspect(result[0]).unloaded
+        self.assertIn('size', unloaded)
+        self.assertIn('volume_metadata', unloaded)
+        self.assertIn('volume_attachment', unloaded)
+
+    def test_volume_get_all_by_project_fields(self):
+        utils.create_volume(self.ctxt, metadata={'key': 'value'})
+
+        result = db.volume_get_all_by_project(
+            self.ctxt, self.ctxt.project_id, None, None,
+            fields=('id', 'metadata'))
+
+        self.assertEqual({'key': 'value'},
+                         {m.key: m.value for m in result[0].volume_metadata})
+        unloaded = sqlalchemy.inspect(result[0]).unloaded
+        self.assertIn('display_name', unloaded)
+        self.assertIn('volume_type', unloaded)
+
     @ddt.data('cluster_name', 'host')
     def test_volume_get_all_filter_host_and_cluster(self, field):
         volumes = []
@@ -797,6 +837,40 @@ class DBAPIVolumeTestCase(BaseTest):
         self._assertEqualListsOfObjects(volumes[2:], db.volume_get_all(
                                         self.ctxt, 2, 2, ['id'], ['asc']))
 
+    @ddt.data('asc', 'desc')
+    def test_volume_get_all_page_token_passed(self, sort_dir):
+        for name in ('b', None, 'a', 'b', None, 'c'):
+            db.volume_create(self.ctxt, {'display_name': name})
+        sort_keys, sort_dirs = ['display_name'], [sort_dir]
+        expected = db.volume_get_all(self.ctxt, None, None, sort_keys,
+                                     sort_dirs)
+
+        result = []
+        marker = None
+        while True:
+            page = db.volume_get_all(self.ctxt, marker, 2, sort_keys,
+                                     sort_dirs)
+            if not page:
+                break
+            result.extend(page)
+            marker = common.PageToken.from_item(page[-1], sort_keys,
+                                                sort_dirs)
+
+        self.assertEqual([volume.id for volume in expected],
+                         [volume.id for volume in result])
+
+    @ddt.data({'size': 'fake'}, {'display_name': 1},
+              {'created_at': 'not a date'})
+    def test_volume_get_all_page_token_invalid(self, values):
+        token_values = {'size': 1, 'display_name': 'fake_name',
+                        'created_at': '2018-01-02T03:04:05', 'id': 'fake_id'}
+        token_values.update(values)
+        marker = common.PageToken(['size:asc', 'display_name:asc'],
+                                  token_values)
+        self.assertRaises(exception.InvalidInput, db.volume_get_all,
+                          self.ctxt, marker, 2, ['size', 'display_name'],
+                          ['asc', 'asc'])
+
     def test_volume_get_all_by_host(self):
         volumes = []
         for i in range(3):
@@ -3045,6 +3119,21 @@ class DBAPIImageVolumeCacheEntryTestCase(BaseTest):
                                                                host=host)
         self.assertIsNone(entry)
 
+    def test_cache_entry_get_counts_hits(self):
+        host = 'abc@123#poolz'
+        image_id = 'c06764d7-54b0-4471-acce-62e79452a38b'
+        volume_id = 'e0e4f819-24bb-49e6-af1e-67fb77fc07d1'
+
+        entry = db.image_volume_cache_create(self.ctxt, host, None, image_id,
+                                             datetime.datetime.utcnow(),
+                                             volume_id, 6)
+        self.assertEqual(0, entry['hit_count'])
+
+        for i in range(2):
+            entry = db.image_volume_cache_get_and_update_last_used(
+                self.ctxt, image_id, host=host)
+        self.assertEqual(2, entry['hit_count'])
+
     def test_cache_entry_get_multiple(self):
         host = 'abc@123#poolz'
         cluster_name = 'def@123#poolz'
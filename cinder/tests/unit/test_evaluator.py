@@ -13,6 +13,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
+import mock
+
 from cinder import exception
 from cinder.scheduler.evaluator import evaluator
 from cinder import test
@@ -137,3 +141,32 @@ class EvaluatorTestCase(test.TestCase):
         self.assertRaises(exception.EvaluatorParseException,
                           evaluator.evaluate,
                           "7 / 0")
+
+    def test_compile_expression_cached(self):
+        expression = "stats.iops * 2 + 1"
+        compiled = evaluator.compile_expression(expression)
+        self.assertIs(compiled, evaluator.compile_expression(expression))
+        self.assertEqual(2001, compiled.evaluate(stats={'iops': 1000}))
+        self.assertEqual(21, evaluator.evaluate(expression,
+                                                stats={'iops': 10}))
+
+    def test_compile_expression_bad_expression_cached(self):
+        compiled = evaluator.compile_expression("1/*1")
+        with mock.patch.object(evaluator._parser,
+                               'parseString') as mock_parse:
+            self.assertIs(compiled, evaluator.compile_expression("1/*1"))
+            mock_parse.assert_not_called()
+        self.assertRaises(exception.EvaluatorParseException,
+                          compiled.evaluate)
+
+    @mock.patch.object(evaluator, 'MAX_CACHED_EXPRESSIONS', 2)
+    def test_compile_expression_lru(self):
+        self.mock_object(evaluator, '_expressions',
+                         collections.OrderedDict())
+        first = evaluator.compile_expression("1 + 1")
+        evaluator.compile_expression("1 + 2")
+        # Using the first expression makes the second one the oldest
+        evaluator.compile_expression("1 + 1")
+        evaluator.compile_expression("1 + 3")
+        self.assertEqual(["1 + 1", "1 + 3"], list(evaluator._expressions))
+        self.assertIs(first, evaluator.compile_expression("1 + 1"))
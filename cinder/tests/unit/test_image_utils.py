@@ -15,10 +15,14 @@
 """Unit tests for image utils."""
 
 import errno
+import hashlib
 import math
+import os
 
 import cryptography
 import ddt
+import eventlet
+import fixtures
 import mock
 from oslo_concurrency import processutils
 from oslo_utils import units
@@ -349,6 +353,246 @@ class TestFetch(test.TestCase):
                               _user_id, _project_id)
 
 
+@ddt.ddt
+class TestStreamToVolume(test.TestCase):
+    def setUp(self):
+        super(TestStreamToVolume, self).setUp()
+        self.image_meta = {'id': fake.IMAGE_ID,
+                           'size': 1 * units.Gi,
+                           'disk_format': 'raw',
+                           'container_format': 'bare',
+                           'checksum': hashlib.md5(b'abcdef').hexdigest(),
+                           'properties': {}}
+        self.image_service = mock.Mock()
+        self.image_service.download.return_value = [b'abc', b'def']
+        dest_dir = self.useFixture(fixtures.TempDir()).path
+        self.dest = os.path.join(dest_dir, 'volume')
+
+    def test_can_stream_image(self):
+        self.assertTrue(image_utils.can_stream_image(self.image_meta))
+
+    @ddt.data({'disk_format': 'qcow2'},
+              {'container_format': 'ovf'},
+              {'size': None},
+              {'properties': {'img_signature': 'signature'}})
+    def test_can_stream_image_not_raw(self, image_meta):
+        self.image_meta.update(image_meta)
+        self.assertFalse(image_utils.can_stream_image(self.image_meta))
+
+    def test_can_stream_image_volume_format(self):
+        self.assertFalse(image_utils.can_stream_image(self.image_meta,
+                                                      'qcow2'))
+
+    def test_can_stream_image_disabled(self):
+        self.override_config('image_stream_raw_to_volume', False)
+        self.assertFalse(image_utils.can_stream_image(self.image_meta))
+
+    @mock.patch.object(throttling.Throttle, 'DEFAULT')
+    def test_can_stream_image_throttled(self, mock_throttle):
+        self.assertFalse(image_utils.can_stream_image(self.image_meta))
+
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    def test_stream_to_volume(self, mock_info):
+        mock_info.return_value.backing_file = None
+        with open(self.dest, 'wb') as volume_file:
+            volume_file.write(b'0123456789')
+
+        image_utils.stream_to_volume(mock.sentinel.context,
+                                     self.image_service, self.image_meta,
+                                     self.dest, size=1, run_as_root=False)
+
+        self.image_service.download.assert_called_once_with(
+            mock.sentinel.context, fake.IMAGE_ID)
+        with open(self.dest, 'rb') as volume_file:
+            self.assertEqual(b'abcdef6789', volume_file.read())
+        mock_info.assert_called_once_with(self.dest, run_as_root=False)
+
+    def test_stream_to_volume_too_small(self):
+        self.assertRaises(exception.ImageUnacceptable,
+                          image_utils.stream_to_volume,
+                          mock.sentinel.context, self.image_service,
+                          dict(self.image_meta, size=2 * units.Gi),
+                          self.dest, size=1)
+        self.image_service.download.assert_not_called()
+
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    def test_stream_to_volume_checksum_mismatch(self, mock_info):
+        self.image_meta['checksum'] = hashlib.md5(b'other').hexdigest()
+        self.assertRaises(exception.ImageDownloadFailed,
+                          image_utils.stream_to_volume,
+                          mock.sentinel.context, self.image_service,
+                          self.image_meta, self.dest)
+        mock_info.assert_not_called()
+
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    def test_stream_to_volume_backing_file(self, mock_info):
+        mock_info.return_value.backing_file = 'backing'
+        self.assertRaises(exception.ImageUnacceptable,
+                          image_utils.stream_to_volume,
+                          mock.sentinel.context, self.image_service,
+                          self.image_meta, self.dest)
+
+    @mock.patch('cinder.image.image_utils.qemu_img_info',
+                side_effect=processutils.ProcessExecutionError)
+    @mock.patch('cinder.utils.temporary_chown')
+    @mock.patch('os.access', return_value=False)
+    def test_stream_to_volume_chown(self, mock_access, mock_chown,
+                                    mock_info):
+        open(self.dest, 'wb').close()
+
+        image_utils.stream_to_volume(mock.sentinel.context,
+                                     self.image_service, self.image_meta,
+                                     self.dest)
+
+        mock_chown.assert_called_once_with(self.dest)
+
+    def test_stream_to_volume_enospc(self):
+        self.image_service.download.side_effect = IOError(errno.ENOSPC,
+                                                          'No space')
+        self.assertRaises(exception.ImageTooBig,
+                          image_utils.stream_to_volume,
+                          mock.sentinel.context, self.image_service,
+                          self.image_meta, self.dest)
+
+
+class FakeRangeImageService(object):
+    """Image service serving the data of an image in byte ranges."""
+    def __init__(self, data, ranges=True, direct_path=None,
+                 fail_offset=None):
+        self.data = data
+        self.ranges = ranges
+        self.direct_path = direct_path
+        self.fail_offset = fail_offset
+        self.range_calls = []
+        self.active_ranges = 0
+
+    def show(self, context, image_id):
+        return {'id': image_id,
+                'size': len(self.data),
+                'checksum': hashlib.md5(self.data).hexdigest()}
+
+    def download(self, context, image_id, data=None):
+        data.write(self.data)
+
+    def get_direct_file_path(self, context, image_id):
+        return self.direct_path
+
+    def download_range(self, context, image_id, offset, length):
+        self.range_calls.append((offset, length))
+        if not self.ranges:
+            return None
+        return self._range_chunks(offset, length)
+
+    def _range_chunks(self, offset, length):
+        chunk_size = 64 * units.Ki
+        self.active_ranges += 1
+        try:
+            for start in range(offset, offset + length, chunk_size):
+                if offset == self.fail_offset and start > offset:
+                    raise exception.ImageDownloadFailed(
+                        image_href=fake.IMAGE_ID, reason='fake')
+                # Let the other ranges run
+                eventlet.sleep(0)
+                yield self.data[start:min(start + chunk_size,
+                                          offset + length)]
+        finally:
+            self.active_ranges -= 1
+
+
+class TestFetchRanges(test.TestCase):
+    def setUp(self):
+        super(TestFetchRanges, self).setUp()
+        self.override_config('image_download_workers', 3)
+        self.override_config('image_download_range_size', 1)
+        self.data = os.urandom(2 * units.Mi + 12345)
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'image')
+
+    def _fetch(self, image_service):
+        image_utils.fetch(mock.sentinel.context, image_service,
+                          fake.IMAGE_ID, self.path, mock.sentinel.user_id,
+                          mock.sentinel.project_id)
+
+    def test_fetch_ranges(self):
+        image_service = FakeRangeImageService(self.data)
+        image_service.download = mock.Mock()
+
+        self._fetch(image_service)
+
+        with open(self.path, 'rb') as image_file:
+            self.assertEqual(self.data, image_file.read())
+        self.assertEqual([(0, units.Mi), (units.Mi, units.Mi),
+                          (2 * units.Mi, 12345)],
+                         sorted(image_service.range_calls))
+        image_service.download.assert_not_called()
+
+    def test_fetch_ranges_not_supported(self):
+        image_service = FakeRangeImageService(self.data, ranges=False)
+
+        self._fetch(image_service)
+
+        with open(self.path, 'rb') as image_file:
+            self.assertEqual(self.data, image_file.read())
+        self.assertEqual([(0, units.Mi)], image_service.range_calls)
+
+    def test_fetch_ranges_direct_file(self):
+        image_service = FakeRangeImageService(self.data,
+                                              direct_path='/tmp/image')
+
+        self._fetch(image_service)
+
+        with open(self.path, 'rb') as image_file:
+            self.assertEqual(self.data, image_file.read())
+        self.assertEqual([], image_service.range_calls)
+
+    def test_fetch_ranges_range_error(self):
+        self.override_config('image_download_workers', 2)
+        image_service = FakeRangeImageService(os.urandom(5 * units.Mi),
+                                              fail_offset=units.Mi)
+
+        self.assertRaises(exception.ImageDownloadFailed,
+                          self._fetch, image_service)
+        # The other ranges stopped before the file was removed.
+        self.assertEqual(0, image_service.active_ranges)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_fetch_ranges_disabled(self):
+        self.override_config('image_download_workers', 1)
+        image_service = FakeRangeImageService(self.data)
+
+        self._fetch(image_service)
+
+        with open(self.path, 'rb') as image_file:
+            self.assertEqual(self.data, image_file.read())
+        self.assertEqual([], image_service.range_calls)
+
+    def test_fetch_ranges_small_image(self):
+        image_service = FakeRangeImageService(self.data[:units.Mi])
+
+        self._fetch(image_service)
+
+        self.assertEqual([], image_service.range_calls)
+
+    def test_fetch_ranges_checksum_mismatch(self):
+        image_service = FakeRangeImageService(self.data)
+        image_service.show = mock.Mock(return_value={
+            'size': len(self.data),
+            'checksum': hashlib.md5(b'other').hexdigest()})
+
+        self.assertRaises(exception.ImageDownloadFailed,
+                          self._fetch, image_service)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_fetch_ranges_short_range(self):
+        image_service = FakeRangeImageService(self.data)
+        image_service.show = mock.Mock(return_value={
+            'size': len(self.data) + 1, 'checksum': None})
+
+        self.assertRaises(exception.ImageDownloadFailed,
+                          self._fetch, image_service)
+        self.assertFalse(os.path.exists(self.path))
+
+
 class MockVerifier(object):
     def update(self, data):
         return
@@ -924,6 +1168,55 @@ class TestFetchToVolumeFormat(test.TestCase):
                                              run_as_root=True,
                                              src_format='raw')
 
+    @mock.patch('cinder.image.image_utils.stream_to_volume')
+    @mock.patch('cinder.image.image_utils.convert_image')
+    @mock.patch('cinder.image.image_utils.fetch')
+    @mock.patch('cinder.image.image_utils.temporary_file')
+    def test_stream_raw(self, mock_temp, mock_fetch, mock_convert,
+                        mock_stream):
+        ctxt = mock.sentinel.context
+        image_service = FakeImageService()
+        image_meta = image_service.show(ctxt, fake.IMAGE_ID)
+
+        output = image_utils.fetch_to_volume_format(
+            ctxt, image_service, fake.IMAGE_ID, mock.sentinel.dest, 'raw',
+            mock.sentinel.blocksize, size=2, run_as_root=False)
+
+        self.assertIsNone(output)
+        mock_stream.assert_called_once_with(ctxt, image_service, image_meta,
+                                            mock.sentinel.dest, size=2,
+                                            run_as_root=False)
+        mock_temp.assert_not_called()
+        mock_fetch.assert_not_called()
+        mock_convert.assert_not_called()
+
+    @mock.patch('cinder.image.image_utils.stream_to_volume')
+    @mock.patch('cinder.image.image_utils.convert_image')
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    @mock.patch('cinder.image.image_utils.temporary_file')
+    def test_stream_raw_temporary_image(self, mock_temp, mock_info,
+                                        mock_convert, mock_stream):
+        ctxt = mock.sentinel.context
+        image_service = FakeImageService()
+        mock_info.return_value.file_format = 'raw'
+        mock_info.return_value.backing_file = None
+        mock_info.return_value.virtual_size = 1
+        tmp_images = image_utils.TemporaryImages.for_image_service(
+            image_service)
+        tmp_images.temporary_images[ctxt.user_id] = {
+            fake.IMAGE_ID: mock.sentinel.tmp_image}
+
+        image_utils.fetch_to_volume_format(
+            ctxt, image_service, fake.IMAGE_ID, mock.sentinel.dest, 'raw',
+            mock.sentinel.blocksize, run_as_root=False)
+
+        mock_stream.assert_not_called()
+        mock_convert.assert_called_once_with(mock.sentinel.tmp_image,
+                                             mock.sentinel.dest, 'raw',
+                                             out_subformat=None,
+                                             run_as_root=False,
+                                             src_format='raw')
+
     @mock.patch('cinder.image.image_utils.check_virtual_size')
     @mock.patch('cinder.image.image_utils.check_available_space')
     @mock.patch('cinder.image.image_utils.convert_image')
@@ -23,6 +23,7 @@ import six
 
 from castellan import key_manager
 import ddt
+import eventlet
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_utils import units
@@ -516,6 +517,7 @@ class OdirectSupportTestCase(test.TestCase):
                                           run_as_root=True)
 
 
+@ddt.ddt
 class ClearVolumeTestCase(test.TestCase):
     @mock.patch('cinder.volume.utils.copy_volume', return_value=None)
     @mock.patch('cinder.volume.utils.CONF')
@@ -524,6 +526,8 @@ class ClearVolumeTestCase(test.TestCase):
         mock_conf.volume_clear_size = 0
         mock_conf.volume_dd_blocksize = '1M'
         mock_conf.volume_clear_ionice = '-c3'
+        mock_conf.volume_clear_offload = False
+        mock_conf.volume_clear_workers = 1
         output = volume_utils.clear_volume(1024, 'volume_path')
         self.assertIsNone(output)
         mock_copy.assert_called_once_with('/dev/zero', 'volume_path', 1024,
@@ -538,6 +542,8 @@ class ClearVolumeTestCase(test.TestCase):
         mock_conf.volume_clear_size = 0
         mock_conf.volume_dd_blocksize = '1M'
         mock_conf.volume_clear_ionice = '-c3'
+        mock_conf.volume_clear_offload = False
+        mock_conf.volume_clear_workers = 1
         output = volume_utils.clear_volume(1024, 'volume_path', 'zero', 1,
                                            '-c0')
         self.assertIsNone(output)
@@ -555,6 +561,128 @@ class ClearVolumeTestCase(test.TestCase):
                           volume_utils.clear_volume,
                           1024, "volume_path")
 
+    def test_clear_steps(self):
+        self.mock_object(volume_utils, 'CLEAR_STEP_SIZE_MB', 2)
+        self.assertEqual([(0, 2 * units.Mi), (2 * units.Mi, 2 * units.Mi),
+                          (4 * units.Mi, units.Mi)],
+                         volume_utils._clear_steps(5))
+
+    @ddt.data(('0\n', ['-z']), ('1\n', []))
+    @ddt.unpack
+    @mock.patch('cinder.volume.utils.copy_volume')
+    @mock.patch('cinder.utils.execute')
+    def test_clear_volume_ioctl(self, disc_zero, flags, mock_exec,
+                                mock_copy):
+        self.mock_object(volume_utils, 'CLEAR_STEP_SIZE_MB', 512)
+        mock_exec.return_value = (disc_zero, '')
+        throttle = throttling.Throttle(['fake_throttle'])
+
+        volume_utils.clear_volume(1024, 'volume_path', 'zero', 0, '-c3',
+                                  throttle=throttle,
+                                  volume_clear_offload=True,
+                                  volume_clear_workers=1)
+
+        self.assertFalse(mock_copy.called)
+        mock_exec.assert_has_calls([
+            mock.call('lsblk', '-bdn', '-o', 'DISC-ZERO', 'volume_path'),
+            mock.call(*(['fake_throttle', 'ionice', '-c3', 'blkdiscard'] +
+                        flags + ['-o', 0, '-l', 512 * units.Mi,
+                                 'volume_path']), run_as_root=True),
+            mock.call(*(['fake_throttle', 'ionice', '-c3', 'blkdiscard'] +
+                        flags + ['-o', 512 * units.Mi, '-l', 512 * units.Mi,
+                                 'volume_path']), run_as_root=True)])
+
+    @mock.patch('cinder.volume.utils.copy_volume')
+    @mock.patch('cinder.utils.execute')
+    def test_clear_volume_ioctl_unsupported(self, mock_exec, mock_copy):
+        def execute(*cmd, **kwargs):
+            if cmd[0] == 'lsblk':
+                return '1\n', ''
+            raise processutils.ProcessExecutionError()
+
+        mock_exec.side_effect = execute
+
+        volume_utils.clear_volume(1024, 'volume_path', 'zero', 0, None,
+                                  volume_clear_offload=True,
+                                  volume_clear_workers=1)
+
+        discard_calls = [c for c in mock_exec.call_args_list
+                         if c[0][0] == 'blkdiscard']
+        self.assertEqual(2, len(discard_calls))
+        self.assertIn('-z', discard_calls[1][0])
+        mock_copy.assert_called_once_with(
+            '/dev/zero', 'volume_path', 1024, mock.ANY, sync=True,
+            execute=utils.execute, ionice=None, throttle=mock.ANY,
+            sparse=False)
+
+    @mock.patch('cinder.volume.utils.check_for_odirect_support',
+                return_value=True)
+    @mock.patch('cinder.volume.utils.copy_volume')
+    @mock.patch('cinder.utils.execute')
+    def test_clear_volume_with_writes(self, mock_exec, mock_copy,
+                                      mock_odirect):
+        self.mock_object(volume_utils, 'CLEAR_STEP_SIZE_MB', 512)
+        self.override_config('volume_dd_blocksize', '4M')
+
+        volume_utils.clear_volume(1024, 'volume_path', 'zero', 0, None,
+                                  volume_clear_offload=False,
+                                  volume_clear_workers=2)
+
+        self.assertFalse(mock_copy.called)
+        self.assertEqual(2, mock_exec.call_count)
+        for offset in (0, 512 * units.Mi):
+            mock_exec.assert_any_call(
+                'dd', 'if=/dev/zero', 'of=volume_path', 'bs=4M',
+                'count=%d' % (512 * units.Mi), 'seek=%d' % offset,
+                'iflag=count_bytes', 'oflag=seek_bytes,direct',
+                run_as_root=True)
+
+    def test_run_clear_steps_error(self):
+        self.mock_object(volume_utils, 'CLEAR_STEP_SIZE_MB', 1)
+        running = set()
+        finished = []
+
+        def clear_step(offset, length):
+            running.add(offset)
+            if offset == 0:
+                eventlet.sleep(0)
+                running.remove(offset)
+                raise processutils.ProcessExecutionError()
+            for _i in range(3):
+                eventlet.sleep(0)
+            running.remove(offset)
+            finished.append(offset)
+
+        self.assertRaises(processutils.ProcessExecutionError,
+                          volume_utils._run_clear_steps, clear_step,
+                          'volume_path', 4, workers=2)
+
+        # The range already running when the first one failed was waited
+        # for, the ranges after it were never started.
+        self.assertEqual(set(), running)
+        self.assertEqual([units.Mi], finished)
+
+
+class PunchHoleTestCase(test.TestCase):
+    @mock.patch('ctypes.get_errno', return_value=95)
+    @mock.patch('ctypes.CDLL')
+    def test_punch_hole(self, mock_cdll, mock_errno):
+        mock_fallocate = mock_cdll.return_value.fallocate
+        mock_fallocate.return_value = 0
+
+        volume_utils.punch_hole(5, 4096, 8192)
+
+        args = mock_fallocate.call_args[0]
+        self.assertEqual((5, volume_utils.FALLOC_FL_PUNCH_HOLE |
+                          volume_utils.FALLOC_FL_KEEP_SIZE),
+                         args[:2])
+        self.assertEqual([4096, 8192], [arg.value for arg in args[2:]])
+
+        mock_fallocate.return_value = -1
+        exc = self.assertRaises(OSError, volume_utils.punch_hole,
+                                5, 4096, 8192)
+        self.assertEqual(95, exc.errno)
+
 
 class CopyVolumeTestCase(test.TestCase):
     @mock.patch('cinder.volume.utils.check_for_odirect_support',
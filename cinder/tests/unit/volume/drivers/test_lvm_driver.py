@@ -97,6 +97,122 @@ class LVMVolumeDriverTestCase(test_driver.BaseDriverTestCase):
                          'size': 123}
         lvm_driver._delete_volume(fake_snapshot, is_snapshot=True)
 
+    def _get_deferred_wipe_driver(self):
+        vg_obj = fake_lvm.FakeBrickLVM('cinder-volumes',
+                                       False,
+                                       None,
+                                       'default')
+        self.configuration.volume_clear = 'zero'
+        self.configuration.volume_clear_size = 0
+        self.configuration.lvm_type = 'default'
+        self.configuration.lvm_deferred_wipe = True
+        return lvm.LVMVolumeDriver(configuration=self.configuration,
+                                   vg_obj=vg_obj, db=db)
+
+    @mock.patch('eventlet.spawn')
+    def test_delete_volume_deferred_wipe(self, mock_spawn):
+        lvm_driver = self._get_deferred_wipe_driver()
+        volume = {'id': fake.VOLUME_ID, 'name': 'volume-' + fake.VOLUME_ID,
+                  'size': 2}
+
+        with mock.patch.object(lvm_driver, '_volume_not_present',
+                               return_value=False), \
+                mock.patch.object(lvm_driver.vg, 'lv_has_snapshot',
+                                  return_value=False, create=True), \
+                mock.patch.object(lvm_driver.vg, 'rename_volume',
+                                  create=True) as mock_rename, \
+                mock.patch.object(lvm_driver, '_clear_volume') as mock_clear:
+            lvm_driver.delete_volume(volume)
+
+        self.assertFalse(mock_clear.called)
+        mock_rename.assert_called_once_with('volume-' + fake.VOLUME_ID,
+                                            '_wipe-' + fake.VOLUME_ID)
+        worker = db.worker_get(self.context,
+                               resource_type=lvm.WIPE_RESOURCE_TYPE,
+                               resource_id=fake.VOLUME_ID)
+        self.assertEqual('wiping', worker.status)
+        self.assertEqual({fake.VOLUME_ID: 2.0}, lvm_driver._pending_wipes)
+        mock_spawn.assert_called_once_with(lvm_driver._run_deferred_wipes)
+
+    @mock.patch('eventlet.spawn')
+    def test_delete_volume_deferred_wipe_rename_error(self, mock_spawn):
+        lvm_driver = self._get_deferred_wipe_driver()
+        volume = {'id': fake.VOLUME_ID, 'name': 'volume-' + fake.VOLUME_ID,
+                  'size': 2}
+
+        with mock.patch.object(lvm_driver, '_volume_not_present',
+                               return_value=False), \
+                mock.patch.object(lvm_driver.vg, 'lv_has_snapshot',
+                                  return_value=False, create=True), \
+                mock.patch.object(
+                    lvm_driver.vg, 'rename_volume', create=True,
+                    side_effect=processutils.ProcessExecutionError):
+            self.assertRaises(processutils.ProcessExecutionError,
+                              lvm_driver.delete_volume, volume)
+
+        self.assertListEqual([], db.worker_get_all(self.context))
+        self.assertEqual({}, lvm_driver._pending_wipes)
+        self.assertFalse(mock_spawn.called)
+
+    def test_run_deferred_wipes(self):
+        lvm_driver = self._get_deferred_wipe_driver()
+        db.worker_create(self.context, status='wiping',
+                         resource_type=lvm.WIPE_RESOURCE_TYPE,
+                         resource_id=fake.VOLUME_ID)
+        db.worker_create(self.context, status='wiping',
+                         resource_type=lvm.WIPE_RESOURCE_TYPE,
+                         resource_id=fake.VOLUME2_ID)
+        lvm_driver._pending_wipes = {fake.VOLUME_ID: 1.5,
+                                     fake.VOLUME2_ID: 1.0}
+
+        def clear_volume(volume, throttle=None):
+            if volume['id'] == fake.VOLUME2_ID:
+                raise exception.VolumeBackendAPIException(data='fake')
+
+        with mock.patch.object(lvm_driver, '_clear_volume',
+                               side_effect=clear_volume) as mock_clear, \
+                mock.patch.object(lvm_driver.vg, 'delete',
+                                  create=True) as mock_delete:
+            lvm_driver._run_deferred_wipes()
+
+        mock_clear.assert_has_calls([
+            mock.call({'id': fake.VOLUME_ID,
+                       'name': '_wipe-' + fake.VOLUME_ID, 'size': 2},
+                      throttle=lvm_driver._wipe_throttle),
+            mock.call({'id': fake.VOLUME2_ID,
+                       'name': '_wipe-' + fake.VOLUME2_ID, 'size': 1},
+                      throttle=lvm_driver._wipe_throttle)],
+            any_order=True)
+        mock_delete.assert_called_once_with('_wipe-' + fake.VOLUME_ID)
+        # The failed wipe is kept to be retried on restart
+        workers = db.worker_get_all(self.context)
+        self.assertEqual([fake.VOLUME2_ID], [w.resource_id for w in workers])
+        self.assertEqual({}, lvm_driver._pending_wipes)
+        self.assertIsNone(lvm_driver._wipe_thread)
+
+    def test_resume_deferred_wipes(self):
+        lvm_driver = self._get_deferred_wipe_driver()
+        db.worker_create(self.context, status='wiping',
+                         resource_type=lvm.WIPE_RESOURCE_TYPE,
+                         resource_id=fake.VOLUME_ID)
+        db.worker_create(self.context, status='wiping',
+                         resource_type=lvm.WIPE_RESOURCE_TYPE,
+                         resource_id=fake.VOLUME2_ID)
+        lvs = [{'vg': 'cinder-volumes', 'name': '_wipe-' + fake.VOLUME_ID,
+                'size': '2.00'},
+               {'vg': 'cinder-volumes', 'name': 'volume-' + fake.VOLUME3_ID,
+                'size': '1.00'}]
+
+        with mock.patch.object(lvm_driver.vg, 'get_volumes',
+                               return_value=lvs), \
+                mock.patch.object(lvm_driver,
+                                  '_queue_deferred_wipe') as mock_queue:
+            lvm_driver._resume_deferred_wipes()
+
+        mock_queue.assert_called_once_with(fake.VOLUME_ID, '2.00')
+        workers = db.worker_get_all(self.context)
+        self.assertEqual([fake.VOLUME_ID], [w.resource_id for w in workers])
+
     @mock.patch.object(volutils, 'get_all_volume_groups',
                        return_value=[{'name': 'cinder-volumes'}])
     @mock.patch('cinder.brick.local_dev.lvm.LVM.get_lvm_version',
@@ -952,6 +1068,7 @@ class LVMISCSITestCase(test_driver.BaseDriverTestCase):
             float('5.0'), stats['pools'][0]['provisioned_capacity_gb'])
         self.assertEqual(
             int('1'), stats['pools'][0]['total_volumes'])
+        self.assertEqual(0, stats['pools'][0]['pending_wipe_capacity_gb'])
         self.assertFalse(stats['sparse_copy_volume'])
 
         # Check value of sparse_copy_volume for thin enabled case.
@@ -1043,3 +1160,23 @@ class LVMISCSITestCase(test_driver.BaseDriverTestCase):
                                                             host2_connector))
             mock_term_conn.assert_has_calls([mock.call(vol, host1_connector),
                                              mock.call(vol, host2_connector)])
+
+    def test_lvm_ensure_exports(self):
+        self.configuration = conf.Configuration(None)
+        vg_obj = mock.Mock()
+        lvm_driver = lvm.LVMVolumeDriver(configuration=self.configuration,
+                                         db=db, vg_obj=vg_obj)
+        volumes = [{'id': fake.VOLUME_ID, 'name': 'volume-1'},
+                   {'id': fake.VOLUME2_ID, 'name': 'volume-2'}]
+        error = exception.VolumeBackendAPIException(data='')
+        vg_obj.activate_lv.side_effect = [None, error]
+
+        with mock.patch.object(lvm_driver.target_driver, 'ensure_exports',
+                               return_value={}) as mock_exports:
+            failed = lvm_driver.ensure_exports(self.context, volumes)
+
+        # Volumes whose LV can't be activated are not exported
+        mock_exports.assert_called_once_with(
+            self.context, volumes[:1],
+            {fake.VOLUME_ID: '/dev/cinder-volumes/volume-1'})
+        self.assertEqual({fake.VOLUME2_ID: error}, failed)
@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import math
 import os
 import tempfile
@@ -24,6 +25,7 @@ import ddt
 import mock
 from mock import call
 from oslo_utils import imageutils
+from oslo_utils import timeutils
 from oslo_utils import units
 
 from cinder import context
@@ -190,6 +192,9 @@ class RBDTestCase(test.TestCase):
         self.cfg.rados_connection_retries = 3
         self.cfg.rados_connection_interval = 5
         self.cfg.backup_use_temp_snapshot = False
+        self.cfg.rbd_usage_rescan_interval = 0
+        self.cfg.rbd_connection_pool_size = 0
+        self.cfg.rbd_connection_max_idle = 300
 
         mock_exec = mock.Mock()
         mock_exec.return_value = ('', '')
@@ -462,6 +467,8 @@ class RBDTestCase(test.TestCase):
         client.__enter__.assert_called_once_with()
         client.__exit__.assert_called_once_with(None, None, None)
         mock_enable_repl.assert_not_called()
+        self.assertEqual({self.volume_a.name: self.volume_a.size * units.Gi},
+                         self.driver._image_sizes)
 
     @common_mocks
     @mock.patch.object(driver.RBDDriver, '_enable_replication')
@@ -635,6 +642,8 @@ class RBDTestCase(test.TestCase):
         client = self.mock_client.return_value
 
         self.driver.rbd.Image.return_value.list_snaps.return_value = []
+        self.driver._image_sizes = {self.volume_a.name: units.Gi,
+                                    self.volume_b.name: units.Gi}
 
         with mock.patch.object(self.driver, '_get_clone_info') as \
                 mock_get_clone_info:
@@ -658,6 +667,8 @@ class RBDTestCase(test.TestCase):
                     self.driver.rbd.Image.return_value.unprotect_snap.called)
                 self.assertEqual(
                     1, self.driver.rbd.RBD.return_value.remove.call_count)
+                self.assertEqual({self.volume_b.name: units.Gi},
+                                 self.driver._image_sizes)
 
     @common_mocks
     def delete_volume_not_found(self):
@@ -1837,6 +1848,79 @@ class RBDTestCase(test.TestCase):
         self.assertEqual(
             3, self.mock_rados.Rados.return_value.shutdown.call_count)
 
+    def _setup_connection_pool(self, size=2):
+        self.cfg.rbd_connection_pool_size = size
+        self.cfg.rados_connect_timeout = -1
+        with mock.patch.object(self.driver.configuration, 'safe_get',
+                               return_value=None):
+            self.driver.do_setup(self.context)
+        self.mock_rados.Rados.side_effect = lambda **kwargs: mock.Mock(
+            state='connected',
+            **{'open_ioctx.return_value': mock.Mock(state='open')})
+
+    @common_mocks
+    def test_connect_to_rados_pooled(self):
+        self._setup_connection_pool()
+
+        client, ioctx = self.driver._connect_to_rados()
+        self.driver._disconnect_from_rados(client, ioctx)
+        ret = self.driver._connect_to_rados()
+
+        self.assertEqual((client, ioctx), ret)
+        self.mock_rados.Rados.assert_called_once_with(
+            rados_id=self.cfg.rbd_user, clustername=self.cfg.rbd_cluster_name,
+            conffile=self.cfg.rbd_ceph_conf)
+        ioctx.close.assert_not_called()
+        client.shutdown.assert_not_called()
+
+        # Connections to other pools are not shared
+        ret = self.driver._connect_to_rados('alt_pool')
+        self.assertNotEqual(client, ret[0])
+
+    @common_mocks
+    def test_connect_to_rados_pooled_stale(self):
+        self._setup_connection_pool()
+
+        client, ioctx = self.driver._connect_to_rados()
+        self.driver._disconnect_from_rados(client, ioctx)
+        ioctx.state = 'closed'
+        ret = self.driver._connect_to_rados()
+
+        self.assertNotEqual(client, ret[0])
+        ioctx.close.assert_called_once_with()
+        client.shutdown.assert_called_once_with()
+
+    @common_mocks
+    def test_connect_to_rados_pooled_idle(self):
+        self._setup_connection_pool()
+
+        client, ioctx = self.driver._connect_to_rados()
+        self.driver._disconnect_from_rados(client, ioctx)
+        with mock.patch.object(timeutils, 'utcnow',
+                               return_value=timeutils.utcnow() +
+                               datetime.timedelta(seconds=301)):
+            ret = self.driver._connect_to_rados()
+
+        self.assertNotEqual(client, ret[0])
+        client.shutdown.assert_called_once_with()
+
+    @common_mocks
+    def test_disconnect_from_rados_pool_full(self):
+        self._setup_connection_pool(size=1)
+
+        conns = [self.driver._connect_to_rados() for i in range(2)]
+        for client, ioctx in conns:
+            self.driver._disconnect_from_rados(client, ioctx)
+
+        conns[0][0].shutdown.assert_not_called()
+        conns[1][1].close.assert_called_once_with()
+        conns[1][0].shutdown.assert_called_once_with()
+
+        # Failing over closes the idle connections
+        self.driver._replication_targets = [{'name': 'secondary'}]
+        self.driver.failover_completed(self.context, 'secondary')
+        conns[0][0].shutdown.assert_called_once_with()
+
     @common_mocks
     def test_failover_host_no_replication(self):
         self.driver._is_replication_enabled = False
@@ -2137,6 +2221,58 @@ class RBDTestCase(test.TestCase):
 
         self.assertEqual(3.00, total_provision)
 
+    @mock.patch('cinder.volume.drivers.rbd.RBDVolumeProxy')
+    @mock.patch('cinder.volume.drivers.rbd.RADOSClient')
+    @mock.patch('cinder.volume.drivers.rbd.RBDDriver.RBDProxy')
+    def test__get_usage_info_cached(self, rbdproxy_mock, client_mock,
+                                    volproxy_mock):
+        self.cfg.rbd_usage_rescan_interval = 3600
+        self.driver._usage_rescanned_at = timeutils.utcnow()
+        self.driver._image_sizes = {'volume-1': 1 * units.Gi,
+                                    'removed': 4 * units.Gi}
+        client = client_mock.return_value.__enter__.return_value
+        rbdproxy_mock.return_value.list.return_value = ['volume-1', 'new']
+        volproxy_mock.return_value.__enter__.return_value.size.return_value = (
+            2 * units.Gi)
+
+        total_provision = self.driver._get_usage_info()
+
+        # Only the image that is not cached is opened
+        volproxy_mock.assert_called_once_with(
+            self.driver, 'new', read_only=True, client=client.cluster,
+            ioctx=client.ioctx)
+        self.assertEqual({'volume-1': 1 * units.Gi, 'new': 2 * units.Gi},
+                         self.driver._image_sizes)
+        self.assertEqual(3.00, total_provision)
+
+    @mock.patch('cinder.volume.drivers.rbd.RBDVolumeProxy')
+    @mock.patch('cinder.volume.drivers.rbd.RADOSClient')
+    @mock.patch('cinder.volume.drivers.rbd.RBDDriver.RBDProxy')
+    def test__get_usage_info_rescan(self, rbdproxy_mock, client_mock,
+                                    volproxy_mock):
+        self.cfg.rbd_usage_rescan_interval = 3600
+        rescanned_at = timeutils.utcnow() - datetime.timedelta(hours=2)
+        self.driver._usage_rescanned_at = rescanned_at
+        self.driver._image_sizes = {'volume-1': 1 * units.Gi}
+        rbdproxy_mock.return_value.list.return_value = ['volume-1']
+        volproxy_mock.return_value.__enter__.return_value.size.return_value = (
+            5 * units.Gi)
+
+        total_provision = self.driver._get_usage_info()
+
+        # Cached images are read again on a full rescan
+        volproxy_mock.assert_called_once()
+        self.assertEqual({'volume-1': 5 * units.Gi},
+                         self.driver._image_sizes)
+        self.assertEqual(5.00, total_provision)
+        self.assertGreater(self.driver._usage_rescanned_at, rescanned_at)
+
+    @common_mocks
+    def test__resize_tracks_size(self):
+        self.driver._resize(self.volume_a, size=20 * units.Gi)
+        self.assertEqual({self.volume_a.name: 20 * units.Gi},
+                         self.driver._image_sizes)
+
     def test_migrate_volume_bad_volume_status(self):
         self.volume_a.status = 'in-use'
         ret = self.driver.migrate_volume(context, self.volume_a, None)
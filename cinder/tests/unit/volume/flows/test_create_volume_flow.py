@@ -1546,6 +1546,107 @@ class CreateVolumeFlowManagerImageCacheTestCase(test.TestCase):
             image_meta=image_meta
         )
 
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    @mock.patch('cinder.image.image_utils.check_available_space')
+    @mock.patch('cinder.image.image_utils.verify_glance_image_signature')
+    def test_create_from_image_stream_raw(
+            self, mock_verify, mock_check_space, mock_qemu_info,
+            mock_get_internal_context,
+            mock_create_from_img_dl, mock_create_from_src,
+            mock_handle_bootable, mock_fetch_img):
+        mock_get_internal_context.return_value = None
+        self.mock_driver.clone_image.return_value = (None, False)
+        self.mock_driver.STREAMS_RAW_IMAGES = True
+        self.mock_driver.configuration.safe_get.return_value = None
+        volume = fake_volume.fake_volume_obj(self.ctxt,
+                                             host='host@backend#pool')
+
+        image_location = 'someImageLocationStr'
+        image_id = fakes.IMAGE_ID
+        image_meta = {'id': image_id,
+                      'disk_format': 'raw',
+                      'container_format': 'bare',
+                      'size': 1073741824}
+
+        manager = create_volume_manager.CreateVolumeFromSpecTask(
+            self.mock_volume_manager,
+            self.mock_db,
+            self.mock_driver,
+            image_volume_cache=self.mock_cache
+        )
+
+        manager._create_from_image(self.ctxt,
+                                   volume,
+                                   image_location,
+                                   image_id,
+                                   image_meta,
+                                   self.mock_image_service)
+
+        # The image is written straight into the volume, it is not
+        # downloaded to image_conversion_dir nor inspected there.
+        mock_check_space.assert_not_called()
+        mock_fetch_img.assert_not_called()
+        mock_qemu_info.assert_not_called()
+        mock_verify.assert_not_called()
+        mock_bulk_create = self.mock_db.volume_glance_metadata_bulk_create
+        mock_bulk_create.assert_called_once_with(
+            self.ctxt, volume.id, {'signature_verified': False})
+        mock_create_from_img_dl.assert_called_once_with(
+            self.ctxt,
+            volume,
+            image_location,
+            image_meta,
+            self.mock_image_service
+        )
+
+    @ddt.data((False, None), (True, 'qcow2'))
+    @ddt.unpack
+    @mock.patch('cinder.image.image_utils.qemu_img_info')
+    @mock.patch('cinder.image.image_utils.check_available_space')
+    def test_create_from_image_raw_not_streamed(
+            self, streams_raw_images, volume_format, mock_check_space,
+            mock_qemu_info, mock_get_internal_context,
+            mock_create_from_img_dl, mock_create_from_src,
+            mock_handle_bootable, mock_fetch_img):
+        self.override_config('verify_glance_signatures', 'disabled')
+        mock_get_internal_context.return_value = None
+        self.mock_driver.clone_image.return_value = (None, False)
+        self.mock_driver.STREAMS_RAW_IMAGES = streams_raw_images
+        self.mock_driver.configuration.safe_get.return_value = volume_format
+        image_info = imageutils.QemuImgInfo()
+        image_info.virtual_size = '1073741824'
+        mock_qemu_info.return_value = image_info
+        volume = fake_volume.fake_volume_obj(self.ctxt,
+                                             host='host@backend#pool')
+
+        image_location = 'someImageLocationStr'
+        image_id = fakes.IMAGE_ID
+        image_meta = {'id': image_id,
+                      'disk_format': 'raw',
+                      'container_format': 'bare',
+                      'size': 1073741824}
+
+        manager = create_volume_manager.CreateVolumeFromSpecTask(
+            self.mock_volume_manager,
+            self.mock_db,
+            self.mock_driver,
+            image_volume_cache=self.mock_cache
+        )
+
+        manager._create_from_image(self.ctxt,
+                                   volume,
+                                   image_location,
+                                   image_id,
+                                   image_meta,
+                                   self.mock_image_service)
+
+        # Drivers that stage or convert the image keep the early space check
+        # and the download to image_conversion_dir.
+        mock_check_space.assert_called_once_with(
+            mock.ANY, image_meta['size'], image_id)
+        mock_fetch_img.assert_called_once_with(
+            self.mock_image_service, self.ctxt, image_id, 'host@backend')
+
     @ddt.data(
         NotImplementedError('Driver does not support clone'),
         exception.CinderException('Error during cloning'))
@@ -2136,3 +2237,75 @@ class CreateVolumeFlowManagerImageCacheTestCase(test.TestCase):
                 image_meta,
                 self.mock_image_service,
                 update_cache=True)
+
+    @mock.patch('cinder.coordination.COORDINATOR.get_lock')
+    @mock.patch('cinder.volume.flows.manager.create_volume.'
+                'CreateVolumeFromSpecTask.'
+                '_create_from_image_cache_or_download')
+    def test_prepare_image_cache_entry_lock(
+            self,
+            mock_create_from_image_cache_or_download,
+            mock_get_lock,
+            mock_get_internal_context,
+            mock_create_from_img_dl, mock_create_from_src,
+            mock_handle_bootable, mock_fetch_img):
+        self.mock_cache.get_entry.return_value = None
+        volume = fake_volume.fake_volume_obj(self.ctxt,
+                                             id=fakes.VOLUME_ID,
+                                             host='host@backend#pool')
+        image_id = fakes.IMAGE_ID
+        lock = mock_get_lock.return_value
+        lock.acquire.return_value = True
+
+        manager = create_volume_manager.CreateVolumeFromSpecTask(
+            self.mock_volume_manager,
+            self.mock_db,
+            self.mock_driver,
+            image_volume_cache=self.mock_cache
+        )
+        model_update, cloned = manager._prepare_image_cache_entry(
+            self.ctxt, volume, 'someImageLocationStr', image_id, {},
+            self.mock_image_service)
+
+        self.assertTrue(cloned)
+        mock_get_lock.assert_called_once_with(
+            '%s-host@backend#pool' % image_id)
+        lock.acquire.assert_called_once_with(blocking=False)
+        lock.release.assert_called_once_with()
+        mock_create_from_image_cache_or_download.assert_called_once()
+
+    @mock.patch('cinder.coordination.COORDINATOR.get_lock')
+    @mock.patch('cinder.volume.flows.manager.create_volume.'
+                'CreateVolumeFromSpecTask.'
+                '_create_from_image_cache_or_download')
+    def test_prepare_image_cache_entry_in_progress(
+            self,
+            mock_create_from_image_cache_or_download,
+            mock_get_lock,
+            mock_get_internal_context,
+            mock_create_from_img_dl, mock_create_from_src,
+            mock_handle_bootable, mock_fetch_img):
+        volume = fake_volume.fake_volume_obj(self.ctxt,
+                                             id=fakes.VOLUME_ID,
+                                             host='host@backend#pool')
+        lock = mock_get_lock.return_value
+        lock.acquire.return_value = False
+
+        manager = create_volume_manager.CreateVolumeFromSpecTask(
+            self.mock_volume_manager,
+            self.mock_db,
+            self.mock_driver,
+            image_volume_cache=self.mock_cache
+        )
+        model_update, cloned = manager._prepare_image_cache_entry(
+            self.ctxt, volume, 'someImageLocationStr', fakes.IMAGE_ID, {},
+            self.mock_image_service)
+
+        # Another request is creating the entry, so wait for it and let the
+        # caller clone from the cache (or download if it wasn't created).
+        self.assertFalse(cloned)
+        self.assertIsNone(model_update)
+        lock.assert_called_once_with(True)
+        lock.release.assert_not_called()
+        self.mock_cache.get_entry.assert_not_called()
+        mock_create_from_image_cache_or_download.assert_not_called()
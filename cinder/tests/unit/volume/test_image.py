@@ -373,7 +373,8 @@ class ImageVolumeCacheTestCase(base.BaseVolumeTestCase):
         opts = {
             'image_volume_cache_enabled': True,
             'image_volume_cache_max_size_gb': 100,
-            'image_volume_cache_max_count': 20
+            'image_volume_cache_max_count': 20,
+            'image_volume_cache_eviction_policy': 'lfu',
         }
 
         def conf_get(option):
@@ -396,6 +397,50 @@ class ImageVolumeCacheTestCase(base.BaseVolumeTestCase):
         self.assertIsNotNone(manager.image_volume_cache)
         self.assertEqual(100, manager.image_volume_cache.max_cache_size_gb)
         self.assertEqual(20, manager.image_volume_cache.max_cache_size_count)
+        self.assertEqual('lfu', manager.image_volume_cache.eviction_policy)
+
+    @mock.patch('cinder.image.glance.get_remote_image_service')
+    @mock.patch('cinder.context.get_internal_tenant_context')
+    def test_warm_image_cache(self, mock_get_internal_context,
+                              mock_get_image_service):
+        internal_context = cinder.context.RequestContext(fake.USER2_ID,
+                                                         fake.PROJECT2_ID)
+        mock_get_internal_context.return_value = internal_context
+        mock_get_image_service.return_value = (FakeImageService(),
+                                               fake.IMAGE_ID)
+        self.volume.image_volume_cache = mock.Mock()
+
+        def create_volume(ctxt, volume, request_spec, allow_reschedule):
+            volume.status = 'available'
+            volume.save()
+
+        with mock.patch.object(self.volume, 'create_volume',
+                               side_effect=create_volume) as mock_create, \
+                mock.patch.object(self.volume,
+                                  'delete_volume') as mock_delete:
+            self.volume.warm_image_cache(self.context, fake.IMAGE_ID,
+                                         'pool1')
+
+        volume = mock_create.call_args[0][1]
+        self.assertEqual(self.volume.host + '#pool1', volume.host)
+        self.assertEqual(2, volume.size)
+        self.assertEqual(fake.PROJECT2_ID, volume.project_id)
+        self.assertEqual(fake.IMAGE_ID,
+                         mock_create.call_args[0][2].image_id)
+        mock_create.assert_called_once_with(self.context, volume, mock.ANY,
+                                            allow_reschedule=False)
+        mock_delete.assert_called_once_with(internal_context, volume)
+
+    @mock.patch('cinder.context.get_internal_tenant_context')
+    def test_warm_image_cache_disabled(self, mock_get_internal_context):
+        self.volume.image_volume_cache = None
+
+        with mock.patch.object(self.volume, 'create_volume') as mock_create:
+            self.volume.warm_image_cache(self.context, fake.IMAGE_ID,
+                                         'pool1')
+
+        mock_get_internal_context.assert_not_called()
+        mock_create.assert_not_called()
 
     def test_delete_image_volume(self):
         volume_params = {
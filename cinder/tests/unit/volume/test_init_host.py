@@ -19,6 +19,7 @@ import mock
 from oslo_config import cfg
 
 from cinder import context
+from cinder import exception
 from cinder import objects
 from cinder.tests.unit import utils as tests_utils
 from cinder.tests.unit import volume as base
@@ -281,3 +282,73 @@ class VolumeInitHostTestCase(base.BaseVolumeTestCase):
         mock_add_threadpool.assert_called_once_with(
             mock_migrate_fixed_key,
             volumes=mock_get_my_volumes())
+
+    @mock.patch('cinder.manager.CleanableManager.init_host')
+    def test_init_host_ensure_exports(self, init_host_mock):
+        vol0 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+        vol1 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+        tests_utils.create_volume(self.context, host=CONF.host)
+
+        with mock.patch.object(self.volume.driver, 'ensure_exports',
+                               return_value={vol1.id: Exception()}) as m_exp:
+            self.volume.init_host(service_id=self.service_id)
+
+        m_exp.assert_called_once_with(mock.ANY, mock.ANY)
+        self.assertEqual({vol0.id, vol1.id},
+                         {v.id for v in m_exp.call_args[0][1]})
+        vol0.refresh()
+        vol1.refresh()
+        self.assertEqual('in-use', vol0.status)
+        self.assertEqual('error', vol1.status)
+        self.assertTrue(self.volume.driver.initialized)
+
+    @mock.patch('cinder.manager.CleanableManager.init_host')
+    def test_init_host_ensure_exports_error(self, init_host_mock):
+        vol0 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+        vol1 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+
+        def _ensure_export(ctxt, volume):
+            if volume.id == vol1.id:
+                raise Exception()
+
+        with mock.patch.object(self.volume.driver, 'ensure_exports',
+                               side_effect=exception.CinderException), \
+                mock.patch.object(self.volume.driver, 'ensure_export',
+                                  side_effect=_ensure_export) as m_export:
+            self.volume.init_host(service_id=self.service_id)
+
+        self.assertEqual(2, m_export.call_count)
+        vol0.refresh()
+        vol1.refresh()
+        self.assertEqual('in-use', vol0.status)
+        self.assertEqual('error', vol1.status)
+        self.assertTrue(self.volume.driver.initialized)
+
+    @mock.patch('cinder.manager.CleanableManager.init_host')
+    def test_init_host_ensure_export_one_at_a_time(self, init_host_mock):
+        self.override_config('init_host_export_workers', 2,
+                             group='backend_defaults')
+        vol0 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+        vol1 = tests_utils.create_volume(self.context, status='in-use',
+                                         host=CONF.host)
+
+        def _ensure_export(ctxt, volume):
+            if volume.id == vol1.id:
+                raise Exception()
+
+        with mock.patch.object(self.volume.driver, 'ensure_exports',
+                               side_effect=NotImplementedError), \
+                mock.patch.object(self.volume.driver, 'ensure_export',
+                                  side_effect=_ensure_export) as m_export:
+            self.volume.init_host(service_id=self.service_id)
+
+        self.assertEqual(2, m_export.call_count)
+        vol0.refresh()
+        vol1.refresh()
+        self.assertEqual('in-use', vol0.status)
+        self.assertEqual('error', vol1.status)
@@ -586,6 +586,18 @@ class VolumeRPCAPITestCase(test.RPCAPITestCase):
                            log_request='log_request',
                            version='3.12')
 
+    @mock.patch('oslo_messaging.RPCClient.can_send_version', mock.Mock())
+    def test_warm_image_cache(self):
+        service = objects.Service(self.context, host='host1',
+                                  cluster_name=None)
+        self._test_rpc_api('warm_image_cache',
+                           rpc_method='cast',
+                           server=service.host,
+                           service=service,
+                           image_id=fake.IMAGE_ID,
+                           pool='pool1',
+                           version='3.17')
+
     @mock.patch('oslo_messaging.RPCClient.can_send_version', mock.Mock())
     def test_get_log_levels(self):
         service = objects.Service(self.context, host='host1')
@@ -28,6 +28,7 @@ import mock
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_utils import imageutils
+from oslo_utils import timeutils
 import six
 from taskflow.engines.action_engine import engine
 
@@ -175,6 +176,94 @@ class VolumeTestCase(base.BaseVolumeTestCase):
                     self.assertTrue(m_get_stats.called)
                     mock_update.assert_called_once_with(expected)
 
+    def test_get_driver_volume_stats_no_timeout(self):
+        manager = vol_manager.VolumeManager()
+        stats = {'name': 'cinder-volumes'}
+        with mock.patch.object(manager.driver, 'get_volume_stats',
+                               return_value=stats) as m_get_stats:
+            self.assertEqual(stats, manager._get_driver_volume_stats())
+        m_get_stats.assert_called_once_with(refresh=True)
+        self.assertIsNone(manager._stats_refresh)
+        self.assertIsNone(manager._last_volume_stats)
+
+    def test_get_driver_volume_stats_refreshed(self):
+        self.override_config('backend_stats_refresh_timeout', 5,
+                             group='backend_defaults')
+        manager = vol_manager.VolumeManager()
+        stats = {'name': 'cinder-volumes'}
+        with mock.patch.object(manager.driver, 'get_volume_stats',
+                               return_value=stats):
+            self.assertEqual(stats, manager._get_driver_volume_stats())
+        self.assertIsNone(manager._stats_refresh)
+        self.assertEqual(stats, manager._last_volume_stats[0])
+
+    @mock.patch.object(vol_manager, 'LOG')
+    def test_get_driver_volume_stats_slow_refresh(self, mock_log):
+        self.override_config('backend_stats_refresh_timeout', 1,
+                             group='backend_defaults')
+        manager = vol_manager.VolumeManager()
+        stats = {'name': 'cinder-volumes'}
+        collected_at = timeutils.utcnow() - datetime.timedelta(seconds=30)
+        manager._last_volume_stats = (stats, collected_at)
+        refresh = mock.Mock()
+        refresh.wait.side_effect = lambda: eventlet.sleep(2)
+        manager._stats_refresh = refresh
+
+        result = manager._get_driver_volume_stats()
+
+        self.assertEqual('cinder-volumes', result['name'])
+        self.assertGreaterEqual(result['stats_age'], 30)
+        # The refresh is left running and the last stats are not modified.
+        self.assertIs(refresh, manager._stats_refresh)
+        self.assertNotIn('stats_age', stats)
+        self.assertIn("didn't finish in 1 seconds",
+                      mock_log.warning.call_args[0][0] %
+                      mock_log.warning.call_args[0][1])
+
+    @mock.patch.object(vol_manager, 'LOG')
+    def test_get_driver_volume_stats_failed_refresh(self, mock_log):
+        self.override_config('backend_stats_refresh_timeout', 1,
+                             group='backend_defaults')
+        manager = vol_manager.VolumeManager()
+        stats = {'name': 'cinder-volumes'}
+        collected_at = timeutils.utcnow() - datetime.timedelta(seconds=30)
+        manager._last_volume_stats = (stats, collected_at)
+        refresh = mock.Mock()
+        refresh.wait.side_effect = exception.VolumeBackendAPIException(
+            data='fake')
+        manager._stats_refresh = refresh
+
+        result = manager._get_driver_volume_stats()
+
+        self.assertEqual('cinder-volumes', result['name'])
+        self.assertGreaterEqual(result['stats_age'], 30)
+        self.assertIsNone(manager._stats_refresh)
+        self.assertTrue(mock_log.exception.called)
+        self.assertIn('after a driver stats refresh failure',
+                      mock_log.warning.call_args[0][0])
+
+    def test_get_driver_volume_stats_none_collected(self):
+        self.override_config('backend_stats_refresh_timeout', 1,
+                             group='backend_defaults')
+        manager = vol_manager.VolumeManager()
+        refresh = mock.Mock()
+        refresh.wait.side_effect = lambda: eventlet.sleep(2)
+        manager._stats_refresh = refresh
+
+        self.assertIsNone(manager._get_driver_volume_stats())
+
+    @mock.patch.object(vol_manager.VolumeManager,
+                       'update_service_capabilities')
+    @mock.patch.object(vol_manager.VolumeManager, '_get_driver_volume_stats',
+                       return_value=None)
+    def test_report_driver_status_no_stats(self, mock_get_stats,
+                                           mock_update):
+        manager = vol_manager.VolumeManager()
+        manager.driver.set_initialized()
+        manager._report_driver_status(context.get_admin_context())
+        mock_get_stats.assert_called_once_with()
+        mock_update.assert_not_called()
+
     def test_is_working(self):
         # By default we have driver mocked to be initialized...
         self.assertTrue(self.volume.is_working())
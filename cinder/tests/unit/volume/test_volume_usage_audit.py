@@ -176,10 +176,8 @@ class GetActiveByWindowTestCase(base.BaseVolumeTestCase):
             datetime.datetime(1, 3, 1, 1, 1, 1),
             datetime.datetime(1, 4, 1, 1, 1, 1),
             project_id=fake.PROJECT_ID)
-        self.assertEqual(3, len(volumes))
-        self.assertEqual(fake.VOLUME2_ID, volumes[0].id)
-        self.assertEqual(fake.VOLUME3_ID, volumes[1].id)
-        self.assertEqual(fake.VOLUME4_ID, volumes[2].id)
+        self.assertEqual({fake.VOLUME2_ID, fake.VOLUME3_ID, fake.VOLUME4_ID},
+                         {volume.id for volume in volumes})
 
     def test_snapshot_get_all_active_by_window(self):
         # Find all all snapshots valid within a timeframe window.
@@ -251,7 +249,59 @@ class GetActiveByWindowTestCase(base.BaseVolumeTestCase):
             datetime.datetime(1, 4, 1, 1, 1, 1),
             project_id=fake.PROJECT_ID
         )
-        self.assertEqual(3, len(backups))
-        self.assertEqual(fake.BACKUP2_ID, backups[0].id)
-        self.assertEqual(fake.BACKUP3_ID, backups[1].id)
-        self.assertEqual(fake.BACKUP4_ID, backups[2].id)
+        self.assertEqual({fake.BACKUP2_ID, fake.BACKUP3_ID, fake.BACKUP4_ID},
+                         {backup.id for backup in backups})
+
+    def test_volume_get_all_active_by_window_in_batches(self):
+        for attrs in self.db_vol_attrs:
+            db.volume_create(self.ctx, attrs)
+        begin = datetime.datetime(1, 3, 1, 1, 1, 1)
+        end = datetime.datetime(1, 4, 1, 1, 1, 1)
+        expected = sorted([fake.VOLUME2_ID, fake.VOLUME3_ID,
+                           fake.VOLUME4_ID])
+
+        first = db.volume_get_all_active_by_window(self.context, begin, end,
+                                                   limit=2)
+        second = db.volume_get_all_active_by_window(
+            self.context, begin, end, marker=first[-1].id, limit=2)
+
+        self.assertEqual(expected[:2], [volume.id for volume in first])
+        self.assertEqual(expected[2:], [volume.id for volume in second])
+
+    def test_volume_get_all_active_by_window_project_range(self):
+        for i, attrs in enumerate(self.db_vol_attrs):
+            attrs['project_id'] = '%x' % (i * 4)
+            db.volume_create(self.ctx, attrs)
+
+        volumes = db.volume_get_all_active_by_window(
+            self.context, datetime.datetime(1, 3, 1, 1, 1, 1),
+            datetime.datetime(1, 4, 1, 1, 1, 1), project_range=('8', 'c'))
+
+        self.assertEqual([fake.VOLUME3_ID], [volume.id for volume in volumes])
+
+    def test_volume_list_get_all_active_by_window_fields(self):
+        db.volume_create(self.ctx, self.db_vol_attrs[3])
+
+        volumes = objects.VolumeList.get_all_active_by_window(
+            self.context, datetime.datetime(1, 3, 1, 1, 1, 1),
+            datetime.datetime(1, 4, 1, 1, 1, 1), limit=10,
+            fields=('project_id', 'host'))
+
+        self.assertEqual(1, len(volumes))
+        self.assertEqual(fake.VOLUME4_ID, volumes[0].id)
+        self.assertEqual('devstack', volumes[0].host)
+        self.assertFalse(volumes[0].obj_attr_is_set('volume_type'))
+        self.assertFalse(volumes[0].obj_attr_is_set('display_name'))
+
+    def test_backup_get_all_active_by_window_in_batches(self):
+        db.volume_create(self.context, {'id': fake.VOLUME_ID})
+        for attrs in self.db_back_attrs:
+            attrs['volume_id'] = fake.VOLUME_ID
+            db.backup_create(self.ctx, attrs)
+
+        backups = db.backup_get_all_active_by_window(
+            self.context, datetime.datetime(1, 3, 1, 1, 1, 1),
+            datetime.datetime(1, 4, 1, 1, 1, 1), marker=fake.BACKUP4_ID,
+            limit=1)
+
+        self.assertEqual([fake.BACKUP3_ID], [backup.id for backup in backups])
@@ -46,6 +46,7 @@ from cinder.objects import base as objects_base
 from cinder.objects import fields
 from cinder.objects import volume_type
 from cinder.policies import attachments as attachment_policy
+from cinder.policies import image_cache as image_cache_policy
 from cinder.policies import services as svr_policy
 from cinder.policies import snapshot_metadata as s_meta_policy
 from cinder.policies import snapshots as snapshot_policy
@@ -579,7 +580,7 @@ class API(base.Base):
 
     def get_all(self, context, marker=None, limit=None, sort_keys=None,
                 sort_dirs=None, filters=None, viewable_admin_meta=False,
-                offset=None):
+                offset=None, fields=None):
         context.authorize(vol_policy.GET_ALL_POLICY)
 
         if filters is None:
@@ -614,14 +615,15 @@ class API(base.Base):
                                                  sort_keys=sort_keys,
                                                  sort_dirs=sort_dirs,
                                                  filters=filters,
-                                                 offset=offset)
+                                                 offset=offset,
+                                                 fields=fields)
         else:
             if viewable_admin_meta:
                 context = context.elevated()
             volumes = objects.VolumeList.get_all_by_project(
                 context, context.project_id, marker, limit,
                 sort_keys=sort_keys, sort_dirs=sort_dirs, filters=filters,
-                offset=offset)
+                offset=offset, fields=fields)
 
         LOG.info("Get all volumes completed successfully.")
         return volumes
@@ -1748,6 +1750,29 @@ class API(base.Base):
 
         return service
 
+    def warm_image_cache(self, context, image_id, host=None,
+                         cluster_name=None):
+        """Add an image to the image-volume cache of a backend pool."""
+        context.authorize(image_cache_policy.WARM_POLICY)
+
+        pool = volume_utils.extract_host(host or cluster_name, 'pool')
+        if not pool:
+            msg = _('The host or cluster must include the pool, in the form '
+                    'host@backend#pool.')
+            raise exception.InvalidInput(reason=msg)
+
+        # Fail early if the image doesn't exist or the user cannot access it,
+        # the volume service will use the same context to download it.
+        self.image_service.show(context, image_id)
+
+        service = self._get_service_by_host_cluster(context, host,
+                                                    cluster_name,
+                                                    'image cache')
+        LOG.info('Adding image %(image_id)s to the image-volume cache of '
+                 '%(backend)s.', {'image_id': image_id,
+                                  'backend': host or cluster_name})
+        self.volume_rpcapi.warm_image_cache(context, service, image_id, pool)
+
     def manage_existing(self, context, host, cluster_name, ref, name=None,
                         description=None, volume_type=None, metadata=None,
                         availability_zone=None, bootable=False):
@@ -88,6 +88,19 @@ volume_opts = [
                help='The flag to pass to ionice to alter the i/o priority '
                     'of the process used to zero a volume after deletion, '
                     'for example "-c3" for idle only priority.'),
+    cfg.BoolOpt('volume_clear_offload',
+                default=False,
+                help='Zero old volumes with the BLKDISCARD ioctl when '
+                     'discarded blocks of the device read back as zeroes, '
+                     'or with the BLKZEROOUT ioctl, before falling back to '
+                     'writing zeroes with dd. Only used when volume_clear '
+                     'is zero.'),
+    cfg.IntOpt('volume_clear_workers',
+               default=1,
+               min=1,
+               help='Number of dd processes writing zeroes concurrently on '
+                    'ranges of an old volume when it cannot be cleared with '
+                    'the block layer ioctls.'),
     cfg.StrOpt('target_helper',
                default='tgtadm',
                choices=['tgtadm', 'lioadm', 'scstadmin', 'iscsictl',
@@ -248,6 +261,14 @@ volume_opts = [
                default=0,
                help='Max number of entries allowed in the image volume cache. '
                     '0 => unlimited.'),
+    cfg.StrOpt('image_volume_cache_eviction_policy',
+               default='lru',
+               choices=[('lru', 'Evict the least recently used entries.'),
+                        ('lfu', 'Evict the least frequently used entries.'),
+                        ('size', 'Evict the entries with the fewest cache '
+                                 'hits per GB.')],
+               help='Policy used to choose which entries to evict when the '
+                    'image volume cache is full.'),
     cfg.BoolOpt('report_discard_supported',
                 default=False,
                 help='Report to clients of Cinder that the backend supports '
@@ -355,6 +376,13 @@ class BaseVD(object):
     # method since the manager will do the check after that.
     SUPPORTS_ACTIVE_ACTIVE = False
 
+    # Drivers that write raw images straight into the volume's block device,
+    # like those using fetch_to_raw on the device path, can set this to have
+    # raw images streamed without staging them in image_conversion_dir.
+    # Drivers that stage images or convert them must leave it False so the
+    # space in image_conversion_dir is checked before the download.
+    STREAMS_RAW_IMAGES = False
+
     # If a driver hasn't maintained their CI system, this will get
     # set to False, which prevents the driver from starting.
     # Add enable_unsupported_driver = True in cinder.conf to get
@@ -1385,6 +1413,20 @@ class BaseVD(object):
         """Synchronously recreates an export for a volume."""
         return
 
+    def ensure_exports(self, context, volumes):
+        """Synchronously recreates the exports for a list of volumes.
+
+        Optional method used on service start instead of calling
+        ensure_export once per volume, for drivers that can recreate many
+        exports at once more efficiently.
+
+        :param context: Security context
+        :param volumes: List of volumes to export
+        :returns: Dictionary with the exception raised for each volume, by
+                  volume id, whose export could not be recreated.
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def create_export(self, context, volume, connector):
         """Exports the volume.
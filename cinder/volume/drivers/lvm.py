@@ -19,6 +19,7 @@ import math
 import os
 import socket
 
+import eventlet
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -28,13 +29,16 @@ from oslo_utils import units
 import six
 
 from cinder.brick.local_dev import lvm
+from cinder import context
 from cinder import exception
 from cinder.i18n import _
 from cinder.image import image_utils
 from cinder import interface
+from cinder import service
 from cinder import utils
 from cinder.volume import configuration
 from cinder.volume import driver
+from cinder.volume import throttling
 from cinder.volume import utils as volutils
 
 LOG = logging.getLogger(__name__)
@@ -67,12 +71,32 @@ volume_opts = [
     cfg.BoolOpt('lvm_suppress_fd_warnings',
                 default=False,
                 help='Suppress leaked file descriptor warnings in LVM '
-                     'commands.')
+                     'commands.'),
+    cfg.BoolOpt('lvm_deferred_wipe',
+                default=False,
+                help='Rename deleted volumes and clear them in the '
+                     'background instead of clearing them before the '
+                     'delete completes. Only applies to thick LVs when '
+                     'volume_clear is not "none". The size of the volumes '
+                     'waiting to be cleared is reported as '
+                     'pending_wipe_capacity_gb.'),
+    cfg.IntOpt('lvm_deferred_wipe_bps_limit',
+               default=0,
+               min=0,
+               help='Limit the bandwidth of the background clearing of '
+                    'deleted volumes to this many bytes per second using '
+                    'a blkio cgroup. 0 applies the volume_copy_bps_limit '
+                    'throttle instead.'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(volume_opts, group=configuration.SHARED_CONF_GROUP)
 
+# Deleted volumes waiting for a deferred wipe are renamed with this prefix
+# and tracked in the workers table with this resource type.
+WIPE_LV_PREFIX = '_wipe-'
+WIPE_RESOURCE_TYPE = 'LVMDeferredWipe'
+
 
 @interface.volumedriver
 class LVMVolumeDriver(driver.VolumeDriver):
@@ -83,6 +107,8 @@ class LVMVolumeDriver(driver.VolumeDriver):
     # ThirdPartySystems wiki page
     CI_WIKI_NAME = "Cinder_Jenkins"
 
+    STREAMS_RAW_IMAGES = True
+
     def __init__(self, vg_obj=None, *args, **kwargs):
         # Parent sets db, host, _execute and base config
         super(LVMVolumeDriver, self).__init__(*args, **kwargs)
@@ -111,6 +137,9 @@ class LVMVolumeDriver(driver.VolumeDriver):
             executor=self._execute)
         self.protocol = self.target_driver.protocol
         self._sparse_copy_volume = False
+        self._wipe_throttle = None
+        self._pending_wipes = {}
+        self._wipe_thread = None
 
     def _sizestr(self, size_in_g):
         return '%sg' % size_in_g
@@ -129,7 +158,7 @@ class LVMVolumeDriver(driver.VolumeDriver):
             name = self._escape_snapshot(volume['name'])
         self.vg.delete(name)
 
-    def _clear_volume(self, volume, is_snapshot=False):
+    def _clear_volume(self, volume, is_snapshot=False, throttle=None):
         # zero out old volumes to prevent data leaking between users
         # TODO(ja): reclaiming space should be done lazy and low priority
         if is_snapshot:
@@ -166,7 +195,109 @@ class LVMVolumeDriver(driver.VolumeDriver):
         volutils.clear_volume(
             vol_sz_in_meg, dev_path,
             volume_clear=self.configuration.volume_clear,
-            volume_clear_size=self.configuration.volume_clear_size)
+            volume_clear_size=self.configuration.volume_clear_size,
+            throttle=throttle,
+            volume_clear_offload=self.configuration.volume_clear_offload,
+            volume_clear_workers=self.configuration.volume_clear_workers)
+
+    def _wipe_lv_name(self, volume_id):
+        return WIPE_LV_PREFIX + volume_id
+
+    def _use_deferred_wipe(self):
+        return (self.configuration.lvm_deferred_wipe and
+                self.configuration.volume_clear != 'none' and
+                self.configuration.lvm_type != 'thin')
+
+    def _set_wipe_throttle(self):
+        bps_limit = self.configuration.lvm_deferred_wipe_bps_limit
+        cgroup_name = (self.configuration.safe_get(
+            'volume_copy_blkio_cgroup_name') or
+            CONF.volume_copy_blkio_cgroup_name)
+        self._wipe_throttle = None
+        if bps_limit:
+            try:
+                self._wipe_throttle = throttling.BlkioCgroup(
+                    bps_limit, '%s-wipe' % cgroup_name)
+            except processutils.ProcessExecutionError as err:
+                LOG.warning('Failed to activate deferred wipe throttling: '
+                            '%(err)s', {'err': err})
+
+    def _defer_delete_volume(self, volume):
+        """Hide a volume and queue it to be wiped in the background.
+
+        The workers table entry is created before renaming the LV, so if the
+        service stops in between the entry is discarded on restart and the
+        delete of the volume, which is still in deleting status, is retried.
+        """
+        ctxt = context.get_admin_context()
+        try:
+            self.db.worker_create(ctxt, resource_type=WIPE_RESOURCE_TYPE,
+                                  resource_id=volume['id'], status='wiping',
+                                  service_id=service.Service.service_id)
+        except exception.WorkerExists:
+            pass
+
+        wipe_name = self._wipe_lv_name(volume['id'])
+        try:
+            self.vg.rename_volume(volume['name'], wipe_name)
+        except processutils.ProcessExecutionError:
+            with excutils.save_and_reraise_exception():
+                self.db.worker_destroy(ctxt, resource_type=WIPE_RESOURCE_TYPE,
+                                       resource_id=volume['id'])
+
+        self._queue_deferred_wipe(volume['id'], volume['size'])
+
+    def _queue_deferred_wipe(self, volume_id, size_in_g):
+        self._pending_wipes[volume_id] = float(size_in_g)
+        if self._wipe_thread is None:
+            self._wipe_thread = eventlet.spawn(self._run_deferred_wipes)
+
+    def _run_deferred_wipes(self):
+        """Wipe and remove the queued LVs one at a time."""
+        while self._pending_wipes:
+            volume_id = next(iter(self._pending_wipes))
+            try:
+                self._deferred_wipe(volume_id)
+            except Exception:
+                # The LV and its workers entry are kept, the wipe will be
+                # retried when the service restarts.
+                LOG.exception('Deferred wipe of volume %s failed.',
+                              volume_id)
+            del self._pending_wipes[volume_id]
+        self._wipe_thread = None
+
+    def _deferred_wipe(self, volume_id):
+        wipe_name = self._wipe_lv_name(volume_id)
+        size_in_g = int(math.ceil(self._pending_wipes[volume_id]))
+        self._clear_volume({'id': volume_id, 'name': wipe_name,
+                            'size': size_in_g},
+                           throttle=self._wipe_throttle)
+        self.vg.delete(wipe_name)
+        self.db.worker_destroy(context.get_admin_context(),
+                               resource_type=WIPE_RESOURCE_TYPE,
+                               resource_id=volume_id)
+        LOG.info('Successfully wiped deleted volume: %s', volume_id)
+
+    def _resume_deferred_wipes(self):
+        """Queue the wipes that were pending when the service stopped."""
+        lvs = {lv['name']: lv for lv in self.vg.get_volumes()
+               if lv['name'].startswith(WIPE_LV_PREFIX)}
+        if not lvs:
+            return
+
+        ctxt = context.get_admin_context()
+        workers = self.db.worker_get_all(
+            ctxt, resource_type=WIPE_RESOURCE_TYPE,
+            service_id=service.Service.service_id)
+        for worker in workers:
+            lv = lvs.get(self._wipe_lv_name(worker.resource_id))
+            if lv is None:
+                # Either the wipe completed or the LV was never renamed
+                self.db.worker_destroy(ctxt, id=worker.id)
+                continue
+            LOG.info('Resuming deferred wipe of volume %s.',
+                     worker.resource_id)
+            self._queue_deferred_wipe(worker.resource_id, lv['size'])
 
     def _escape_snapshot(self, snapshot_name):
         # Linux LVM reserves name that starts with snapshot, so that
@@ -241,8 +372,10 @@ class LVMVolumeDriver(driver.VolumeDriver):
         thin_enabled = self.configuration.lvm_type == 'thin'
 
         # Calculate the total volumes used by the VG group.
-        # This includes volumes and snapshots.
-        total_volumes = len(self.vg.get_volumes())
+        # This includes volumes and snapshots, but not the deleted volumes
+        # waiting to be wiped, whose space is reported separately.
+        total_volumes = len(self.vg.get_volumes()) - len(self._pending_wipes)
+        pending_wipe_capacity = round(sum(self._pending_wipes.values()), 2)
 
         # Skip enabled_pools setting, treat the whole backend as one pool
         # XXX FIXME if multipool support is added to LVM driver.
@@ -255,6 +388,7 @@ class LVMVolumeDriver(driver.VolumeDriver):
             location_info=location_info,
             QoS_support=False,
             provisioned_capacity_gb=provisioned_capacity,
+            pending_wipe_capacity_gb=pending_wipe_capacity,
             max_over_subscription_ratio=(
                 self.configuration.max_over_subscription_ratio),
             thin_provisioning_support=thin_enabled,
@@ -352,6 +486,9 @@ class LVMVolumeDriver(driver.VolumeDriver):
             # Enable sparse copy since lvm_type is 'thin'
             self._sparse_copy_volume = True
 
+        self._set_wipe_throttle()
+        self._resume_deferred_wipes()
+
     def create_volume(self, volume):
         """Creates a logical volume."""
         mirror_count = 0
@@ -447,7 +584,10 @@ class LVMVolumeDriver(driver.VolumeDriver):
                       'for volume: %s', volume['name'])
             raise exception.VolumeIsBusy(volume_name=volume['name'])
 
-        self._delete_volume(volume)
+        if self._use_deferred_wipe():
+            self._defer_delete_volume(volume)
+        else:
+            self._delete_volume(volume)
         LOG.info('Successfully deleted volume: %s', volume['id'])
 
     def create_snapshot(self, snapshot):
@@ -668,6 +808,9 @@ class LVMVolumeDriver(driver.VolumeDriver):
         cinder_ids = [resource['id'] for resource in cinder_resources]
 
         for lv in lvs:
+            if lv['name'].startswith(WIPE_LV_PREFIX):
+                continue
+
             is_snap = self.vg.lv_is_snapshot(lv['name'])
             if ((resource_type == 'volume' and is_snap) or
                     (resource_type == 'snapshot' and not is_snap)):
@@ -812,6 +955,25 @@ class LVMVolumeDriver(driver.VolumeDriver):
             self.target_driver.ensure_export(context, volume, volume_path)
         return model_update
 
+    def ensure_exports(self, context, volumes):
+        failed = {}
+        active = []
+        volume_paths = {}
+        for volume in volumes:
+            try:
+                self.vg.activate_lv(volume['name'])
+            except Exception as e:
+                failed[volume['id']] = e
+                continue
+            active.append(volume)
+            volume_paths[volume['id']] = "/dev/%s/%s" % (
+                self.configuration.volume_group, volume['name'])
+
+        if active:
+            failed.update(self.target_driver.ensure_exports(context, active,
+                                                            volume_paths))
+        return failed
+
     def create_export(self, context, volume, connector, vg=None):
         if vg is None:
             vg = self.configuration.volume_group
@@ -15,6 +15,7 @@
 
 from __future__ import absolute_import
 import binascii
+import collections
 import json
 import math
 import os
@@ -29,6 +30,7 @@ from oslo_log import log as logging
 from oslo_utils import encodeutils
 from oslo_utils import excutils
 from oslo_utils import fileutils
+from oslo_utils import timeutils
 from oslo_utils import units
 import six
 from six.moves import urllib
@@ -112,6 +114,25 @@ RBD_OPTS = [
                      "Cinder core code for allocated_capacity_gb. This "
                      "reduces the load on the Ceph cluster as well as on the "
                      "volume service."),
+    cfg.IntOpt('rbd_usage_rescan_interval', default=0, min=0,
+               help='Interval (in seconds) between full rescans of the '
+                    'provisioned size of every image in the pool. Between '
+                    'rescans image sizes are cached: sizes of volumes '
+                    'created, extended and deleted by Cinder are updated '
+                    'locally and only images new to the pool are opened to '
+                    'read their size. 0 rescans the pool on every stats '
+                    'refresh. Not used when rbd_exclusive_cinder_pool is '
+                    'set.'),
+    cfg.IntOpt('rbd_connection_pool_size', default=0, min=0,
+               help='Maximum number of idle RADOS connections kept open for '
+                    'reuse for each cluster and pool, including replication '
+                    'targets. Reusing connections avoids connecting to the '
+                    'monitors on each operation. 0 opens a new connection '
+                    'for each operation.'),
+    cfg.IntOpt('rbd_connection_max_idle', default=300, min=1,
+               help='Interval (in seconds) after which an idle pooled RADOS '
+                    'connection is closed instead of reused. Only used when '
+                    'rbd_connection_pool_size is set.'),
 ]
 
 CONF = cfg.CONF
@@ -190,6 +211,76 @@ class RADOSClient(object):
         return int(features)
 
 
+class RADOSConnectionPool(object):
+    """Idle RADOS connections kept open to be reused.
+
+    Connections are kept apart by a key identifying the cluster configuration,
+    pool and timeout they were opened with, so connections to replication
+    targets don't mix with those to the active cluster. A connection is only
+    reused if its cluster handle and ioctx are still open and it hasn't been
+    idle for longer than max_idle seconds.
+    """
+    def __init__(self, size, max_idle):
+        self.size = size
+        self.max_idle = max_idle
+        self._idle = collections.defaultdict(collections.deque)
+        self._in_use = {}
+
+    @staticmethod
+    def _is_open(client, ioctx):
+        return client.state == 'connected' and ioctx.state == 'open'
+
+    @staticmethod
+    def _close(client, ioctx):
+        # closing an ioctx cannot raise an exception
+        ioctx.close()
+        client.shutdown()
+
+    def get(self, key):
+        """Return an idle (client, ioctx) for the key, or None."""
+        idle = self._idle[key]
+        while idle:
+            client, ioctx, released_at = idle.pop()
+            if (timeutils.is_older_than(released_at, self.max_idle) or
+                    not self._is_open(client, ioctx)):
+                LOG.debug('Closing stale RADOS connection.')
+                self._close(client, ioctx)
+                continue
+            self._in_use[ioctx] = key
+            return client, ioctx
+        return None
+
+    def track(self, key, client, ioctx):
+        """Register a new connection so it is kept when released."""
+        self._in_use[ioctx] = key
+
+    def put(self, client, ioctx):
+        """Keep a released connection for reuse.
+
+        Returns False if the connection is not kept, in which case the caller
+        must close it.
+        """
+        key = self._in_use.pop(ioctx, None)
+        if key is None or not self._is_open(client, ioctx):
+            return False
+
+        idle = self._idle[key]
+        # Most recently used connections are reused first, so the oldest
+        # ones are at the left and are closed once they expire.
+        while idle and timeutils.is_older_than(idle[0][2], self.max_idle):
+            self._close(*idle.popleft()[:2])
+        if len(idle) >= self.size:
+            return False
+        idle.append((client, ioctx, timeutils.utcnow()))
+        return True
+
+    def clear(self):
+        """Close all idle connections."""
+        for idle in self._idle.values():
+            while idle:
+                self._close(*idle.pop()[:2])
+
+
 @interface.volumedriver
 class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
                 driver.ManageableVD, driver.ManageableSnapshotsVD,
@@ -228,6 +319,10 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
         self._is_replication_enabled = False
         self._replication_targets = []
         self._target_names = []
+        # Provisioned size in bytes of the images in the pool, by image name.
+        self._image_sizes = {}
+        self._usage_rescanned_at = None
+        self._connection_pool = None
 
     def _get_target_config(self, target_id):
         """Get a replication target from known replication targets."""
@@ -247,6 +342,10 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
         """Performs initialization steps that could raise exceptions."""
         self._do_setup_replication()
         self._active_config = self._get_target_config(self._active_backend_id)
+        if self.configuration.rbd_connection_pool_size:
+            self._connection_pool = RADOSConnectionPool(
+                self.configuration.rbd_connection_pool_size,
+                self.configuration.rbd_connection_max_idle)
 
     def _do_setup_replication(self):
         replication_devices = self.configuration.safe_get(
@@ -316,20 +415,26 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
         return args
 
     def _connect_to_rados(self, pool=None, remote=None, timeout=None):
-        @utils.retry(exception.VolumeBackendAPIException,
-                     self.configuration.rados_connection_interval,
-                     self.configuration.rados_connection_retries)
-        def _do_conn(pool, remote, timeout):
-            name, conf, user = self._get_config_tuple(remote)
+        name, conf, user = self._get_config_tuple(remote)
 
-            if pool is not None:
-                pool = utils.convert_str(pool)
-            else:
-                pool = self.configuration.rbd_pool
+        if pool is not None:
+            pool = utils.convert_str(pool)
+        else:
+            pool = self.configuration.rbd_pool
+
+        if timeout is None:
+            timeout = self.configuration.rados_connect_timeout
 
-            if timeout is None:
-                timeout = self.configuration.rados_connect_timeout
+        key = (name, conf, user, pool, timeout)
+        if self._connection_pool:
+            conn = self._connection_pool.get(key)
+            if conn:
+                return conn
 
+        @utils.retry(exception.VolumeBackendAPIException,
+                     self.configuration.rados_connection_interval,
+                     self.configuration.rados_connection_retries)
+        def _do_conn(pool, timeout):
             LOG.debug("connecting to %(user)s@%(name)s (conf=%(conf)s, "
                       "timeout=%(timeout)s).",
                       {'user': user, 'name': name, 'conf': conf,
@@ -355,9 +460,14 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
                 client.shutdown()
                 raise exception.VolumeBackendAPIException(data=msg)
 
-        return _do_conn(pool, remote, timeout)
+        client, ioctx = _do_conn(pool, timeout)
+        if self._connection_pool:
+            self._connection_pool.track(key, client, ioctx)
+        return client, ioctx
 
     def _disconnect_from_rados(self, client, ioctx):
+        if self._connection_pool and self._connection_pool.put(client, ioctx):
+            return
         # closing an ioctx cannot raise an exception
         ioctx.close()
         client.shutdown()
@@ -402,23 +512,52 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
         We must include all volumes, not only Cinder created volumes, because
         Cinder created volumes are reported by the Cinder core code as
         allocated_capacity_gb.
+
+        Image sizes are cached between full rescans of the pool, which are
+        done at most once every rbd_usage_rescan_interval seconds. In between
+        only the images that are not in the cache are opened.
         """
-        total_provisioned = 0
+        interval = self.configuration.rbd_usage_rescan_interval
+        rescan = (not interval or not self._usage_rescanned_at or
+                  timeutils.is_older_than(self._usage_rescanned_at, interval))
+        if rescan:
+            self._usage_rescanned_at = timeutils.utcnow()
+
         with RADOSClient(self) as client:
-            for t in self.RBDProxy().list(client.ioctx):
+            images = self.RBDProxy().list(client.ioctx)
+            listed = set(images)
+            for name in list(self._image_sizes):
+                if name not in listed:
+                    self._image_sizes.pop(name, None)
+
+            for t in images:
+                if not rescan and t in self._image_sizes:
+                    continue
                 try:
                     with RBDVolumeProxy(self, t, read_only=True,
                                         client=client.cluster,
                                         ioctx=client.ioctx) as v:
-                        size = v.size()
+                        self._image_sizes[t] = v.size()
                 except (self.rbd.ImageNotFound, self.rbd.OSError):
                     LOG.debug("Image %s is not found.", t)
-                else:
-                    total_provisioned += size
+                    self._image_sizes.pop(t, None)
 
+        total_provisioned = sum(self._image_sizes.values())
         total_provisioned = math.ceil(float(total_provisioned) / units.Gi)
         return total_provisioned
 
+    def _track_image_size(self, name, size=None):
+        """Update the cached provisioned size of an image in the pool.
+
+        With no size the image is removed from the cache, so the next usage
+        refresh reads its size if it is still in the pool.
+        """
+        name = utils.convert_str(name)
+        if size is None:
+            self._image_sizes.pop(name, None)
+        else:
+            self._image_sizes[name] = size
+
     def _get_pool_stats(self):
         """Gets pool free and total capacity in GiB.
 
@@ -803,11 +942,13 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
                                    order,
                                    old_format=False,
                                    features=client.features)
+            self._track_image_size(vol_name, size)
 
             try:
                 volume_update = self._enable_replication_if_needed(volume)
             except Exception:
                 self.RBDProxy().remove(client.ioctx, vol_name)
+                self._track_image_size(vol_name)
                 err_msg = (_('Failed to enable image replication'))
                 raise exception.ReplicationError(reason=err_msg,
                                                  volume_id=volume.id)
@@ -854,6 +995,7 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
 
         with RBDVolumeProxy(self, volume.name) as vol:
             vol.resize(size)
+        self._track_image_size(volume.name, size)
 
     def create_volume_from_snapshot(self, volume, snapshot):
         """Creates a volume from a snapshot."""
@@ -990,6 +1132,7 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
                          self.configuration.rados_connection_retries)
             def _try_remove_volume(client, volume_name):
                 self.RBDProxy().remove(client.ioctx, volume_name)
+                self._track_image_size(volume_name)
 
             if clone_snap is None:
                 LOG.debug("deleting rbd volume %s", volume_name)
@@ -1021,6 +1164,7 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
                 # will be deleted when it's snapshot and clones are deleted.
                 new_name = "%s.deleted" % (volume_name)
                 self.RBDProxy().rename(client.ioctx, volume_name, new_name)
+                self._track_image_size(volume_name)
 
     def create_snapshot(self, snapshot):
         """Creates an rbd snapshot."""
@@ -1225,6 +1369,11 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
 
         self._active_backend_id = secondary_id
         self._active_config = remote
+        # Image sizes cached from the previous cluster no longer apply.
+        self._image_sizes = {}
+        self._usage_rescanned_at = None
+        if self._connection_pool:
+            self._connection_pool.clear()
         LOG.info('RBD driver failover completion completed.')
 
     def failover_host(self, context, volumes, secondary_id=None, groups=None):
@@ -1496,6 +1645,7 @@ class RBDDriver(driver.CloneableImageVD, driver.MigrateVD,
             self.RBDProxy().rename(client.ioctx,
                                    utils.convert_str(rbd_name),
                                    utils.convert_str(volume.name))
+            self._track_image_size(rbd_name)
 
     def manage_existing_get_size(self, volume, existing_ref):
         """Return size of an existing image for manage_existing.
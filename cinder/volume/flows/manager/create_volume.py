@@ -682,7 +682,6 @@ class CreateVolumeFromSpecTask(flow_utils.CinderTask):
                         '%(exception)s', {'exception': e})
         return None, False
 
-    @coordination.synchronized('{image_id}')
     def _prepare_image_cache_entry(self, context, volume,
                                    image_location, image_id,
                                    image_meta, image_service):
@@ -690,33 +689,68 @@ class CreateVolumeFromSpecTask(flow_utils.CinderTask):
         if not internal_context:
             return None, False
 
-        cache_entry = self.image_volume_cache.get_entry(internal_context,
-                                                        volume,
-                                                        image_id,
-                                                        image_meta)
-
-        # If the entry is in the cache then return ASAP in order to minimize
-        # the scope of the lock. If it isn't in the cache then do the work
-        # that adds it. The work is done inside the locked region to ensure
-        # only one cache entry is created.
-        if cache_entry:
-            LOG.debug('Found cache entry for image = '
-                      '%(image_id)s on host %(host)s.',
-                      {'image_id': image_id, 'host': volume.host})
+        # Only one request per image and backend creates the cache entry.
+        # Concurrent requests for the same image wait for it to finish and
+        # then clone the new image-volume instead of downloading the image
+        # again. The lock goes through the coordinator so this also holds
+        # across the services of a cluster.
+        lock = coordination.COORDINATOR.get_lock(
+            '%s-%s' % (image_id, volume.service_topic_queue))
+        if not lock.acquire(blocking=False):
+            LOG.debug('Waiting for cache entry for image = %(image_id)s on '
+                      '%(service)s being created by another request.',
+                      {'image_id': image_id,
+                       'service': volume.service_topic_queue})
+            with lock(True):
+                pass
+            # Whether or not the entry could be created, the download (if
+            # still needed) is done outside the lock so waiting requests are
+            # not serialized when the image cannot be cached.
             return None, False
-        else:
-            LOG.debug('Preparing cache entry for image = '
-                      '%(image_id)s on host %(host)s.',
-                      {'image_id': image_id, 'host': volume.host})
-            model_update = self._create_from_image_cache_or_download(
-                context,
-                volume,
-                image_location,
-                image_id,
-                image_meta,
-                image_service,
-                update_cache=True)
-            return model_update, True
+
+        try:
+            cache_entry = self.image_volume_cache.get_entry(internal_context,
+                                                            volume,
+                                                            image_id,
+                                                            image_meta)
+
+            # If the entry is in the cache then return ASAP in order to
+            # minimize the scope of the lock. If it isn't in the cache then
+            # do the work that adds it. The work is done inside the locked
+            # region to ensure only one cache entry is created.
+            if cache_entry:
+                LOG.debug('Found cache entry for image = '
+                          '%(image_id)s on host %(host)s.',
+                          {'image_id': image_id, 'host': volume.host})
+                return None, False
+            else:
+                LOG.debug('Preparing cache entry for image = '
+                          '%(image_id)s on host %(host)s.',
+                          {'image_id': image_id, 'host': volume.host})
+                model_update = self._create_from_image_cache_or_download(
+                    context,
+                    volume,
+                    image_location,
+                    image_id,
+                    image_meta,
+                    image_service,
+                    update_cache=True)
+                return model_update, True
+        finally:
+            lock.release()
+
+    def _download_image_to_volume(self, context, volume, virtual_size,
+                                  should_create_cache_entry, image_location,
+                                  image_meta, image_service):
+        if should_create_cache_entry:
+            if virtual_size and virtual_size != volume.size:
+                volume.size = virtual_size
+                volume.save()
+        return self._create_from_image_download(context,
+                                                volume,
+                                                image_location,
+                                                image_meta,
+                                                image_service)
 
     def _create_from_image_cache_or_download(self, context, volume,
                                              image_location, image_id,
@@ -727,12 +761,20 @@ class CreateVolumeFromSpecTask(flow_utils.CinderTask):
         # NOTE(mnaser): This check *only* happens if the backend is not able
         #               to clone volumes and we have to resort to downloading
         #               the image from Glance and uploading it.
+        # Raw images streamed into the volume by drivers that write them
+        # straight to the volume's device never touch image_conversion_dir.
+        stream = False
+        if self.driver.STREAMS_RAW_IMAGES:
+            volume_format = (
+                self.driver.configuration.safe_get('volume_format') or 'raw')
+            stream = image_utils.can_stream_image(image_meta, volume_format)
         if CONF.image_conversion_dir:
             fileutils.ensure_tree(CONF.image_conversion_dir)
         try:
-            image_utils.check_available_space(
-                CONF.image_conversion_dir,
-                image_meta['size'], image_id)
+            if not stream:
+                image_utils.check_available_space(
+                    CONF.image_conversion_dir,
+                    image_meta['size'], image_id)
         except exception.ImageTooBig as err:
             with excutils.save_and_reraise_exception():
                 self.message.create(
@@ -774,39 +816,46 @@ class CreateVolumeFromSpecTask(flow_utils.CinderTask):
         try:
             if not cloned:
                 try:
-                    with image_utils.TemporaryImages.fetch(
-                            image_service, context, image_id,
-                            backend_name) as tmp_image:
+                    if stream:
+                        # There is no signature to verify, see
+                        # can_stream_image, and the size of a raw image is
+                        # its virtual size.
                         if CONF.verify_glance_signatures != 'disabled':
-                            # Verify image signature via reading content from
-                            # temp image, and store the verification flag if
-                            # required.
-                            verified = \
-                                image_utils.verify_glance_image_signature(
-                                    context, image_service,
-                                    image_id, tmp_image)
                             self.db.volume_glance_metadata_bulk_create(
                                 context, volume.id,
-                                {'signature_verified': verified})
-                        # Try to create the volume as the minimal size,
-                        # then we can extend once the image has been
-                        # downloaded.
-                        data = image_utils.qemu_img_info(tmp_image)
-
+                                {'signature_verified': False})
                         virtual_size = image_utils.check_virtual_size(
-                            data.virtual_size, volume.size, image_id)
-
-                        if should_create_cache_entry:
-                            if virtual_size and virtual_size != original_size:
-                                    volume.size = virtual_size
-                                    volume.save()
-                        model_update = self._create_from_image_download(
-                            context,
-                            volume,
-                            image_location,
-                            image_meta,
-                            image_service
-                        )
+                            image_meta['size'], volume.size, image_id)
+                        model_update = self._download_image_to_volume(
+                            context, volume, virtual_size,
+                            should_create_cache_entry, image_location,
+                            image_meta, image_service)
+                    else:
+                        with image_utils.TemporaryImages.fetch(
+                                image_service, context, image_id,
+                                backend_name) as tmp_image:
+                            if CONF.verify_glance_signatures != 'disabled':
+                                # Verify image signature via reading content
+                                # from temp image, and store the verification
+                                # flag if required.
+                                verified = \
+                                    image_utils.verify_glance_image_signature(
+                                        context, image_service,
+                                        image_id, tmp_image)
+                                self.db.volume_glance_metadata_bulk_create(
+                                    context, volume.id,
+                                    {'signature_verified': verified})
+                            # Try to create the volume as the minimal size,
+                            # then we can extend once the image has been
+                            # downloaded.
+                            data = image_utils.qemu_img_info(tmp_image)
+
+                            virtual_size = image_utils.check_virtual_size(
+                                data.virtual_size, volume.size, image_id)
+                            model_update = self._download_image_to_volume(
+                                context, volume, virtual_size,
+                                should_create_cache_entry, image_location,
+                                image_meta, image_service)
                 except exception.ImageTooBig as e:
                     with excutils.save_and_reraise_exception():
                         self.message.create(
@@ -36,10 +36,12 @@ intact.
 """
 
 
+import copy
 import requests
 import time
 
 from castellan import key_manager
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
@@ -149,6 +151,22 @@ volume_backend_opts = [
                help='Size of the native threads pool for the backend.  '
                     'Increase for backends that heavily rely on this, like '
                     'the RBD driver.'),
+    cfg.IntOpt('backend_stats_refresh_timeout',
+               default=0,
+               min=0,
+               help='Seconds the periodic capabilities report waits for the '
+                    'driver to refresh its stats. A refresh taking longer '
+                    'keeps running in the background while the last '
+                    'collected stats are reported, with their age in '
+                    'seconds in the "stats_age" capability. 0 waits for '
+                    'the driver on every report.'),
+    cfg.IntOpt('init_host_export_workers',
+               default=1,
+               min=1,
+               help='Number of in-use volumes whose exports are recreated '
+                    'concurrently on service start, for drivers and LVM '
+                    'target helpers that cannot recreate all exports at '
+                    'once.'),
 ]
 
 CONF = cfg.CONF
@@ -202,6 +220,10 @@ class VolumeManager(manager.CleanableManager,
             self.configuration.backend_native_threads_pool_size)
         self.stats = {}
         self.service_uuid = None
+        # Background driver stats refresh and last stats it collected, used
+        # when backend_stats_refresh_timeout is set.
+        self._stats_refresh = None
+        self._last_volume_stats = None
 
         if not volume_driver:
             # Get from configuration, which will get the default
@@ -280,12 +302,15 @@ class VolumeManager(manager.CleanableManager,
                 'image_volume_cache_max_size_gb')
             max_cache_entries = self.driver.configuration.safe_get(
                 'image_volume_cache_max_count')
+            eviction_policy = self.driver.configuration.safe_get(
+                'image_volume_cache_eviction_policy')
 
             self.image_volume_cache = image_cache.ImageVolumeCache(
                 self.db,
                 cinder_volume.API(),
                 max_cache_size,
-                max_cache_entries
+                max_cache_entries,
+                eviction_policy
             )
             LOG.info('Image-volume cache enabled for host %(host)s.',
                      {'host': self.host})
@@ -430,6 +455,7 @@ class VolumeManager(manager.CleanableManager,
         LOG.info("Starting volume driver %(driver_name)s (%(version)s)",
                  {'driver_name': self.driver.__class__.__name__,
                   'version': self.driver.get_version()})
+        watch = timeutils.StopWatch().start()
         try:
             self.driver.do_setup(ctxt)
             self.driver.check_for_setup_error()
@@ -443,15 +469,18 @@ class VolumeManager(manager.CleanableManager,
 
         # Initialize backend capabilities list
         self.driver.init_capabilities()
+        self._log_init_phase('driver setup', watch)
 
         volumes = self._get_my_volumes(ctxt)
         snapshots = self._get_my_snapshots(ctxt)
         self._sync_provider_info(ctxt, volumes, snapshots)
         # FIXME volume count for exporting is wrong
+        self._log_init_phase('provider info sync', watch)
 
         self.stats['pools'] = {}
         self.stats.update({'allocated_capacity_gb': 0})
 
+        exported_volumes = []
         try:
             for volume in volumes:
                 # available volume should also be counted into allocated
@@ -459,15 +488,20 @@ class VolumeManager(manager.CleanableManager,
                     # calculate allocated capacity for driver
                     self._count_allocated_capacity(ctxt, volume)
 
-                    try:
-                        if volume['status'] in ['in-use']:
-                            self.driver.ensure_export(ctxt, volume)
-                    except Exception:
-                        LOG.exception("Failed to re-export volume, "
-                                      "setting to ERROR.",
-                                      resource=volume)
-                        volume.conditional_update({'status': 'error'},
-                                                  {'status': 'in-use'})
+                    if volume['status'] in ['in-use']:
+                        exported_volumes.append(volume)
+            self._log_init_phase('allocated capacity count', watch)
+
+            failed = self._ensure_exports(ctxt, exported_volumes)
+            for volume in exported_volumes:
+                if volume.id in failed:
+                    LOG.error("Failed to re-export volume, setting to "
+                              "ERROR: %s", failed[volume.id],
+                              resource=volume)
+                    volume.conditional_update({'status': 'error'},
+                                              {'status': 'in-use'})
+            self._log_init_phase('re-export of %d volumes' %
+                                 len(exported_volumes), watch)
             # All other cleanups are processed by parent class CleanableManager
 
         except Exception:
@@ -493,6 +527,7 @@ class VolumeManager(manager.CleanableManager,
 
         # collect and publish service capabilities
         self.publish_service_capabilities(ctxt)
+        self._log_init_phase('capabilities report', watch)
         LOG.info("Driver initialization completed successfully.",
                  resource={'type': 'driver',
                            'id': self.driver.__class__.__name__})
@@ -500,6 +535,49 @@ class VolumeManager(manager.CleanableManager,
         # Make sure to call CleanableManager to do the cleanup
         super(VolumeManager, self).init_host(added_to_cluster=added_to_cluster,
                                              **kwargs)
+        self._log_init_phase('cleanup', watch)
+
+    def _log_init_phase(self, phase, watch):
+        LOG.info("Service initialization %(phase)s took %(elapsed).2f "
+                 "seconds.", {'phase': phase, 'elapsed': watch.elapsed()},
+                 resource={'type': 'driver',
+                           'id': self.driver.__class__.__name__})
+        watch.restart()
+
+    def _ensure_exports(self, ctxt, volumes):
+        """Recreate the exports of the volumes on service start.
+
+        Drivers that don't recreate all the exports at once, or fail to, get
+        them recreated one volume at a time, init_host_export_workers of them
+        concurrently.
+
+        Returns a dictionary with the exception raised for each volume, by
+        volume id, whose export could not be recreated.
+        """
+        if not volumes:
+            return {}
+        try:
+            return self.driver.ensure_exports(ctxt, volumes) or {}
+        except NotImplementedError:
+            pass
+        except Exception:
+            LOG.exception("Failed to recreate the exports of %d volumes at "
+                          "once, recreating them one at a time.",
+                          len(volumes))
+
+        failed = {}
+
+        def _ensure_export(volume):
+            try:
+                self.driver.ensure_export(ctxt, volume)
+            except Exception as e:
+                failed[volume.id] = e
+
+        pool = eventlet.GreenPool(self.configuration.init_host_export_workers)
+        for volume in volumes:
+            pool.spawn_n(_ensure_export, volume)
+        pool.waitall()
+        return failed
 
     def init_host_with_rpc(self):
         LOG.info("Initializing RPC dependent components of volume "
@@ -1367,6 +1445,66 @@ class VolumeManager(manager.CleanableManager,
         self._notify_about_volume_usage(context, volume, "detach.end")
         LOG.info("Detach volume completed successfully.", resource=volume)
 
+    def warm_image_cache(self, ctxt, image_id, pool):
+        """Add an image to the image-volume cache of one of our pools.
+
+        The image is added by creating a temporary volume from it in the
+        internal tenant, which creates the cache entry the same way a user
+        request would, and deleting it once it is done.
+        """
+        if not self.image_volume_cache:
+            LOG.warning('Image-volume cache is disabled for host %(host)s, '
+                        'not caching image %(image_id)s.',
+                        {'host': self.host, 'image_id': image_id})
+            return
+
+        internal_ctxt = context.get_internal_tenant_context()
+        if not internal_ctxt:
+            LOG.warning('Unable to get Cinder internal context, not caching '
+                        'image %(image_id)s.', {'image_id': image_id})
+            return
+
+        image_service, image_id = glance.get_remote_image_service(ctxt,
+                                                                  image_id)
+        image_meta = image_service.show(ctxt, image_id)
+        image_size = utils.as_int(image_meta['size'], quiet=False)
+        size = max((image_size + units.Gi - 1) // units.Gi,
+                   image_meta.get('min_disk') or 0, 1)
+
+        reservations = QUOTAS.reserve(internal_ctxt, volumes=1,
+                                      gigabytes=size)
+        try:
+            volume = objects.Volume(
+                context=internal_ctxt,
+                user_id=internal_ctxt.user_id,
+                project_id=internal_ctxt.project_id,
+                host=vol_utils.append_host(self.host, pool),
+                cluster_name=vol_utils.append_host(self.cluster, pool),
+                availability_zone=self.availability_zone,
+                size=size,
+                status='creating',
+                attach_status=fields.VolumeAttachStatus.DETACHED,
+                display_name='image-cache-%s' % image_id)
+            volume.create()
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                QUOTAS.rollback(internal_ctxt, reservations)
+        QUOTAS.commit(internal_ctxt, reservations,
+                      project_id=internal_ctxt.project_id)
+
+        # The request context is used to create the volume because it is the
+        # one that can download the image from Glance.
+        try:
+            self.create_volume(ctxt, volume,
+                               objects.RequestSpec(image_id=image_id),
+                               allow_reschedule=False)
+            volume.refresh()
+            if volume.status != 'available':
+                LOG.error('Failed to cache image %(image_id)s on %(host)s.',
+                          {'image_id': image_id, 'host': volume.host})
+        finally:
+            self.delete_volume(internal_ctxt, volume)
+
     def _create_image_cache_volume_entry(self, ctx, volume_ref,
                                          image_id, image_meta):
         """Create a new image-volume and cache entry for it.
@@ -2441,7 +2579,9 @@ class VolumeManager(manager.CleanableManager,
                         resource={'type': 'driver',
                                   'id': self.driver.__class__.__name__})
         else:
-            volume_stats = self.driver.get_volume_stats(refresh=True)
+            volume_stats = self._get_driver_volume_stats()
+            if volume_stats is None:
+                return
             if self.extra_capabilities:
                 volume_stats.update(self.extra_capabilities)
             if volume_stats:
@@ -2498,6 +2638,67 @@ class VolumeManager(manager.CleanableManager,
                 # queue it to be sent to the Schedulers.
                 self.update_service_capabilities(volume_stats)
 
+    def _get_driver_volume_stats(self):
+        """Get refreshed driver stats, waiting for them for a limited time.
+
+        When the driver takes longer than backend_stats_refresh_timeout the
+        refresh is left running in the background, and a copy of the last
+        stats it collected is returned with their age in 'stats_age'.
+        Returns None if the driver hasn't collected any stats yet.
+        """
+        timeout = self.configuration.backend_stats_refresh_timeout
+        if not timeout:
+            return self.driver.get_volume_stats(refresh=True)
+
+        if self._stats_refresh is None:
+            self._stats_refresh = eventlet.spawn(
+                self.driver.get_volume_stats, refresh=True)
+
+        volume_stats = None
+        finished = False
+        failed = False
+        with eventlet.Timeout(timeout, False):
+            try:
+                volume_stats = self._stats_refresh.wait()
+            except Exception:
+                LOG.exception("Failed to refresh driver stats.",
+                              resource={'type': 'driver',
+                                        'id': self.driver.__class__.__name__})
+                failed = True
+            finished = True
+
+        if finished:
+            self._stats_refresh = None
+            if volume_stats:
+                self._last_volume_stats = (volume_stats, timeutils.utcnow())
+                return volume_stats
+
+        if not self._last_volume_stats:
+            LOG.warning("Driver stats are not available yet, skipping "
+                        "capabilities report.",
+                        resource={'type': 'driver',
+                                  'id': self.driver.__class__.__name__})
+            return None
+
+        volume_stats, collected_at = self._last_volume_stats
+        stats_age = int(timeutils.delta_seconds(collected_at,
+                                                timeutils.utcnow()))
+        if failed:
+            LOG.warning("Reporting stale stats collected %(age)s seconds "
+                        "ago after a driver stats refresh failure.",
+                        {'age': stats_age},
+                        resource={'type': 'driver',
+                                  'id': self.driver.__class__.__name__})
+        else:
+            LOG.warning("Driver stats refresh didn't finish in %(timeout)s "
+                        "seconds, reporting stats collected %(age)s seconds "
+                        "ago.", {'timeout': timeout, 'age': stats_age},
+                        resource={'type': 'driver',
+                                  'id': self.driver.__class__.__name__})
+        volume_stats = copy.deepcopy(volume_stats)
+        volume_stats['stats_age'] = stats_age
+        return volume_stats
+
     def _append_volume_stats(self, vol_stats):
         pools = vol_stats.get('pools', None)
         if pools:
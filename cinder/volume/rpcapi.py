@@ -134,9 +134,10 @@ class VolumeAPI(rpc.RPCAPI):
                failover_replication, and list_replication_targets.
         3.15 - Add revert_to_snapshot method
         3.16 - Add no_snapshots to accept_transfer method
+        3.17 - Add warm_image_cache method
     """
 
-    RPC_API_VERSION = '3.16'
+    RPC_API_VERSION = '3.17'
     RPC_DEFAULT_VERSION = '3.0'
     TOPIC = constants.VOLUME_TOPIC
     BINARY = constants.VOLUME_BINARY
@@ -503,3 +504,8 @@ class VolumeAPI(rpc.RPCAPI):
         cctxt = self._get_cctxt(group.service_topic_queue, version='3.14')
         return cctxt.call(ctxt, 'list_replication_targets',
                           group=group)
+
+    @rpc.assert_min_rpc_version('3.17')
+    def warm_image_cache(self, ctxt, service, image_id, pool):
+        cctxt = self._get_cctxt(service.service_topic_queue, version='3.17')
+        cctxt.cast(ctxt, 'warm_image_cache', image_id=image_id, pool=pool)
@@ -12,6 +12,7 @@
 
 import abc
 
+import eventlet
 from oslo_config import cfg
 import six
 
@@ -44,6 +45,34 @@ class Target(object):
         """Synchronously recreates an export for a volume."""
         pass
 
+    def ensure_exports(self, context, volumes, volume_paths):
+        """Synchronously recreates the exports for a list of volumes.
+
+        Targets that can recreate many exports at once should override this,
+        by default exports are recreated one volume at a time,
+        init_host_export_workers of them concurrently.
+
+        :param volume_paths: Dictionary with the path of each volume, by
+                             volume id.
+        :returns: Dictionary with the exception raised for each volume, by
+                  volume id, whose export could not be recreated.
+        """
+        failed = {}
+
+        def _ensure_export(volume):
+            try:
+                self.ensure_export(context, volume, volume_paths[volume['id']])
+            except Exception as e:
+                failed[volume['id']] = e
+
+        workers = (self.configuration and
+                   self.configuration.safe_get('init_host_export_workers'))
+        pool = eventlet.GreenPool(workers or 1)
+        for volume in volumes:
+            pool.spawn_n(_ensure_export, volume)
+        pool.waitall()
+        return failed
+
     @abc.abstractmethod
     def create_export(self, context, volume, volume_path):
         """Exports a Target/Volume.
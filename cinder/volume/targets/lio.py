@@ -218,3 +218,17 @@ class LioAdm(iscsi.ISCSITarget):
             return
 
         LOG.info("Skipping ensure_export. Found existing iSCSI target.")
+
+    def ensure_exports(self, context, volumes, volume_paths):
+        """Recreate exports for logical volumes at once.
+
+        The saved configuration restores the targets of all the volumes, so
+        it only has to be checked once.
+        """
+        if not volumes:
+            return {}
+        try:
+            self.ensure_export(context, None, None)
+        except Exception as e:
+            return {volume['id']: e for volume in volumes}
+        return {}
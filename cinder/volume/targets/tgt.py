@@ -44,8 +44,9 @@ class TgtAdm(iscsi.ISCSITarget):
                 </target>
                   """)
 
-    def _get_target(self, iqn):
-        (out, err) = utils.execute('tgt-admin', '--show', run_as_root=True)
+    @staticmethod
+    def _find_target(out, iqn):
+        """Get the tid of a target from the tgt-admin --show output."""
         lines = out.split('\n')
         for line in lines:
             if iqn in line:
@@ -55,12 +56,21 @@ class TgtAdm(iscsi.ISCSITarget):
 
         return None
 
+    def _get_target(self, iqn):
+        (out, err) = utils.execute('tgt-admin', '--show', run_as_root=True)
+        return self._find_target(out, iqn)
+
     def _verify_backing_lun(self, iqn, tid):
+        (out, err) = utils.execute('tgt-admin', '--show', run_as_root=True)
+        return self._has_backing_lun(out, iqn, tid)
+
+    @staticmethod
+    def _has_backing_lun(out, iqn, tid):
+        """Check a target's backing lun in the tgt-admin --show output."""
         backing_lun = True
         capture = False
         target_info = []
 
-        (out, err) = utils.execute('tgt-admin', '--show', run_as_root=True)
         lines = out.split('\n')
 
         for line in lines:
@@ -121,6 +131,81 @@ class TgtAdm(iscsi.ISCSITarget):
         LOG.debug("StdOut from tgt-admin --update: %s", out)
         LOG.debug("StdErr from tgt-admin --update: %s", err)
 
+    def _get_volume_conf(self, name, path, chap_auth):
+        write_cache = self.configuration.get('iscsi_write_cache', 'on')
+        driver = self.iscsi_protocol
+        chap_str = ''
+
+        if chap_auth is not None:
+            chap_str = 'incominguser %s %s' % chap_auth
+
+        target_flags = self.configuration.get('iscsi_target_flags', '')
+        if target_flags:
+            target_flags = 'bsoflags ' + target_flags
+
+        return self.VOLUME_CONF % {
+            'name': name, 'path': path, 'driver': driver,
+            'chap_auth': chap_str, 'target_flags': target_flags,
+            'write_cache': write_cache}
+
+    def ensure_exports(self, context, volumes, volume_paths):
+        """Recreates the exports for a list of volumes at once.
+
+        The persistence files of all the volumes are written first and tgtd
+        is then updated once for all of them. Volumes whose target or backing
+        lun is missing after the update are exported again one at a time.
+        """
+        fileutils.ensure_tree(self.volumes_dir)
+        failed = {}
+        vol_ids = {}
+        for volume in volumes:
+            name = "%s%s" % (self.configuration.target_prefix,
+                             volume['name'])
+            vol_id = name.split(':')[1]
+            try:
+                chap_auth = self._get_target_chap_auth(context, volume)
+                volume_conf = self._get_volume_conf(
+                    name, volume_paths[volume['id']], chap_auth)
+                utils.robust_file_write(self.volumes_dir, vol_id,
+                                        volume_conf)
+            except Exception as e:
+                failed[volume['id']] = e
+                continue
+            vol_ids[volume['id']] = vol_id
+
+        try:
+            self._do_tgt_update('ALL')
+        except putils.ProcessExecutionError as e:
+            LOG.warning('Failed to update all iSCSI targets at once, they '
+                        'will be updated one at a time: %s', e)
+
+        try:
+            (out, err) = utils.execute('tgt-admin', '--show',
+                                       run_as_root=True)
+        except putils.ProcessExecutionError as e:
+            LOG.warning('Failed to list the iSCSI targets, they will be '
+                        'checked one at a time: %s', e)
+            out = None
+
+        for volume in volumes:
+            if volume['id'] not in vol_ids:
+                continue
+            if out is not None:
+                iqn = '%s%s' % (self.iscsi_target_prefix,
+                                vol_ids[volume['id']])
+                tid = self._find_target(out, iqn)
+                if tid is not None and self._has_backing_lun(out, iqn, tid):
+                    continue
+
+            LOG.debug('iSCSI target for volume %s was not created by the '
+                      'bulk update, creating it alone.', volume['id'])
+            try:
+                self.ensure_export(context, volume,
+                                   volume_paths[volume['id']])
+            except Exception as e:
+                failed[volume['id']] = e
+        return failed
+
     @utils.retry(exception.NotFound)
     def create_iscsi_target(self, name, tid, lun, path,
                             chap_auth=None, **kwargs):
@@ -143,21 +228,7 @@ class TgtAdm(iscsi.ISCSITarget):
         fileutils.ensure_tree(self.volumes_dir)
 
         vol_id = name.split(':')[1]
-        write_cache = self.configuration.get('iscsi_write_cache', 'on')
-        driver = self.iscsi_protocol
-        chap_str = ''
-
-        if chap_auth is not None:
-            chap_str = 'incominguser %s %s' % chap_auth
-
-        target_flags = self.configuration.get('iscsi_target_flags', '')
-        if target_flags:
-            target_flags = 'bsoflags ' + target_flags
-
-        volume_conf = self.VOLUME_CONF % {
-            'name': name, 'path': path, 'driver': driver,
-            'chap_auth': chap_str, 'target_flags': target_flags,
-            'write_cache': write_cache}
+        volume_conf = self._get_volume_conf(name, path, chap_auth)
 
         LOG.debug('Creating iscsi_target for Volume ID: %s', vol_id)
         volumes_dir = self.volumes_dir
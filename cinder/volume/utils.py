@@ -16,12 +16,16 @@
 
 
 import ast
+import ctypes
+import ctypes.util
 import functools
 import json
 import math
 import operator
+import os
 from os import urandom
 import re
+import sys
 import time
 import uuid
 
@@ -75,6 +79,15 @@ def null_safe_str(s):
     return str(s) if s else ''
 
 
+# Volume fields used by the volume usage notifications.
+VOLUME_USAGE_FIELDS = ('id', '_name_id', 'project_id', 'user_id', 'host',
+                       'availability_zone', 'volume_type_id', 'display_name',
+                       'launched_at', 'created_at', 'deleted_at', 'status',
+                       'snapshot_id', 'size', 'replication_status',
+                       'replication_extended_status',
+                       'replication_driver_data')
+
+
 def _usage_from_volume(context, volume_ref, **kw):
     now = timeutils.utcnow()
     launched_at = volume_ref['launched_at'] or now
@@ -603,9 +616,132 @@ def copy_volume(src, dest, size_in_m, blocksize, sync=False,
         _copy_volume_with_file(src, dest, size_in_m)
 
 
+# From linux/falloc.h
+FALLOC_FL_KEEP_SIZE = 0x01
+FALLOC_FL_PUNCH_HOLE = 0x02
+
+
+def punch_hole(fd, offset, length):
+    """Deallocate a range of an open file or block device.
+
+    The range reads back as zeros afterwards and the size of the file is
+    not changed. Raises OSError when the range can't be deallocated, for
+    example when the filesystem or device doesn't support it.
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    if libc.fallocate(fd, FALLOC_FL_PUNCH_HOLE | FALLOC_FL_KEEP_SIZE,
+                      ctypes.c_longlong(offset),
+                      ctypes.c_longlong(length)):
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+# Size of the ranges of a volume cleared by a single command, the progress of
+# a secure delete is logged after each range.
+CLEAR_STEP_SIZE_MB = 64 * units.Ki
+
+
+def _clear_steps(size_in_m):
+    """Split the first size_in_m MiB of a volume into clear ranges.
+
+    :returns: list of (offset, length) tuples in bytes
+    """
+    return [(offset * units.Mi,
+             min(CLEAR_STEP_SIZE_MB, size_in_m - offset) * units.Mi)
+            for offset in range(0, size_in_m, CLEAR_STEP_SIZE_MB)]
+
+
+def _run_clear_steps(clear_step, volume_path, size_in_m, workers=1):
+    """Clear the ranges of a volume with up to workers concurrent commands.
+
+    When a range fails the ranges that haven't started are skipped, and the
+    error is raised once the running commands have finished.
+    """
+    failed = []
+    cleared = [0]
+
+    def run_step(offset, length):
+        if failed:
+            return
+        try:
+            clear_step(offset, length)
+        except Exception:
+            failed.append(sys.exc_info())
+            return
+        cleared[0] += length
+        LOG.debug("Cleared %(cleared)d of %(size)d MiB of %(path)s.",
+                  {'cleared': cleared[0] // units.Mi, 'size': size_in_m,
+                   'path': volume_path})
+
+    pool = eventlet.GreenPool(workers)
+    for offset, length in _clear_steps(size_in_m):
+        pool.spawn_n(run_step, offset, length)
+    pool.waitall()
+    if failed:
+        six.reraise(*failed[0])
+
+
+def discard_zeroes_data(volume_path):
+    """Return whether discarded blocks of a device read back as zeroes."""
+    try:
+        out, _err = utils.execute('lsblk', '-bdn', '-o', 'DISC-ZERO',
+                                  volume_path)
+    except processutils.ProcessExecutionError:
+        return False
+    return out.strip() == '1'
+
+
+def _clear_volume_with_ioctl(prefix, volume_path, size_in_m):
+    """Clear a volume with the BLKDISCARD or BLKZEROOUT ioctls.
+
+    BLKDISCARD is only used when discarded blocks read back as zeroes,
+    BLKZEROOUT lets the device or the kernel zero the blocks without the
+    data going through a user-space process.
+
+    :returns: name of the ioctl used, None if the device supports neither
+    """
+    methods = [('BLKZEROOUT', ('-z',))]
+    if discard_zeroes_data(volume_path):
+        methods.insert(0, ('BLKDISCARD', ()))
+
+    for method, flags in methods:
+        def clear_step(offset, length):
+            cmd = prefix + ['blkdiscard']
+            cmd.extend(flags)
+            cmd.extend(('-o', offset, '-l', length, volume_path))
+            utils.execute(*cmd, run_as_root=True)
+
+        try:
+            _run_clear_steps(clear_step, volume_path, size_in_m)
+            return method
+        except processutils.ProcessExecutionError as e:
+            LOG.debug("Clearing %(path)s with %(method)s failed: %(error)s",
+                      {'path': volume_path, 'method': method, 'error': e})
+
+
+def _clear_volume_with_writes(prefix, volume_path, size_in_m, blocksize,
+                              workers):
+    """Clear a volume writing zeroes on several ranges concurrently."""
+    blocksize = _check_blocksize(blocksize)
+    oflag = 'oflag=seek_bytes'
+    conv = ['conv=fdatasync']
+    if check_for_odirect_support('/dev/zero', volume_path, 'oflag=direct'):
+        oflag += ',direct'
+        conv = []
+
+    def clear_step(offset, length):
+        cmd = prefix + ['dd', 'if=/dev/zero', 'of=%s' % volume_path,
+                        'bs=%s' % blocksize, 'count=%d' % length,
+                        'seek=%d' % offset, 'iflag=count_bytes', oflag]
+        utils.execute(*(cmd + conv), run_as_root=True)
+
+    _run_clear_steps(clear_step, volume_path, size_in_m, workers)
+
+
 def clear_volume(volume_size, volume_path, volume_clear=None,
                  volume_clear_size=None, volume_clear_ionice=None,
-                 throttle=None):
+                 throttle=None, volume_clear_offload=None,
+                 volume_clear_workers=None):
     """Unprovision old volumes to prevent data leaking between users."""
     if volume_clear is None:
         volume_clear = CONF.volume_clear
@@ -619,21 +755,57 @@ def clear_volume(volume_size, volume_path, volume_clear=None,
     if volume_clear_ionice is None:
         volume_clear_ionice = CONF.volume_clear_ionice
 
+    if volume_clear_offload is None:
+        volume_clear_offload = CONF.volume_clear_offload
+
+    if volume_clear_workers is None:
+        volume_clear_workers = CONF.volume_clear_workers
+
     LOG.info("Performing secure delete on volume: %s", volume_path)
 
-    # We pass sparse=False explicitly here so that zero blocks are not
-    # skipped in order to clear the volume.
-    if volume_clear == 'zero':
-        return copy_volume('/dev/zero', volume_path, volume_clear_size,
-                           CONF.volume_dd_blocksize,
-                           sync=True, execute=utils.execute,
-                           ionice=volume_clear_ionice,
-                           throttle=throttle, sparse=False)
-    else:
+    if volume_clear != 'zero':
         raise exception.InvalidConfigurationValue(
             option='volume_clear',
             value=volume_clear)
 
+    if volume_clear_offload or volume_clear_workers > 1:
+        if not throttle:
+            throttle = throttling.Throttle.get_default()
+        start_time = timeutils.utcnow()
+        with throttle.subcommand('/dev/zero', volume_path) as throttle_cmd:
+            prefix = throttle_cmd['prefix'][:]
+            if volume_clear_ionice:
+                prefix.extend(('ionice', volume_clear_ionice))
+
+            method = None
+            if volume_clear_offload:
+                method = _clear_volume_with_ioctl(prefix, volume_path,
+                                                  volume_clear_size)
+            if not method and volume_clear_workers > 1:
+                _clear_volume_with_writes(prefix, volume_path,
+                                          volume_clear_size,
+                                          CONF.volume_dd_blocksize,
+                                          volume_clear_workers)
+                method = 'dd'
+
+        if method:
+            duration = max(1, timeutils.delta_seconds(start_time,
+                                                      timeutils.utcnow()))
+            LOG.info("Cleared %(size)d MiB of %(path)s with %(method)s in "
+                     "%(duration).2f sec (%(mbps).2f MB/s).",
+                     {'size': volume_clear_size, 'path': volume_path,
+                      'method': method, 'duration': duration,
+                      'mbps': volume_clear_size / duration})
+            return
+
+    # We pass sparse=False explicitly here so that zero blocks are not
+    # skipped in order to clear the volume.
+    return copy_volume('/dev/zero', volume_path, volume_clear_size,
+                       CONF.volume_dd_blocksize,
+                       sync=True, execute=utils.execute,
+                       ionice=volume_clear_ionice,
+                       throttle=throttle, sparse=False)
+
 
 def supports_thin_provisioning():
     return brick_lvm.LVM.supports_thin_provisioning(